@@ -0,0 +1,360 @@
+#-------------------------------------------------------------------------------
+# Name:        nvgColumns.py
+# Purpose:     Columnar snapshots of NVG features for analysis.
+#
+# Author:      Dave Barrett
+#
+# Created:     19/10/2026
+# Copyright:   (c) Dave 2026
+# Licence:     <your licence>
+#-------------------------------------------------------------------------------
+
+"""
+This module provides a columnar form of the features read from NVG files so
+they can be loaded into numpy or dataframes without iterating the lists
+returned by nvgReader.
+
+Each attribute is a typed column: the numeric attributes are float64 arrays
+with NaN where the value is missing or not a number and the text attributes
+are unicode arrays with an empty string where the value is missing. The
+geometry is held as ragged coordinate arrays with offsets:
+    coords           - float64 array of shape (n, 2)
+    ring_offsets     - start of each ring, line or point in coords
+    part_offsets     - start of each part in ring_offsets
+    geometry_offsets - start of each feature in part_offsets
+Each offsets array has one more entry than the items it indexes so item i
+runs from offsets[i] to offsets[i + 1]. The layer column gives the list each
+feature was read into, an index into layerNames.
+
+Snapshots are written as Parquet when pyarrow is installed, with the geometry
+as nested lists of features, parts, rings and x,y coordinates whose offsets are
+the offsets arrays, or as an uncompressed numpy .npz archive. Loading a
+snapshot reads the arrays back without parsing any XML or building a geometry
+for each feature, .npz arrays are memory mapped. toWKB returns the geometry as
+WKB for other tools.
+"""
+import json
+import struct
+import zipfile
+
+import numpy
+import numpy.lib.format
+
+try:
+    import pyarrow
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+# the lists returned by nvgReader.Reader.read
+layerNames = ['points','polylines','polygons','multipoints']
+
+# attributes held as float64 columns, the rest are text
+numericAttributes = ['course','speed','width','min_alt','max_alt']
+
+# name of the fingerprint added to the rows by a reader with a dedupe
+fingerprintName = 'fingerprint'
+
+# numpy type of the text columns
+_text = getattr(numpy,'unicode_',numpy.str_)
+
+_geometryColumns = ['layer','geometry_offsets','part_offsets','ring_offsets','coords']
+
+# WKB geometry type codes
+_wkbTypes = {'Point': 1, 'LineString': 2, 'Polygon': 3,
+             'MultiPoint': 4, 'MultiLineString': 5, 'MultiPolygon': 6}
+
+
+def defaultExtension():
+    """Returns the snapshot file extension used when none is given, .parquet if
+    pyarrow is installed.
+    """
+    return '.parquet' if pyarrow is not None else '.npz'
+
+def _parts(geometry):
+    """Returns the parts of a geometry as a list of lists of rings, each ring a
+    list of coordinates.
+    """
+    if hasattr(geometry,'__geo_interface__'):
+        geometry = geometry.__geo_interface__
+    kind = geometry['type']
+    coordinates = geometry['coordinates']
+
+    if kind == 'Point':
+        return [[[coordinates]]]
+    if kind == 'MultiPoint':
+        return [[[point]] for point in coordinates]
+    if kind == 'LineString':
+        return [[coordinates]]
+    if kind == 'MultiLineString':
+        return [[line] for line in coordinates]
+    if kind == 'Polygon':
+        return [coordinates]
+    if kind == 'MultiPolygon':
+        return list(coordinates)
+    raise ValueError("Unsupported geometry type: {0}".format(kind))
+
+def _number(value):
+    try:
+        return float(value)
+    except (TypeError,ValueError):
+        return numpy.nan
+
+def columns(results,names,crs=4326):
+    """Returns a dictionary of column arrays for the lists returned by
+    nvgReader.Reader.read.
+
+    names are the attribute names of the values after the geometry in each
+    row, nvgReader.attributeNames. A value added after them by a reader with a
+    dedupe is returned as the fingerprint column. crs is the EPSG code of the
+    geometry, the target of the reader.
+    """
+    layer = []
+    geometryOffsets = [0]
+    partOffsets = [0]
+    ringOffsets = [0]
+    coords = []
+    values = dict((name,[]) for name in names)
+    fingerprints = []
+
+    for index, rows in enumerate(results):
+        for row in rows:
+            layer.append(index)
+            for part in _parts(row[0]):
+                for ring in part:
+                    coords.extend(tuple(point[:2]) for point in ring)
+                    ringOffsets.append(len(coords))
+                partOffsets.append(len(ringOffsets) - 1)
+            geometryOffsets.append(len(partOffsets) - 1)
+
+            for name, value in zip(names,row[1:]):
+                values[name].append(value)
+            if len(row) > len(names) + 1:
+                fingerprints.append(row[len(names) + 1])
+
+    data = {'layer': numpy.array(layer,dtype=numpy.int8),
+            'geometry_offsets': numpy.array(geometryOffsets,dtype=numpy.int64),
+            'part_offsets': numpy.array(partOffsets,dtype=numpy.int64),
+            'ring_offsets': numpy.array(ringOffsets,dtype=numpy.int64),
+            'coords': numpy.array(coords,dtype=float).reshape(-1,2),
+            'crs': int(crs)}
+
+    for name in names:
+        if name in numericAttributes:
+            data[name] = numpy.array([_number(v) for v in values[name]],dtype=float)
+        else:
+            data[name] = numpy.array([u'' if v is None else u'{0}'.format(v) for v in values[name]],
+                                     dtype=_text)
+    if fingerprints and len(fingerprints) == len(layer):
+        data[fingerprintName] = numpy.array(fingerprints,dtype=_text)
+
+    return data
+
+def attributeColumns(data):
+    """Returns the names of the attribute columns in data.
+    """
+    return [name for name in sorted(data) if name not in _geometryColumns and name != 'crs']
+
+def geometry(data,index):
+    """Returns the geometry of a feature as a GeoJSON style dictionary.
+    """
+    coords = data['coords']
+    rings = data['ring_offsets']
+    parts = data['part_offsets']
+    offsets = data['geometry_offsets']
+    layer = layerNames[data['layer'][index]]
+
+    polygons = []
+    for part in range(offsets[index],offsets[index + 1]):
+        polygons.append([coords[rings[ring]:rings[ring + 1]].tolist()
+                         for ring in range(parts[part],parts[part + 1])])
+
+    if layer == 'points':
+        return {'type': 'Point', 'coordinates': polygons[0][0][0]}
+    if layer == 'multipoints':
+        return {'type': 'MultiPoint', 'coordinates': [part[0][0] for part in polygons]}
+    if layer == 'polylines':
+        if len(polygons) == 1:
+            return {'type': 'LineString', 'coordinates': polygons[0][0]}
+        return {'type': 'MultiLineString', 'coordinates': [part[0] for part in polygons]}
+    if len(polygons) == 1:
+        return {'type': 'Polygon', 'coordinates': polygons[0]}
+    return {'type': 'MultiPolygon', 'coordinates': polygons}
+
+def _ringBytes(coords):
+    return struct.pack('<I',len(coords)) + numpy.ascontiguousarray(coords,dtype='<f8').tobytes()
+
+def toWKB(data):
+    """Returns a list of the WKB geometry of each feature.
+    """
+    coords = data['coords']
+    rings = data['ring_offsets']
+    parts = data['part_offsets']
+    offsets = data['geometry_offsets']
+
+    def header(kind):
+        return struct.pack('<BI',1,_wkbTypes[kind])
+
+    def partBytes(part,kind):
+        ringRange = range(parts[part],parts[part + 1])
+        if kind == 'Point':
+            return header(kind) + coords[rings[ringRange[0]]].astype('<f8').tobytes()
+        if kind == 'LineString':
+            return header(kind) + _ringBytes(coords[rings[ringRange[0]]:rings[ringRange[0] + 1]])
+        return header(kind) + struct.pack('<I',len(ringRange)) + \
+               b''.join(_ringBytes(coords[rings[r]:rings[r + 1]]) for r in ringRange)
+
+    singles = {'points': 'Point', 'polylines': 'LineString',
+               'polygons': 'Polygon', 'multipoints': 'Point'}
+    wkb = []
+    for index in range(len(data['layer'])):
+        layer = layerNames[data['layer'][index]]
+        kind = singles[layer]
+        partRange = range(offsets[index],offsets[index + 1])
+        if len(partRange) == 1 and layer != 'multipoints':
+            wkb.append(partBytes(partRange[0],kind))
+        else:
+            wkb.append(header('Multi' + kind) + struct.pack('<I',len(partRange)) +
+                       b''.join(partBytes(part,kind) for part in partRange))
+
+    return wkb
+
+
+def _geometryArray(data):
+    """Returns the geometry columns as a nested arrow list array of features,
+    parts, rings and x,y coordinates.
+
+    The offsets of each list are the offsets columns, so the arrays are used
+    as they are without building a geometry for each feature.
+    """
+    coords = numpy.ascontiguousarray(data['coords'],dtype=numpy.float64).reshape(-1)
+    values = pyarrow.FixedSizeListArray.from_arrays(pyarrow.array(coords),2)
+    for name in ('ring_offsets','part_offsets','geometry_offsets'):
+        offsets = pyarrow.array(numpy.asarray(data[name],dtype=numpy.int64))
+        values = pyarrow.LargeListArray.from_arrays(offsets,values)
+
+    return values
+
+def _listOffsets(values):
+    """Returns the offsets of an arrow list array as a numpy array starting at
+    zero and the list values they index.
+    """
+    offsets = values.offsets.to_numpy(zero_copy_only=True)
+    items = values.values
+    if len(offsets) and offsets[0] != 0:
+        # a slice of a larger array, the offsets are copied
+        items = items.slice(offsets[0],offsets[-1] - offsets[0])
+        offsets = offsets - offsets[0]
+
+    return offsets, items
+
+def _raggedColumns(values):
+    """Returns the ragged geometry columns of a nested list array written by
+    _geometryArray without copying the coordinates.
+    """
+    data = {}
+    for name in ('geometry_offsets','part_offsets','ring_offsets'):
+        data[name], values = _listOffsets(values)
+    data['coords'] = values.flatten().to_numpy(zero_copy_only=True).reshape(-1,2)
+
+    return data
+
+def _mapArchive(path):
+    """Returns the arrays in an uncompressed .npz archive memory mapped from
+    the file.
+
+    numpy.load does not memory map the arrays in an archive so each array
+    stored without compression is mapped at the offset of its data. Empty
+    arrays, scalars and anything else that cannot be mapped are read.
+    """
+    data = {}
+    with numpy.load(path) as archive, zipfile.ZipFile(path) as zipFile, open(path,'rb') as f:
+        for info in zipFile.infolist():
+            name = info.filename[:-4] if info.filename.endswith('.npy') else info.filename
+            array = None
+            if info.compress_type == zipfile.ZIP_STORED:
+                # the data follows the local header, whose extra field can
+                # differ from the one in the central directory
+                f.seek(info.header_offset)
+                header = struct.unpack('<4s5H3I2H',f.read(30))
+                f.seek(info.header_offset + 30 + header[9] + header[10])
+                version = numpy.lib.format.read_magic(f)
+                if version in ((1,0),(2,0)):
+                    if version == (1,0):
+                        shape, fortran, dtype = numpy.lib.format.read_array_header_1_0(f)
+                    else:
+                        shape, fortran, dtype = numpy.lib.format.read_array_header_2_0(f)
+                    if shape and all(shape) and not dtype.hasobject:
+                        array = numpy.memmap(path,dtype=dtype,mode='r',offset=f.tell(),
+                                             shape=shape,order='F' if fortran else 'C')
+            data[name] = array if array is not None else archive[name]
+
+    return data
+
+def write(data,path):
+    """Writes the columns to a snapshot file and returns the path written.
+
+    The format is chosen from the extension of path, .parquet or .npz. If path
+    has neither defaultExtension is added.
+    """
+    lower = path.lower()
+    if not (lower.endswith('.parquet') or lower.endswith('.npz')):
+        path += defaultExtension()
+        lower = path.lower()
+
+    if lower.endswith('.npz'):
+        arrays = dict(data)
+        arrays['crs'] = numpy.array(data['crs'],dtype=numpy.int64)
+        # stored without compression so load can memory map the arrays
+        numpy.savez(path,**arrays)
+        return path
+
+    if pyarrow is None:
+        raise ImportError("Writing Parquet requires pyarrow, use a .npz snapshot instead")
+
+    arrays = [_geometryArray(data),pyarrow.array(data['layer'])]
+    names = ['geometry','layer']
+    for name in attributeColumns(data):
+        values = data[name]
+        if values.dtype.kind == 'U':
+            # missing text is written as null
+            arrays.append(pyarrow.array(values,type=pyarrow.string(),mask=values == u''))
+        else:
+            arrays.append(pyarrow.array(values))
+        names.append(name)
+
+    table = pyarrow.Table.from_arrays(arrays,names=names)
+    metadata = dict(table.schema.metadata or {})
+    metadata[b'nvg'] = json.dumps({'crs': data['crs']}).encode('utf-8')
+    pyarrow.parquet.write_table(table.replace_schema_metadata(metadata),path)
+
+    return path
+
+def load(path):
+    """Returns the dictionary of columns in a snapshot file written by write.
+
+    The arrays of a .npz archive are memory mapped and those of a parquet file
+    use the arrow buffers they were read into, so both are read only.
+    """
+    if path.lower().endswith('.npz'):
+        data = _mapArchive(path)
+        data['crs'] = int(data['crs'])
+        return data
+
+    if pyarrow is None:
+        raise ImportError("Reading Parquet requires pyarrow")
+
+    table = pyarrow.parquet.read_table(path,memory_map=True)
+    metadata = table.schema.metadata or {}
+    data = {'crs': json.loads(metadata.get(b'nvg',b'{"crs": 4326}').decode('utf-8'))['crs']}
+    for name in table.column_names:
+        column = table.column(name)
+        column = column.chunk(0) if column.num_chunks == 1 else column.combine_chunks()
+        if name == 'geometry':
+            data.update(_raggedColumns(column))
+        elif pyarrow.types.is_string(column.type):
+            data[name] = column.fill_null(u'').to_numpy(zero_copy_only=False).astype(_text)
+        else:
+            data[name] = column.to_numpy(zero_copy_only=True)
+
+    return data
@@ -0,0 +1,249 @@
+#-------------------------------------------------------------------------------
+# Name:        nvgConvert.py
+# Purpose:     Convert NVG documents between versions of the schema.
+#
+# Author:      Dave Barrett
+#
+# Created:     19/10/2026
+# Copyright:   (c) Dave 2026
+# Licence:     <your licence>
+#-------------------------------------------------------------------------------
+
+"""
+This module provides a streaming converter between the NVG versions supported
+by nvgReader (1.4.0, 1.5.0 and 2.0.0) that does not require arcpy.
+
+The document is read with the expat parser and written back out element by
+element, so memory use does not depend on the size of the file. The NVG
+namespace and version are rewritten and attributes that are named differently
+in the target version are renamed. All other markup, including circle, ellipse,
+arc and arcband elements, is copied unchanged rather than being densified.
+Elements that were introduced in a later version than the target cannot be
+represented and are dropped, the number dropped is returned in the results.
+"""
+import os
+import gzip
+import zipfile
+import xml.parsers.expat
+from xml.sax.saxutils import escape
+
+from nvgIO import openNVG, namespaces
+from nvgScanner import tags as featureTags
+
+# attributes renamed for each target version. The modifiers attribute was
+# named modifier in version 1.4.0.
+_attributes = {'1.4.0': {'modifiers': 'modifier'},
+               '1.5.0': {'modifier': 'modifiers'},
+               '2.0.0': {'modifier': 'modifiers'}}
+
+# elements introduced in each version
+_added = {'2.0.0': ['rect','orbit']}
+
+_nvgNamespaces = set(namespaces.values())
+
+
+def _replace(source,target):
+    """Moves the file source over target, replacing target if it exists.
+    """
+    if hasattr(os,'replace'):
+        os.replace(source,target)
+    else:
+        # os.rename cannot overwrite a file on Windows under Python 2
+        if os.path.exists(target):
+            os.remove(target)
+        os.rename(source,target)
+
+def _quote(value):
+    """Returns an attribute value escaped and quoted.
+    """
+    return '"' + escape(value,{'"': '&quot;', '\n': '&#10;', '\r': '&#13;', '\t': '&#9;'}) + '"'
+
+
+class Converter(object):
+    """Streaming NVG version converter.
+    """
+    def __init__(self,version='1.5.0'):
+        """Set the target NVG version.
+        """
+        if version not in namespaces:
+            raise ValueError("Unsupported NVG version: {0}".format(version))
+        self.version = version
+        self.namespace = namespaces[version]
+        self.renamed = _attributes[version]
+
+        # elements from versions later than the target are dropped
+        self.unsupported = set()
+        for added, tags in _added.items():
+            if added > version:
+                self.unsupported.update(tags)
+
+        return
+
+    def convert(self,nvgFile,outFile):
+        """Converts nvgFile to the target version and writes it to outFile.
+
+        nvgFile can be any file accepted by nvgReader.Reader including
+        compressed files and zip archives. If outFile ends in .gz the output is
+        gzip compressed. When nvgFile is a zip archive outFile is a folder and
+        each document is written to it using the name of the archive member.
+        Each output file is written to a temporary file in the same folder and
+        only replaces the target once the document has been converted, so a
+        failed conversion leaves any existing file unchanged.
+
+        Returns a list with a dictionary for each document converted, holding
+        the source and output names, the source version, the number of elements
+        and of feature elements written and the number of each element dropped.
+        """
+        archive = not hasattr(nvgFile,'read') and zipfile.is_zipfile(nvgFile)
+        if archive and not os.path.isdir(outFile):
+            os.makedirs(outFile)
+
+        results = []
+        for name, stream in openNVG(nvgFile):
+            target = outFile
+            if archive:
+                target = os.path.join(outFile,os.path.basename(name))
+
+            if hasattr(target,'write'):
+                result = self._convertStream(stream,target)
+            else:
+                # the process id keeps the name unique when files are
+                # converted in parallel
+                tmp = '{0}.{1}.tmp'.format(target,os.getpid())
+                try:
+                    with open(tmp,'wb') as f:
+                        if target.lower().endswith('.gz'):
+                            # the gzip header names the target, not the temporary file
+                            with gzip.GzipFile(os.path.basename(target),'wb',fileobj=f) as out:
+                                result = self._convertStream(stream,out)
+                        else:
+                            result = self._convertStream(stream,f)
+                    _replace(tmp,target)
+                finally:
+                    if os.path.exists(tmp):
+                        os.remove(tmp)
+
+            result['source'] = name
+            result['output'] = target
+            results.append(result)
+
+        return results
+
+    def _convertStream(self,stream,out):
+        """Converts a single NVG document read from stream into out.
+        """
+        parser = xml.parsers.expat.ParserCreate()
+        parser.ordered_attributes = True
+        parser.buffer_text = True
+
+        state = {'open': False, 'skip': 0, 'count': 0, 'features': 0, 'version': None}
+        skipped = {}
+        # prefix: namespace uri for each open element
+        scopes = [{}]
+
+        def write(text):
+            out.write(text.encode('utf-8'))
+
+        def closeStart():
+            # complete a start tag once the element is known to have content
+            if state['open']:
+                write('>')
+                state['open'] = False
+
+        def start(name,attrs):
+            if state['skip']:
+                state['skip'] += 1
+                return
+            closeStart()
+
+            # namespace declarations on this element
+            scope = scopes[-1]
+            pairs = list(zip(attrs[0::2],attrs[1::2]))
+            for key, value in pairs:
+                if key == 'xmlns' or key.startswith('xmlns:'):
+                    if scope is scopes[-1]:
+                        scope = dict(scope)
+                    scope[key[6:]] = value
+
+            prefix, local = name.split(':',1) if ':' in name else ('',name)
+            isNVG = scope.get(prefix) in _nvgNamespaces
+
+            if isNVG and local in self.unsupported:
+                skipped[local] = skipped.get(local,0) + 1
+                state['skip'] = 1
+                return
+
+            scopes.append(scope)
+            parts = []
+            for key, value in pairs:
+                if (key == 'xmlns' or key.startswith('xmlns:')) and value in _nvgNamespaces:
+                    value = self.namespace
+                elif isNVG and ':' not in key:
+                    if local == 'nvg' and key == 'version':
+                        state['version'] = value
+                        value = self.version
+                    key = self.renamed.get(key,key)
+                parts.append(' ' + key + '=' + _quote(value))
+
+            write('<' + name + ''.join(parts))
+            state['open'] = True
+            state['count'] += 1
+            if isNVG and local in featureTags:
+                state['features'] += 1
+
+        def end(name):
+            if state['skip']:
+                state['skip'] -= 1
+                return
+            scopes.pop()
+            if state['open']:
+                write('/>')
+                state['open'] = False
+            else:
+                write('</' + name + '>')
+
+        def characters(data):
+            if state['skip']:
+                return
+            closeStart()
+            write(escape(data))
+
+        def comment(data):
+            if state['skip']:
+                return
+            closeStart()
+            write('<!--' + data + '-->')
+            if len(scopes) == 1:
+                # expat does not report the line breaks outside the document
+                write('\n')
+
+        def instruction(target,data):
+            if state['skip']:
+                return
+            closeStart()
+            write('<?' + target + ' ' + data + '?>')
+            if len(scopes) == 1:
+                write('\n')
+
+        parser.StartElementHandler = start
+        parser.EndElementHandler = end
+        parser.CharacterDataHandler = characters
+        parser.CommentHandler = comment
+        parser.ProcessingInstructionHandler = instruction
+
+        write('<?xml version="1.0" encoding="UTF-8"?>\n')
+        parser.ParseFile(stream)
+        write('\n')
+
+        return {'version': state['version'],
+                'elements': state['count'],
+                'features': state['features'],
+                'skipped': skipped}
+
+
+def convert(nvgFile,outFile,version='1.5.0'):
+    """Converts nvgFile to the NVG version and writes it to outFile.
+
+    See Converter.convert.
+    """
+    return Converter(version).convert(nvgFile,outFile)
@@ -0,0 +1,152 @@
+#-------------------------------------------------------------------------------
+# Name:        nvgDedupe.py
+# Purpose:     Remove duplicate features when loading many NVG files.
+#
+# Author:      Dave Barrett
+#
+# Created:     19/10/2026
+# Copyright:   (c) Dave 2026
+# Licence:     <your licence>
+#-------------------------------------------------------------------------------
+
+"""
+This module provides duplicate detection for NVG features read from many files,
+such as overlays from different headquarters that publish the same control
+measures.
+
+Each element is fingerprinted from its tag, geometry parameters rounded to a
+fixed precision and a set of key attributes. The fingerprint is a 64 bit hash
+so the set of fingerprints stays small, and the number kept is bounded. The
+first element with a fingerprint is kept and the files it was seen in are
+recorded against the fingerprint. Elements are checked as they are read so
+duplicates are skipped before their geometry is built.
+"""
+import hashlib
+import binascii
+from collections import OrderedDict
+
+# attributes holding the geometry parameters of each element
+geometryAttributes = {'point': ['x','y'],
+                      'text': ['x','y'],
+                      'polyline': ['points'],
+                      'corridor': ['points','width'],
+                      'polygon': ['points'],
+                      'multipoint': ['points'],
+                      'circle': ['cx','cy','r'],
+                      'ellipse': ['cx','cy','rx','ry','rotation'],
+                      'arc': ['cx','cy','rx','ry','rotation','startangle','endangle'],
+                      'arcband': ['cx','cy','minr','maxr','startangle','endangle']}
+
+# attributes compared by default, uri and style usually differ between
+# publishers of the same feature
+keyAttributes = ['symbol','label','modifiers','modifier','course','speed',
+                 'minaltitude','maxaltitude']
+
+if hasattr(hashlib,'blake2b'):
+    def _hash(data):
+        return hashlib.blake2b(data,digest_size=8).digest()
+else:
+    def _hash(data):
+        return hashlib.md5(data).digest()[:8]
+
+
+class Deduplicator(object):
+    """Fingerprint set shared by the readers of many NVG files.
+    """
+    def __init__(self,keys=None,precision=6,maxItems=1000000):
+        """Create an empty fingerprint set.
+
+        keys - attributes compared in addition to the geometry, defaults to
+               keyAttributes.
+        precision - number of decimal places geometry parameters are compared to.
+        maxItems - number of fingerprints kept. When the set is full the oldest
+                   fingerprint is forgotten so a later copy of that feature
+                   would be kept again.
+        """
+        self.keys = list(keys if keys is not None else keyAttributes)
+        self.precision = precision
+        self.maxItems = maxItems
+        # source file names, fingerprints refer to them by index
+        self.sources = []
+        self._sourceIndex = {}
+        # fingerprint: list of source indexes
+        self._seen = OrderedDict()
+        self.duplicates = 0
+        self._format = '{0:.' + str(int(precision)) + 'f}'
+
+        return
+
+    def _number(self,value):
+        """Returns a numeric value normalised to the precision.
+        """
+        try:
+            number = round(float(value),self.precision)
+        except ValueError:
+            return value.strip()
+        # -0.0 and 0.0 are the same position
+        return self._format.format(number + 0.0)
+
+    def _points(self,value):
+        """Returns a points attribute normalised to the precision.
+        """
+        pairs = []
+        for pair in value.split():
+            pairs.append(','.join(self._number(v) for v in pair.split(',')))
+        return ' '.join(pairs)
+
+    def fingerprint(self,element):
+        """Returns the 8 byte fingerprint of a minidom element.
+        """
+        tag = element.localName
+        parts = [tag]
+        for name in geometryAttributes.get(tag,[]):
+            value = element.getAttribute(name)
+            if name == 'points':
+                parts.append(self._points(value))
+            else:
+                parts.append(self._number(value) if value else '')
+        for name in self.keys:
+            parts.append(element.getAttribute(name).strip())
+        if tag == 'text':
+            for content in element.getElementsByTagNameNS(element.namespaceURI,'content'):
+                parts.append(''.join(node.data for node in content.childNodes
+                                     if node.nodeType == node.TEXT_NODE).strip())
+
+        return _hash(u'\x1f'.join(parts).encode('utf-8'))
+
+    def add(self,element,source):
+        """Records the element read from source.
+
+        Returns the fingerprint if this is the first copy of the feature, or
+        None if it is a duplicate.
+        """
+        index = self._sourceIndex.get(source)
+        if index is None:
+            index = self._sourceIndex[source] = len(self.sources)
+            self.sources.append(source)
+
+        digest = self.fingerprint(element)
+        seen = self._seen.get(digest)
+        if seen is not None:
+            if index not in seen:
+                seen.append(index)
+            self.duplicates += 1
+            return None
+
+        self._seen[digest] = [index]
+        if self.maxItems and len(self._seen) > self.maxItems:
+            self._seen.popitem(last=False)
+
+        return digest
+
+    def sourcesOf(self,digest):
+        """Returns the list of files the feature with the fingerprint was read
+        from, the file of the copy kept first. The fingerprint can be given as
+        bytes or as the hex string added to the rows by nvgReader.
+        """
+        if len(digest) == 16:
+            digest = binascii.unhexlify(digest)
+        return [self.sources[index] for index in self._seen.get(digest,[])]
+
+    def __len__(self):
+        return len(self._seen)
@@ -0,0 +1,94 @@
+#-------------------------------------------------------------------------------
+# Name:        nvgIO.py
+# Purpose:     Open NVG documents from plain, compressed and zipped files.
+#
+# Author:      Dave Barrett
+#
+# Created:     19/10/2026
+# Copyright:   (c) Dave 2026
+# Licence:     <your licence>
+#-------------------------------------------------------------------------------
+
+"""
+This module provides the functions used by the other NVG modules to open NVG
+documents. It does not require arcpy so it can be used by the tools that work
+on NVG files directly, such as the version converter.
+"""
+import io
+import gzip
+import bz2
+import zipfile
+import xml.dom.pulldom
+
+# namespace based on the version of the NVG document.
+namespaces = {'1.4.0': 'http://tide.act.nato.int/schemas/2008/10/nvg',
+              '1.5.0': 'http://tide.act.nato.int/schemas/2009/10/nvg',
+              '2.0.0': 'https://tide.act.nato.int/schemas/2012/10/nvg'}
+
+def openNVG(nvgFile):
+    """Yields a (name, stream) tuple for each NVG document in nvgFile.
+
+    Plain NVG files are opened directly. Gzip and bzip2 compressed files and
+    zip archives are detected from their first bytes and returned as streams
+    that decompress as they are read so no temporary files are written. Every
+    .nvg member of a zip archive is returned in turn. An open file object is
+    returned unchanged.
+    """
+    if hasattr(nvgFile,'read'):
+        yield getattr(nvgFile,'name',None), nvgFile
+        return
+
+    with open(nvgFile,'rb') as f:
+        magic = f.read(4)
+
+    if magic.startswith(b'\x1f\x8b'):
+        with gzip.open(nvgFile,'rb') as stream:
+            yield nvgFile, stream
+    elif magic.startswith(b'BZh'):
+        with bz2.BZ2File(nvgFile,'rb') as stream:
+            yield nvgFile, stream
+    elif magic.startswith(b'PK\x03\x04'):
+        with zipfile.ZipFile(nvgFile) as archive:
+            for member in archive.namelist():
+                if not member.lower().endswith('.nvg'):
+                    continue
+                stream = archive.open(member)
+                try:
+                    yield nvgFile + '/' + member, stream
+                finally:
+                    stream.close()
+    else:
+        with open(nvgFile,'rb') as stream:
+            yield nvgFile, stream
+
+def seekable(nvgFile):
+    """Returns nvgFile, or a copy in memory of an open file object that
+    cannot seek, so the documents can be read more than once.
+    """
+    if hasattr(nvgFile,'read'):
+        try:
+            nvgFile.seek(nvgFile.tell())
+        except (AttributeError,IOError,OSError,ValueError):
+            return io.BytesIO(nvgFile.read())
+    return nvgFile
+
+def documentVersions(nvgFile):
+    """Returns a (name, version) tuple for each NVG document in nvgFile.
+
+    Only the start of each document is parsed, up to the root element. An open
+    file object is returned to the position it was at so the documents can be
+    read again, see seekable.
+    """
+    position = nvgFile.tell() if hasattr(nvgFile,'read') else None
+    versions = []
+    for name, stream in openNVG(nvgFile):
+        version = ""
+        for event, node in xml.dom.pulldom.parse(stream):
+            if event == xml.dom.pulldom.START_ELEMENT:
+                version = node.getAttribute("version")
+                break
+        versions.append((name,version))
+    if position is not None:
+        nvgFile.seek(position)
+
+    return versions
@@ -19,12 +19,82 @@ The implementation proivded here attempts to read all mandatory properties from
 the NVG specification for version 1.4, future versions of these tools will
 include support for future versions as required.
 """
-import xml.dom.minidom
+import xml.dom.pulldom
 import arcpy
 import math
+import binascii
+import numpy
+from nvgIO import openNVG, namespaces, seekable, documentVersions
+from nvgSchema import Schema, ValidationError
+import nvgTrack
+import nvgProject
+from collections import OrderedDict
 
 # <a>, <g> and <composite> features not yet implemented
 
+# names of the attributes returned for each feature after the geometry
+attributeNames = ['uri','style','label','symbol','modifiers','course','speed',
+                  'width','min_alt','max_alt','parentNode']
+
+# feature types of the lists returned by Reader.read, in order
+featureTypes = ['point','polyline','polygon','multipoint']
+
+class ReadError(ValueError):
+    """Raised when an element cannot be read, the message names the element.
+    """
+    pass
+
+class ShapeCache(object):
+    """Bounded least recently used cache for the geometry of repeated shapes.
+    """
+    def __init__(self,size=1024):
+        """size is the number of entries kept, 0 disables the cache.
+        """
+        self.size = size
+        self.hits = 0
+        self.misses = 0
+        self._items = OrderedDict()
+
+    def get(self,key):
+        """Returns the cached value for key or None.
+        """
+        value = self._items.pop(key,None)
+        if value is None:
+            self.misses += 1
+            return None
+        # reinsert as the most recently used entry
+        self._items[key] = value
+        self.hits += 1
+        return value
+
+    def put(self,key,value):
+        """Adds the value to the cache, removing the least recently used entry
+        when the cache is full.
+        """
+        if self.size <= 0:
+            return
+        self._items.pop(key,None)
+        self._items[key] = value
+        if len(self._items) > self.size:
+            self._items.popitem(last=False)
+
+    def clear(self):
+        self._items.clear()
+
+
+class _PendingGeometry(object):
+    """Coordinates of a geometry waiting to be transformed to the target
+    coordinate system of the reader.
+    """
+    __slots__ = ('coordinates','geometry_type','source','geometry')
+
+    def __init__(self,coordinates,geometry_type,source):
+        self.coordinates = coordinates
+        self.geometry_type = geometry_type
+        self.source = source
+        self.geometry = None
+
+
 def geo2arithetic(inAngle):
     """converts a bearing to aritmetic angle.
     """
@@ -51,29 +121,60 @@ class Reader(object):
     """NATO Vector Graphic Reader instance. Reads and processes a NATO Vector
     Graphic to ESRI Geometry.
     """
-    def __init__(self,nvgFile):
+    def __init__(self,nvgFile,schema=None,tolerant=False,cacheSize=1024,dedupe=None,
+                 targetCrs=None):
         """Initiate the object and set the basic attributes
-        """
-        self.nvgFile = nvgFile
-        # namespace based on the version of the NVG document.
-        self.namespaces = {'1.4.0': 'http://tide.act.nato.int/schemas/2008/10/nvg',
-                            '1.5.0': 'http://tide.act.nato.int/schemas/2009/10/nvg',
-                            '2.0.0': 'https://tide.act.nato.int/schemas/2012/10/nvg'}
 
-        # parse the nvgFile
-        self.dom = xml.dom.minidom.parse(self.nvgFile)
+        schema is an optional nvgSchema.Schema or the path of one or more local
+        NVG XSD files. When given each element is validated as its feature is
+        read and ValidationError is raised for the first invalid element.
 
-        # get the nvg version
-        # consider moving this to a seperate method
-        self.version = self.dom.documentElement.getAttribute("version")
+        If tolerant is True elements that are invalid or cannot be read are
+        quarantined and skipped instead of raising an error.
 
-        # update the namespace based on the version of the document
-        if self.version == '1.4.0':
-            self.namespace = self.namespaces['1.4.0']
-        elif self.version == '1.5.0':
-            self.namespace = self.namespaces['1.5.0']
-        elif self.version == '2.0.0':
-            self.namespace = self.namespaces['2.0.0']
+        cacheSize is the number of circle, ellipse, arc and arcband shapes kept
+        for reuse by elements with the same parameters, 0 disables the cache.
+
+        dedupe is an optional nvgDedupe.Deduplicator shared by the readers of
+        many files. Features already read by any reader using it are skipped
+        and the fingerprint of each feature kept is appended to its row.
+
+        targetCrs is the EPSG code of the coordinate system of the returned
+        geometry, WGS84 (4326) by default. See nvgProject for the coordinate
+        systems supported when pyproj is not installed.
+        """
+        # an open file is read twice, for the versions and then the features
+        self.nvgFile = seekable(nvgFile)
+        self.tolerant = tolerant
+        # elements skipped by read in tolerant mode
+        self.quarantine = []
+        self.dedupe = dedupe
+        # number of duplicate elements skipped by read
+        self.duplicates = 0
+        # namespace based on the version of the NVG document.
+        self.namespaces = namespaces
+
+        # compressed files and zip archives are parsed straight from the
+        # decompressing stream. A zip archive can hold more than one document,
+        # each is parsed incrementally as the features are read so here only
+        # the version of each document is read.
+        versions = documentVersions(self.nvgFile)
+
+        if not versions:
+            raise ValueError("No NVG documents found in: {0}".format(self.nvgFile))
+
+        # schema used to validate the elements as they are read
+        if schema is not None and not isinstance(schema,Schema):
+            schema = Schema(schema)
+        self.schema = schema
+        if self.schema is not None:
+            for name, version in versions:
+                if version not in self.schema.versions:
+                    raise ValueError("No schema loaded for NVG version {0}: {1}".format(version,name))
+
+        # the first document sets the version and namespace
+        self.version = versions[0][1]
+        self.namespace = self.namespaces.get(self.version)
 
         # need to define the outputs based on the datatypes in the nvg
         self.esriPolygon = []
@@ -85,14 +186,63 @@ class Reader(object):
         self.wgs84 = arcpy.SpatialReference(4326)
         self.world_merc = arcpy.SpatialReference(3395)
 
+        # with a target coordinate system the geometry coordinates are kept
+        # until the end of read and transformed together, curves are
+        # transformed from world mercator without a WGS84 step
+        self.targetCrs = int(targetCrs) if targetCrs else 4326
+        self.target = self.wgs84
+        self._transformers = {}
+        if self.targetCrs != 4326:
+            self.target = arcpy.SpatialReference(self.targetCrs)
+            for source in (4326,3395):
+                self._transformers[source] = nvgProject.Transformer(source,self.targetCrs)
+
+        # vertex offsets of curved shapes keyed on their parameters and the
+        # finished geometry keyed on the parameters and centre
+        self._offsetCache = ShapeCache(cacheSize)
+        self._shapeCache = ShapeCache(cacheSize)
+
         return
 
 
-    def _getElement(self,tag):
-        """Return all elements with given tag with the correct namespace for the
-        version of NVG.
+    def _getElement(self,name,stream,tags):
+        """Yields the elements with one of the tags and the correct namespace
+        for the version of the NVG document read from stream.
+
+        The document is read with the pulldom parser and only the element being
+        yielded is built, with its content, so memory use does not grow with
+        the size of the document. Elements are yielded in document order as
+        tuples of (location, element, parent). The location names the document,
+        tag and index of the element for validation and quarantine messages and
+        parent is the name of the element's parent.
         """
-        return self.dom.getElementsByTagNameNS(self.namespace,tag)
+        events = xml.dom.pulldom.parse(stream)
+        namespace = None
+        parents = []
+        counts = dict((tag,0) for tag in tags)
+        for event, node in events:
+            if event == xml.dom.pulldom.START_ELEMENT:
+                if not parents:
+                    namespace = self.namespaces.get(node.getAttribute("version"))
+                elif node.namespaceURI == namespace and node.localName in counts:
+                    tag = node.localName
+                    # expanding the element reads up to its end tag
+                    events.expandNode(node)
+                    yield ({'source': name, 'tag': tag, 'index': counts[tag],
+                            'uri': node.getAttribute('uri') or None},node,parents[-1])
+                    counts[tag] += 1
+                    continue
+                parents.append(node.nodeName)
+            elif event == xml.dom.pulldom.END_ELEMENT:
+                parents.pop()
+
+    def _attribute(self,element,name):
+        """Returns the value of a mandatory attribute of the element.
+        """
+        attribute = element.attributes.get(name)
+        if attribute is None:
+            raise ValueError("missing attribute '{0}'".format(name))
+        return attribute.value
 
     def _cleanPoints(self,points):
         """Cleans a string of point coordinate pairs and returns a list of
@@ -120,6 +270,9 @@ class Reader(object):
     def _buildPoint(self,x,y):
         """build a point geometry from x,y coordinates.
         """
+        if self._transformers:
+            return _PendingGeometry([[float(x),float(y)]],'POINT',4326)
+
         # construct the geometry
         pnt = arcpy.Point(x,y)
         pGeom = arcpy.PointGeometry(pnt,self.wgs84)
@@ -144,10 +297,34 @@ class Reader(object):
         # clean the point string
         cPoints = self._cleanPoints(points)
 
+        return self._buildFromCoordinates(cPoints,geometry_type,spatial_reference)
+
+    def _buildFromCoordinates(self,coordinates,geometry_type,spatial_reference):
+        """Builds the relevant geometry from a list of x,y coordinate pairs.
+
+        See _buildGeometry for the valid geometry types and spatial references.
+        """
+        if self._transformers:
+            return _PendingGeometry(coordinates,geometry_type,spatial_reference.factoryCode)
+
+        geom = self._makeGeometry(coordinates,geometry_type,spatial_reference)
+
+        # ensure final geom is returned in wgs84
+        if geom.spatialReference.factoryCode != 4326:
+            geom = self._projectGeometry(geom,self.wgs84)
+        return geom
+
+    def _makeGeometry(self,coordinates,geometry_type,spatial_reference):
+        """Returns the arcpy geometry of the coordinates in spatial_reference.
+        """
+        if geometry_type == 'POINT':
+            x, y = coordinates[0]
+            return arcpy.PointGeometry(arcpy.Point(x,y),spatial_reference)
+
         # array to hold point objects
         array = arcpy.Array()
 
-        for point in cPoints:
+        for point in coordinates:
             pnt = arcpy.Point()
             pnt.X = point[0]
             pnt.Y = point[1]
@@ -160,11 +337,42 @@ class Reader(object):
         elif geometry_type == 'MULTIPOINT':
             geom = arcpy.Multipoint(array,spatial_reference)
 
-        # ensure final geom is returned in wgs84
-        if geom.spatialReference.factoryCode != 4326:
-            geom = self._projectGeometry(geom,self.wgs84)
         return geom
 
+    def _transformPending(self,results):
+        """Transforms the coordinates of all the pending geometries in results
+        to the target coordinate system and replaces them with the geometry.
+
+        The coordinates from each source coordinate system are transformed as
+        a single array.
+        """
+        pending = {}
+        for rows in results:
+            for row in rows:
+                if row[0].geometry is None:
+                    pending[id(row[0])] = row[0]
+
+        for source, transformer in self._transformers.items():
+            group = [geom for geom in pending.values() if geom.source == source]
+            if not group:
+                continue
+            coords = numpy.concatenate([numpy.asarray(geom.coordinates,dtype=float).reshape(-1,2)
+                                        for geom in group])
+            x, y = transformer.transform(coords[:,0],coords[:,1])
+            xy = numpy.column_stack((x,y)).tolist()
+
+            start = 0
+            for geom in group:
+                end = start + len(geom.coordinates)
+                geom.geometry = self._makeGeometry(xy[start:end],geom.geometry_type,self.target)
+                start = end
+
+        for rows in results:
+            for row in rows:
+                row[0] = row[0].geometry
+
+        return
+
     def _pointString(self,points):
         """Returns a string in the format required by NVG for point coordinates.
 
@@ -178,145 +386,174 @@ class Reader(object):
 
         return s
 
+    def _projectCentre(self,cx,cy):
+        """Returns the x,y of the centre of a shape in world mercator.
+        """
+        if self._transformers:
+            return (nvgProject.mercatorX(math.radians(float(cx))),
+                    float(nvgProject.mercatorY(math.radians(float(cy)))))
+
+        pGeom = arcpy.PointGeometry(arcpy.Point(cx,cy),self.wgs84)
+        centrePnt = self._projectGeometry(pGeom,self.world_merc)
+
+        return centrePnt.firstPoint.X, centrePnt.firstPoint.Y
+
+    def _buildShape(self,key,cx,cy,offsets):
+        """Returns the geometry of a circle, ellipse, arc or arcband.
+
+        key identifies the shape parameters other than the centre. offsets is
+        called to generate the geometry type and the world mercator offsets of
+        the vertices from the centre. Offsets are cached on key and translated
+        to each new centre, identical shapes share the same geometry.
+        """
+        shapeKey = key + (float(cx),float(cy))
+        geom = self._shapeCache.get(shapeKey)
+        if geom is not None:
+            return geom
+
+        cached = self._offsetCache.get(key)
+        if cached is None:
+            cached = offsets()
+            self._offsetCache.put(key,cached)
+        geometry_type, dxy = cached
+
+        cX, cY = self._projectCentre(cx,cy)
+        points = [[cX + dx,cY + dy] for dx, dy in dxy]
+        geom = self._buildFromCoordinates(points,geometry_type,self.world_merc)
+        self._shapeCache.put(shapeKey,geom)
+
+        return geom
+
     def _buildElliptical(self,cx,cy,rx,ry,rotation,startangle=0,endangle=360):
         """Generates a set of point cordinates that describe an ellipse or an arc.
 
         Coordinates need to be projected before using the tools.
         """
-        points = []
-        # projects the cx,cy to world mercator
-        pGeom = arcpy.PointGeometry(arcpy.Point(cx,cy),self.wgs84)
-        centrePnt = self._projectGeometry(pGeom,self.world_merc)
-        cX = centrePnt.firstPoint.X
-        cY = centrePnt.firstPoint.Y
-        rotation = math.radians(float(rotation))
-        step = 1
+        rx = float(rx)
+        ry = float(ry)
+        rotation = float(rotation)
         startangle = float(startangle)
         endangle = float(endangle)
 
-        if startangle > endangle:
-            endangle=endangle + 360
+        def offsets():
+            points = []
+            rot = math.radians(rotation)
+            step = 1
+            start = startangle
+            end = endangle
 
-        # generate points and rotate
-        for theata in range(int(startangle),int(endangle),step):
-            #caclulate points on the ellipse
-            theata = math.radians(float(theata))
-            X = float(rx) * math.cos(theata)
-            Y = float(ry) * math.sin(theata)
+            if start > end:
+                end = end + 360
 
-            # rotate point around the centre
-            rotX = cX + X * math.cos(rotation) + Y * math.sin(rotation)
-            rotY = cY - X * math.sin(rotation) + Y * math.cos(rotation)
+            # generate points and rotate
+            for theata in range(int(start),int(end),step):
+                #caclulate points on the ellipse
+                theata = math.radians(float(theata))
+                X = rx * math.cos(theata)
+                Y = ry * math.sin(theata)
 
-            points.append([rotX,rotY])
+                # rotate point around the centre
+                rotX = X * math.cos(rot) + Y * math.sin(rot)
+                rotY = - X * math.sin(rot) + Y * math.cos(rot)
 
-        # build the geometry
-        if startangle != 0 or endangle != 360:
-            geom = self._buildGeometry(self._pointString(points),"POLYLINE",self.world_merc)
-        else:
-            geom = self._buildGeometry(self._pointString(points),"POLYGON",self.world_merc)
+                points.append([rotX,rotY])
 
-        return geom
+            # build the geometry
+            if start != 0 or end != 360:
+                return "POLYLINE", points
+            return "POLYGON", points
+
+        return self._buildShape(('ellipse',rx,ry,rotation,startangle,endangle),cx,cy,offsets)
 
     def _buildCircle(self,cx,cy,r):
         """Returns arcpy.Polygon circle from the cx, cy and radius.
 
         The radius needs to be in the same units as the cx,cy location.
         """
-        # may need to move the projection code to a seperate method as it will
-        # need to be done multiple times
-
-        # project the point to world mercator
-        pGeom_wgs84 = arcpy.PointGeometry(arcpy.Point(cx,cy),self.wgs84)
-        pGeom_WM = self._projectGeometry(pGeom_wgs84,self.world_merc)
+        r = float(r)
 
-        # buffer the point by the radius
-        polygon_wm = pGeom_WM.buffer(float(r))
-        # return the polygon in wgs84 geographics
-        polygon = self._projectGeometry(polygon_wm,self.wgs84)
+        def offsets():
+            # buffer a point at the origin of world mercator by the radius, the
+            # buffer vertices are the offsets from the centre of any circle
+            origin = arcpy.PointGeometry(arcpy.Point(0,0),self.world_merc)
+            polygon_wm = origin.buffer(r)
+            return "POLYGON", [[pnt.X,pnt.Y] for pnt in polygon_wm.getPart(0) if pnt]
 
-        return polygon
+        return self._buildShape(('circle',r),cx,cy,offsets)
 
     def _buildArcband(self,cx,cy,minr,maxr,start,end):
         """Builds a wedge describing an area between two concentric circles.
         """
-        # project the point to metres
-        pGeom = arcpy.PointGeometry(arcpy.Point(cx,cy),self.wgs84)
-        centrePnt = self._projectGeometry(pGeom,self.world_merc)
-        cx = centrePnt.firstPoint.X
-        cy = centrePnt.firstPoint.Y
-
         # convert values to float
         r1 = float(minr)
         r2 = float(maxr)
         start = float(start)
         end = float(end)
 
-        # convert the bearings from north to maths for use in the coordinate calculations
-        #start = math.radians(90 - start)
-        if start > end:
-            end = end + 360
-            end = math.radians(90 - end)
-        else:
-            end = math.radians(90 - end)
-        start = math.radians(90 - start)
-        #Calculate the end x,y for the wedge
-        x_end = cx + r2*math.cos(start)
-        y_end = cy + r2*math.sin(start)
-
-        #Set the step value for the x,y coordiantes
-        i = math.radians(0.1)
-
-        points = []
-        #Calculate the outer edge of the wedge
-        a = start
-
-        #If r1 == 0 then create a wedge from the centre point
-        if r1 == 0:
-            #Add the start point to the array
-            points.append([cx,cy])
-            #Calculate the rest of the wedge
-            while a >= end:
-                X = cx + r2*math.cos(a)
-                Y = cy + r2*math.sin(a)
-
-                points.append([X,Y])
-                a -= i
-            #Close the polygon
-            X = cx
-            Y = cy
-
-            points.append([X,Y])
-
-        else:
-            while a >= end:
-                X = cx + r2*math.cos(a)
-                Y = cy + r2*math.sin(a)
-                a -= i
-                points.append([X,Y])
+        def offsets():
+            # offsets are calculated from a centre at 0,0
+            cx = 0.0
+            cy = 0.0
 
+            # convert the bearings from north to maths for use in the coordinate calculations
+            if start > end:
+                a_end = math.radians(90 - (end + 360))
+            else:
+                a_end = math.radians(90 - end)
+            a_start = math.radians(90 - start)
+            #Calculate the end x,y for the wedge
+            x_end = cx + r2*math.cos(a_start)
+            y_end = cy + r2*math.sin(a_start)
+
+            #Set the step value for the x,y coordiantes
+            i = math.radians(0.1)
+
+            points = []
+            #Calculate the outer edge of the wedge
+            a = a_start
+
+            #If r1 == 0 then create a wedge from the centre point
+            if r1 == 0:
+                #Add the start point to the array
+                points.append([cx,cy])
+                #Calculate the rest of the wedge
+                while a >= a_end:
+                    X = cx + r2*math.cos(a)
+                    Y = cy + r2*math.sin(a)
+
+                    points.append([X,Y])
+                    a -= i
+                #Close the polygon
+                points.append([cx,cy])
 
-            #Caluclate the inner edge of the wedge
-            a = end
-            while a <= start:
-                a += i ## should this be bofore the calc or after?
-                X = cx + r1*math.cos(a)
-                Y = cy + r1*math.sin(a)
-
-                points.append([X,Y])
+            else:
+                while a >= a_end:
+                    X = cx + r2*math.cos(a)
+                    Y = cy + r2*math.sin(a)
+                    a -= i
+                    points.append([X,Y])
 
+                #Caluclate the inner edge of the wedge
+                a = a_end
+                while a <= a_start:
+                    a += i ## should this be bofore the calc or after?
+                    X = cx + r1*math.cos(a)
+                    Y = cy + r1*math.sin(a)
 
+                    points.append([X,Y])
 
-            #Close the polygon by adding the end point
-            points.append([x_end,y_end])
+                #Close the polygon by adding the end point
+                points.append([x_end,y_end])
 
-        # build the geom
-        geom = self._buildGeometry(self._pointString(points),"POLYGON",self.world_merc)
+            return "POLYGON", points
 
-        return geom
+        return self._buildShape(('arcband',r1,r2,start,end),cx,cy,offsets)
 
-    def _readAttributes(self,element):
+    def _readAttributes(self,element,parent=None):
         """reads attrbiutes from
+
+        parent is the name of the parent element, by default the name of the
+        element's parentNode.
         """
         # get all the attributes for the element
         attributes = element.attributes
@@ -388,9 +625,166 @@ class Reader(object):
         else:
             data.append(None)
         # parent node
-        data.append(element.parentNode.nodeName)
+        if parent is None:
+            parent = element.parentNode.nodeName
+        data.append(parent)
         return data
 
+    def _readFeature(self,location,element,build,results,parent=None):
+        """Builds the geometry of a single element with build and appends it
+        with the attributes to results. parent is the name of the parent
+        element, see _readAttributes.
+
+        The element is validated first if a schema was given. In tolerant mode
+        an element that cannot be read is added to the quarantine and skipped.
+        Otherwise a ValidationError, or a ReadError for any other error, is
+        raised naming the element and with its location as the location
+        attribute.
+        """
+        try:
+            if self.schema is not None:
+                errors = self.schema.errors(element)
+                if errors:
+                    raise ValidationError('; '.join(errors))
+            if self.dedupe is not None:
+                digest = self.dedupe.add(element,location['source'])
+                if digest is None:
+                    self.duplicates += 1
+                    return
+            geom = build(element)
+            attrs = self._readAttributes(element,parent)
+        except Exception as e:
+            error = "{0}: {1}".format(type(e).__name__,e)
+            if not self.tolerant:
+                # the same location and error as the quarantine entry
+                if isinstance(e,ValidationError):
+                    raised = ValidationError("{0}: {1}".format(self._location(location),e))
+                else:
+                    raised = ReadError("{0}: {1}".format(self._location(location),error))
+                raised.location = dict(location)
+                raise raised
+            quarantined = dict(location)
+            quarantined['error'] = error
+            self.quarantine.append(quarantined)
+            return
+
+        attrs.insert(0,geom)
+        if self.dedupe is not None:
+            attrs.append(binascii.hexlify(digest).decode('ascii'))
+        results.append(attrs)
+
+        return
+
+    def _location(self,location):
+        """Returns a description of the location of an element.
+        """
+        text = "{0}: {1}[{2}]".format(location['source'],location['tag'],location['index'])
+        if location['uri']:
+            text += " uri={0}".format(location['uri'])
+        return text
+
+    def summary(self):
+        """Returns a summary of the features quarantined by the last read.
+        """
+        if not self.quarantine:
+            return "No features quarantined"
+
+        counts = {}
+        for quarantined in self.quarantine:
+            counts[quarantined['tag']] = counts.get(quarantined['tag'],0) + 1
+        lines = ["{0} features quarantined ({1})".format(len(self.quarantine),
+                 ', '.join("{0} {1}".format(tag,counts[tag]) for tag in sorted(counts)))]
+        for quarantined in self.quarantine:
+            lines.append("  {0}: {1}".format(self._location(quarantined),quarantined['error']))
+
+        return '\n'.join(lines)
+
+    def tracks(self,points=None):
+        """Returns the position, course and speed of the moving point features
+        as numeric arrays.
+
+        points is the list of points returned by read, if it is not given the
+        features are read. Only points with a numeric course and speed are
+        returned, see nvgTrack.tracks. The arrays can be passed straight to
+        nvgTrack.deadReckon.
+        """
+        if self.targetCrs != 4326:
+            raise ValueError("Tracks require WGS84 geometry, the target is: {0}".format(self.targetCrs))
+        if points is None:
+            points = self.read()[0]
+
+        # rows hold the geometry before the attributes
+        return nvgTrack.tracks(points,attributeNames.index('course') + 1,
+                               attributeNames.index('speed') + 1)
+
+    def iterBatches(self,batchSize=1000):
+        """Yields the features in batches as they are read.
+
+        Each batch is a tuple (featureType, rows) where featureType is one of
+        point, polyline, polygon or multipoint and rows is a list of up to
+        batchSize features in the form returned by read. Only the features of
+        the current batches are held, so the rows can be inserted while the
+        rest of the file is read. Each document is parsed incrementally and
+        only the element being read is built, so memory use depends on the
+        batch size rather than the size of the file. Features are read in
+        document order and batches of each feature type are yielded as they
+        fill, the last batch of each type once all the elements have been
+        read. An error in the XML is raised when it is reached, after the
+        batches before it have been yielded.
+
+        If batchSize is None a single batch is yielded for each feature type
+        that has features.
+        """
+        self.quarantine = []
+        self.duplicates = 0
+
+        attr = self._attribute
+        point, polyline, polygon, multipoint = range(len(featureTypes))
+
+        # geometry builder and feature type for each element type
+        builders = [
+            ('point', lambda e: self._buildPoint(attr(e,'x'),attr(e,'y')), point),
+            ('text', lambda e: self._buildPoint(attr(e,'x'),attr(e,'y')), point),
+            ('polyline', lambda e: self._buildGeometry(attr(e,'points'),'POLYLINE',self.wgs84), polyline),
+            ('corridor', lambda e: self._buildGeometry(attr(e,'points'),'POLYLINE',self.wgs84), polyline),
+            ('arc', lambda e: self._buildElliptical(attr(e,'cx'),attr(e,'cy'),attr(e,'rx'),
+                                                    attr(e,'ry'),attr(e,'rotation'),
+                                                    attr(e,'startangle'),attr(e,'endangle')), polyline),
+            ('polygon', lambda e: self._buildGeometry(attr(e,'points'),'POLYGON',self.wgs84), polygon),
+            ('circle', lambda e: self._buildCircle(attr(e,'cx'),attr(e,'cy'),attr(e,'r')), polygon),
+            ('ellipse', lambda e: self._buildElliptical(attr(e,'cx'),attr(e,'cy'),attr(e,'rx'),
+                                                        attr(e,'ry'),attr(e,'rotation')), polygon),
+            ('arcband', lambda e: self._buildArcband(attr(e,'cx'),attr(e,'cy'),attr(e,'minr'),
+                                                     attr(e,'maxr'),attr(e,'startangle'),
+                                                     attr(e,'endangle')), polygon),
+            ('multipoint', lambda e: self._buildGeometry(attr(e,'points'),'MULTIPOINT',self.wgs84), multipoint)]
+        builders = dict((tag,(build,index)) for tag, build, index in builders)
+
+        batches = [[] for featureType in featureTypes]
+
+        # build geometries and get the aributes for each element as the
+        # documents are parsed, one at a time
+        for name, stream in openNVG(self.nvgFile):
+            for location, element, parent in self._getElement(name,stream,builders):
+                build, index = builders[location['tag']]
+                self._readFeature(location,element,build,batches[index],parent)
+                element.unlink()
+                if batchSize and len(batches[index]) >= batchSize:
+                    yield featureTypes[index], self._finishBatch(batches[index])
+                    batches[index] = []
+
+        for index, rows in enumerate(batches):
+            if rows:
+                yield featureTypes[index], self._finishBatch(rows)
+
+    def _finishBatch(self,rows):
+        """Returns the rows of a batch with their geometry transformed to the
+        target coordinate system.
+        """
+        if self._transformers:
+            self._transformPending([rows])
+        return rows
+
     def read(self):
         """reads all elements in an NVG into the relevant esri feature types.
 
@@ -399,132 +793,26 @@ class Reader(object):
         Each list contains a list for each feature in the form:
             [geom,attr1,attr2,...]
         This is can be directly inserted into a feature class with the correct schema.
+        The geometry is in the target coordinate system of the reader.
+
+        In tolerant mode elements that cannot be read are skipped and recorded
+        in the quarantine list, see summary. With a dedupe each row ends with
+        the fingerprint of the feature.
+
+        Features are listed in document order, a circle before a polygon in
+        the document comes first in the polygons list. Earlier versions listed
+        the features of each element type together, points before text,
+        polylines before corridors and arcs, and polygons before circles,
+        ellipses and arcbands.
+
+        All the features are held in memory, see iterBatches to read large
+        files in batches.
         """
         # works through each element type and creates the geometry and extracts
         # attributes. The final ouput of this is list of geometries with associated
         # attributes.
+        results = dict((featureType,[]) for featureType in featureTypes)
+        for featureType, rows in self.iterBatches(None):
+            results[featureType].extend(rows)
 
-        # lists for the results
-        points = []
-        polylines = []
-        polygons = []
-        multipoints = []
-
-        # read point features
-        pElems = self._getElement('point')
-
-        # build geometries and get the aributes for each point element
-        for pElem in pElems:
-            pGeom = self._buildPoint(pElem.attributes.get('x').value,
-                                    pElem.attributes.get('y').value)
-            pAttrs = self._readAttributes(pElem)
-            pAttrs.insert(0,pGeom)
-            points.append(pAttrs)
-
-        # text
-        tElems = self._getElement('text')
-
-        # build geometries and get the aributes for each text element
-        for tElem in tElems:
-            tGeom = self._buildPoint(tElem.attributes.get('x').value,
-                                    tElem.attributes.get('y').value)
-            tAttrs = self._readAttributes(tElem)
-            tAttrs.insert(0,tGeom)
-            points.append(tAttrs)
-
-        # polyline
-        lines = ['polyline','corridor','arc']
-        for line in lines:
-            if line == 'arc':
-                lnElems = self._getElement(line)
-                for lnElem in lnElems:
-                    lnGeom = self._buildElliptical(lnElem.attributes.get('cx').value,
-                                            lnElem.attributes.get('cy').value,
-                                            lnElem.attributes.get('rx').value,
-                                            lnElem.attributes.get('ry').value,
-                                            lnElem.attributes.get('rotation').value,
-                                            lnElem.attributes.get('startangle').value,
-                                            lnElem.attributes.get('endangle').value)
-                    lnAttrs = self._readAttributes(lnElem)
-                    lnAttrs.insert(0,lnGeom)
-                    polylines.append(lnAttrs)
-
-            else:
-                # builds gemetries and reads attributes for polyines and corridor
-                lnElems = self._getElement(line)
-
-                # build geometries and get the aributes for each text element
-                for lnElem in lnElems:
-                    lnGeom = self._buildGeometry(lnElem.attributes.get('points').value,
-                                                'POLYLINE',self.wgs84)
-                    lnAttrs = self._readAttributes(lnElem)
-                    lnAttrs.insert(0,lnGeom)
-                    polylines.append(lnAttrs)
-
-        # get polygons, circles, ellipses and arcbands
-        for polygon in ['polygon','circle','ellipse','arcband']:
-            if polygon == 'polygon':
-                polyElems = self._getElement('polygon')
-                for polyElem in polyElems:
-                    polyGeom = self._buildGeometry(polyElem.attributes.get('points').value,
-                                                    'POLYGON',self.wgs84)
-                    polyAttrs = self._readAttributes(polyElem)
-                    polyAttrs.insert(0,polyGeom)
-                    polygons.append(polyAttrs)
-            elif polygon == 'circle':
-                circleElems = self._getElement('circle')
-                for circleElem in circleElems:
-                    circleGeom = self._buildCircle(circleElem.attributes.get('cx').value,
-                                                    circleElem.attributes.get('cy').value,
-                                                    circleElem.attributes.get('r').value,)
-                    circleAttrs = self._readAttributes(circleElem)
-                    circleAttrs.insert(0,circleGeom)
-                    polygons.append(circleAttrs)
-
-            elif polygon == 'ellipse':
-                ellipseElems = self._getElement('ellipse')
-                for ellipseElem in ellipseElems:
-                    ellipseGeom = self._buildElliptical(ellipseElem.attributes.get('cx').value,
-                                                        ellipseElem.attributes.get('cy').value,
-                                                        ellipseElem.attributes.get('rx').value,
-                                                        ellipseElem.attributes.get('ry').value,
-                                                        ellipseElem.attributes.get('rotation').value)
-                    ellipseAttrs = self._readAttributes(ellipseElem)
-                    ellipseAttrs.insert(0,ellipseGeom)
-                    polygons.append(ellipseAttrs)
-
-            elif polygon == 'arcband':
-                arcElems = self._getElement('arcband')
-                for arcElem in arcElems:
-                    arcGeom = self._buildArcband(arcElem.attributes.get('cx').value,
-                                                        arcElem.attributes.get('cy').value,
-                                                        arcElem.attributes.get('minr').value,
-                                                        arcElem.attributes.get('maxr').value,
-                                                        arcElem.attributes.get('startangle').value,
-                                                        arcElem.attributes.get('endangle').value)
-                    arcAttrs = self._readAttributes(arcElem)
-                    arcAttrs.insert(0,arcGeom)
-                    polygons.append(arcAttrs)
-        # build geometries and get the aributes for each multipoint element
-        mpElems = self._getElement('multipoint')
-        for mpElem in mpElems:
-            mpGeom = self._buildGeometry(mpElem.attributes.get('points').value,
-                                                    'MULTIPOINT',self.wgs84)
-            mpAttrs = self._readAttributes(mpElem)
-            mpAttrs.insert(0,mpGeom)
-            multipoints.append(mpAttrs)
-
-        return points, polylines, polygons, multipoints
-
-if __name__ =="__main__":
-    # need to handle file paths passed to the scrip that have \t etc in the path
-    # by default this is not handled correctly
-    nvg = r"C:\Users\dave\Documents\NVGData\nvg_1_4\APP6A_SAMPLE.nvg"
-    reader = Reader(nvg,namespaces)
-    test = reader.read()
-    print test[3]
-
-
-
-
-
+        return tuple(results[featureType] for featureType in featureTypes)
@@ -0,0 +1,236 @@
+#-------------------------------------------------------------------------------
+# Name:        nvgScanner.py
+# Purpose:     Fast byte level scanning of large NVG files.
+#
+# Author:      Dave Barrett
+#
+# Created:     19/10/2026
+# Copyright:   (c) Dave 2026
+# Licence:     <your licence>
+#-------------------------------------------------------------------------------
+
+"""
+This module provides a scanner for quick jobs on very large NVG files such as
+counting features, extracting uris or locating elements of a given type.
+
+The file is memory mapped and the start tags of the NVG feature elements are
+found with a regular expression over the raw bytes. No XML nodes are built,
+each element is returned as its byte offset, tag name and the raw bytes of its
+attributes which are only decoded when asked for. Documents containing
+comments, CDATA sections, a DOCTYPE or a non UTF-8 encoding cannot be scanned
+safely at the byte level and are read with the expat parser instead.
+
+The scanner does not require arcpy. Compressed files and zip archives cannot be
+memory mapped, these should be read with nvgReader.Reader.
+"""
+import os
+import re
+import mmap
+import xml.parsers.expat
+
+# feature elements that are returned by the scanner
+tags = ['point','text','polyline','corridor','arc','polygon','circle',
+        'ellipse','arcband','multipoint']
+
+# start tag of a feature element, the namespace prefix is optional and quoted
+# attribute values may contain '>'
+_tagPattern = re.compile(br'<(?:[\w.-]+:)?(' + '|'.join(tags).encode('ascii') +
+                         br')(?=[\s/>])((?:[^>"\']|"[^"]*"|\'[^\']*\')*)>')
+
+_attrPattern = re.compile(br'([\w:.-]+)\s*=\s*(?:"([^"]*)"|\'([^\']*)\')')
+
+_versionPattern = re.compile(br'<(?:[\w.-]+:)?nvg\b[^>]*?\sversion\s*=\s*["\']([^"\']*)["\']')
+
+_entityPattern = re.compile(r'&(#x[0-9a-fA-F]+|#[0-9]+|lt|gt|amp|quot|apos);')
+
+_entities = {'lt': '<', 'gt': '>', 'amp': '&', 'quot': '"', 'apos': "'"}
+
+# markup that the byte level scanner cannot handle
+_complex = [b'<!--', b'<![CDATA[', b'<!DOCTYPE']
+
+try:
+    unichr
+except NameError:
+    unichr = chr
+
+
+def _replaceEntity(match):
+    """Returns the character for an entity or character reference.
+    """
+    ref = match.group(1)
+    if ref.startswith('#x'):
+        return unichr(int(ref[2:],16))
+    elif ref.startswith('#'):
+        return unichr(int(ref[1:]))
+    return _entities[ref]
+
+def _unescape(value):
+    """Decodes a raw attribute value.
+    """
+    value = value.decode('utf-8')
+    if '&' in value:
+        value = _entityPattern.sub(_replaceEntity,value)
+    return value
+
+
+class Scanner(object):
+    """Byte level scanner for an uncompressed NVG file.
+    """
+    def __init__(self,nvgFile):
+        """Memory map the nvgFile and check whether it can be scanned at the
+        byte level.
+        """
+        self.nvgFile = nvgFile
+        self._file = open(nvgFile,'rb')
+        self.size = os.fstat(self._file.fileno()).st_size
+        if self.size:
+            self._map = mmap.mmap(self._file.fileno(),0,access=mmap.ACCESS_READ)
+        else:
+            self._map = b''
+
+        # documents that are not plain UTF-8 or that contain markup the
+        # regular expressions do not understand are read with expat
+        head = self._map[:4]
+        self.fast = not (head.startswith(b'\xff\xfe') or head.startswith(b'\xfe\xff'))
+        declaration = re.match(br'<\?xml[^>]*encoding\s*=\s*["\']([^"\']*)',self._map[:200])
+        if declaration and declaration.group(1).lower() not in (b'utf-8',b'utf8',b'us-ascii',b'ascii'):
+            self.fast = False
+        if self.fast:
+            for markup in _complex:
+                if self._map.find(markup) != -1:
+                    self.fast = False
+                    break
+
+        return
+
+    def close(self):
+        """Releases the memory map and file handle.
+        """
+        if self.size:
+            self._map.close()
+        self._file.close()
+
+        return
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self,*args):
+        self.close()
+
+    def version(self):
+        """Returns the version attribute of the nvg element.
+        """
+        match = _versionPattern.search(self._map[:4096])
+        if match:
+            return match.group(1).decode('ascii')
+        return None
+
+    def scan(self,elements=None):
+        """Yields (offset, tag, raw) for every feature element in the file.
+
+        elements - optional list of tags to return, by default all feature
+                   elements are returned.
+
+        offset is the byte offset of the start tag and raw holds the undecoded
+        attributes of the start tag. When the file has been read with expat raw
+        is a dictionary of the decoded attributes. Use attributes to decode raw
+        in either case.
+        """
+        wanted = set(elements or tags)
+        if self.fast:
+            for match in _tagPattern.finditer(self._map):
+                tag = match.group(1).decode('ascii')
+                if tag in wanted:
+                    yield match.start(), tag, match.group(2)
+        else:
+            for item in self._expatScan(wanted):
+                yield item
+
+    def _expatScan(self,wanted):
+        """Yields (offset, tag, attributes) using the expat parser.
+        """
+        found = []
+        parser = xml.parsers.expat.ParserCreate(namespace_separator=' ')
+
+        def start(name,attrs):
+            tag = name.split(' ')[-1]
+            if tag in wanted:
+                found.append((parser.CurrentByteIndex,tag,attrs))
+
+        parser.StartElementHandler = start
+
+        # parse in chunks and yield the elements found in each chunk so the
+        # whole document is never held in memory
+        self._file.seek(0)
+        while True:
+            chunk = self._file.read(1 << 20)
+            parser.Parse(chunk,not chunk)
+            for item in found:
+                yield item
+            del found[:]
+            if not chunk:
+                break
+
+    def attributes(self,raw):
+        """Returns a dictionary of attribute name: value from the raw
+        attributes of a scanned element.
+        """
+        if isinstance(raw,dict):
+            return raw
+        attrs = {}
+        for match in _attrPattern.finditer(raw):
+            value = match.group(2)
+            if value is None:
+                value = match.group(3)
+            attrs[match.group(1).decode('ascii')] = _unescape(value)
+        return attrs
+
+    def values(self,attribute,elements=None):
+        """Yields (offset, tag, value) for each feature element that has the
+        attribute, for example values('uri').
+        """
+        if self.fast:
+            # find the attribute inside the raw slice without decoding the
+            # other attributes
+            pattern = re.compile(br'(?:^|\s)' + re.escape(attribute.encode('ascii')) +
+                                 br'\s*=\s*(?:"([^"]*)"|\'([^\']*)\')')
+            for offset, tag, raw in self.scan(elements):
+                match = pattern.search(raw)
+                if match:
+                    value = match.group(1)
+                    if value is None:
+                        value = match.group(2)
+                    yield offset, tag, _unescape(value)
+        else:
+            for offset, tag, attrs in self.scan(elements):
+                if attribute in attrs:
+                    yield offset, tag, attrs[attribute]
+
+    def count(self,elements=None):
+        """Returns a dictionary of tag: number of elements.
+        """
+        counts = dict((tag,0) for tag in (elements or tags))
+        for offset, tag, raw in self.scan(elements):
+            counts[tag] += 1
+        return counts
+
+    def summary(self):
+        """Returns a dictionary summarising the file: version, size in bytes,
+        whether the byte level scanner was used and the count of each feature
+        element.
+        """
+        counts = self.count()
+        return {'version': self.version(),
+                'size': self.size,
+                'fast': self.fast,
+                'counts': counts,
+                'total': sum(counts.values())}
+
+
+if __name__ == "__main__":
+    import sys
+
+    for nvg in sys.argv[1:]:
+        with Scanner(nvg) as scanner:
+            print("{0}: {1}".format(nvg,scanner.summary()))
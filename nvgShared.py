@@ -0,0 +1,221 @@
+#-------------------------------------------------------------------------------
+# Name:        nvgShared.py
+# Purpose:     Share parsed NVG features between processes.
+#
+# Author:      Dave Barrett
+#
+# Created:     19/10/2026
+# Copyright:   (c) Dave 2026
+# Licence:     <your licence>
+#-------------------------------------------------------------------------------
+
+"""
+This module provides a feature store in shared memory so many processes can
+use the features of a large NVG file that was parsed once.
+
+One process publishes the columns from nvgColumns into a single shared memory
+block and the other processes attach to it by name. The coordinate, offset
+and numeric arrays are read only numpy views of the shared block so attaching
+does not copy them. Text columns are interned: each unique value is stored
+once in a string table and the column holds an int32 code for each feature.
+
+The block starts with the length of a JSON manifest followed by the manifest,
+which gives the type, shape and position of every array.
+
+multiprocessing.shared_memory requires Python 3.8 or later, on earlier
+versions use a snapshot written by nvgColumns instead.
+"""
+import json
+import struct
+
+import numpy
+
+try:
+    from multiprocessing import shared_memory, resource_tracker
+except ImportError:
+    shared_memory = None
+
+# arrays in the block start on multiples of this many bytes
+_alignment = 64
+
+# numpy type of the text columns
+_text = getattr(numpy,'unicode_',numpy.str_)
+
+
+def _align(offset):
+    return (offset + _alignment - 1) // _alignment * _alignment
+
+def _intern(values):
+    """Returns the int32 codes, utf-8 string table and table offsets of a text
+    column.
+    """
+    index = {}
+    codes = numpy.empty(len(values),dtype=numpy.int32)
+    for i, value in enumerate(values.tolist()):
+        codes[i] = index.setdefault(value,len(index))
+    strings = [value.encode('utf-8') for value in sorted(index,key=index.get)]
+    offsets = numpy.zeros(len(strings) + 1,dtype=numpy.int64)
+    offsets[1:] = numpy.cumsum([len(value) for value in strings])
+    table = numpy.frombuffer(b''.join(strings),dtype=numpy.uint8)
+    return codes, table, offsets
+
+def _open(name):
+    """Attaches to an existing block without registering it with the resource
+    tracker, so the block is not removed when this process exits.
+    """
+    try:
+        return shared_memory.SharedMemory(name=name,track=False)
+    except TypeError:
+        pass
+    register = resource_tracker.register
+    resource_tracker.register = lambda name, rtype: None
+    try:
+        return shared_memory.SharedMemory(name=name)
+    finally:
+        resource_tracker.register = register
+
+
+class FeatureStore(object):
+    """Columns of NVG features held in a shared memory block.
+
+    Use publish to create a store and attach to open it in another process.
+    columns holds read only arrays, the text columns as codes into strings.
+    """
+    def __init__(self,block,owner):
+        self.block = block
+        self.owner = owner
+        self.name = block.name
+
+        size = struct.unpack_from('<Q',block.buf,0)[0]
+        manifest = json.loads(bytes(block.buf[8:8 + size]).decode('utf-8'))
+        self.crs = manifest['crs']
+        self.textColumns = manifest['text']
+        start = _align(8 + size)
+
+        self.columns = {}
+        for name, dtype, shape, offset in manifest['arrays']:
+            count = int(numpy.prod(shape)) if shape else 1
+            array = numpy.frombuffer(block.buf,dtype=dtype,count=count,offset=start + offset).reshape(shape)
+            array.flags.writeable = False
+            self.columns[name] = array
+
+        # the string tables are decoded when first used
+        self._strings = {}
+
+        return
+
+    @classmethod
+    def publish(cls,data,name=None):
+        """Copies the columns returned by nvgColumns.columns or nvgColumns.load
+        into a new shared memory block and returns the store.
+
+        name is the name of the block, a unique name is chosen if it is not
+        given. The publishing process owns the block and should call unlink
+        when the other processes have finished with it.
+        """
+        if shared_memory is None:
+            raise ImportError("Shared memory requires Python 3.8 or later, use an nvgColumns snapshot instead")
+
+        arrays = []
+        text = []
+        for column in sorted(data):
+            if column == 'crs':
+                continue
+            values = numpy.asarray(data[column])
+            if values.dtype.kind in 'US':
+                codes, table, offsets = _intern(values.astype(_text))
+                arrays.append((column,codes))
+                arrays.append((column + '.strings',table))
+                arrays.append((column + '.offsets',offsets))
+                text.append(column)
+            else:
+                arrays.append((column,numpy.ascontiguousarray(values)))
+
+        # positions are from the start of the data, which follows the manifest
+        entries = []
+        end = 0
+        for column, values in arrays:
+            offset = _align(end)
+            entries.append((column,values.dtype.str,list(values.shape),offset))
+            end = offset + values.nbytes
+        header = json.dumps({'crs': data.get('crs',4326),'text': text,
+                             'arrays': entries}).encode('utf-8')
+        start = _align(8 + len(header))
+
+        block = shared_memory.SharedMemory(name=name,create=True,size=max(start + end,1))
+        try:
+            struct.pack_into('<Q',block.buf,0,len(header))
+            block.buf[8:8 + len(header)] = header
+            for (column, values), (entry, dtype, shape, offset) in zip(arrays,entries):
+                if values.nbytes:
+                    target = numpy.frombuffer(block.buf,dtype=values.dtype,count=values.size,
+                                              offset=start + offset)
+                    target[:] = values.reshape(-1)
+                    del target
+        except Exception:
+            block.close()
+            block.unlink()
+            raise
+
+        return cls(block,True)
+
+    @classmethod
+    def attach(cls,name):
+        """Returns the store published with name by another process.
+        """
+        if shared_memory is None:
+            raise ImportError("Shared memory requires Python 3.8 or later, use an nvgColumns snapshot instead")
+        return cls(_open(name),False)
+
+    def strings(self,column):
+        """Returns the unique values of a text column as a unicode array
+        indexed by the codes in columns.
+        """
+        strings = self._strings.get(column)
+        if strings is None:
+            table = self.columns[column + '.strings'].tobytes()
+            offsets = self.columns[column + '.offsets'].tolist()
+            strings = numpy.array([table[a:b].decode('utf-8') for a, b in zip(offsets[:-1],offsets[1:])],
+                                  dtype=_text)
+            self._strings[column] = strings
+        return strings
+
+    def text(self,column):
+        """Returns a text column as a unicode array with a value for each
+        feature. The result is a copy in this process.
+        """
+        return self.strings(column)[self.columns[column]]
+
+    def data(self):
+        """Returns the columns in the form returned by nvgColumns.columns. The
+        text columns are decoded, all other arrays are shared.
+        """
+        data = {'crs': self.crs}
+        for column, values in self.columns.items():
+            if '.' in column:
+                continue
+            data[column] = self.text(column) if column in self.textColumns else values
+        return data
+
+    def close(self):
+        """Releases this process's view of the block. Arrays taken from the
+        store must be released first, the block cannot be closed while they
+        are in use.
+        """
+        self.columns = {}
+        self._strings = {}
+        self.block.close()
+
+    def unlink(self):
+        """Removes the block once every process has closed it, only the
+        publishing process should call this.
+        """
+        self.block.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self,exc_type,exc_value,tb):
+        self.close()
+        if self.owner:
+            self.unlink()
@@ -0,0 +1,207 @@
+#-------------------------------------------------------------------------------
+# Name:        nvgSimplify.py
+# Purpose:     Coordinate quantization and line simplification for NVG export.
+#
+# Author:      Dave Barrett
+#
+# Created:     19/10/2026
+# Copyright:   (c) Dave 2026
+# Licence:     <your licence>
+#-------------------------------------------------------------------------------
+
+"""
+This module provides functions to reduce the number of vertices written for
+each feature. Coordinates are passed as numpy arrays of shape (n, 2) in the
+units of the source data, tolerances are in the same units.
+
+Lines always keep their end points and rings stay closed with at least four
+vertices. A simplified ring that would cross itself is simplified again with a
+smaller tolerance, falling back to the original ring, so polygons remain valid.
+"""
+import heapq
+import numpy
+
+# simplification methods supported by simplify
+methods = ['douglas-peucker','visvalingam']
+
+
+def collapsed(coords,ring=False):
+    """Returns True if a line has fewer than two distinct vertices or a ring
+    fewer than three, so it cannot be written as a valid line or polygon.
+    """
+    distinct = len(set(map(tuple,numpy.asarray(coords).reshape(-1,2).tolist())))
+    return distinct < (3 if ring else 2)
+
+def quantize(coords,precision,ring=False):
+    """Rounds the coordinates to precision decimal places and removes the
+    consecutive duplicate vertices this creates.
+
+    Returns None if rounding collapses the line or ring, see collapsed.
+    """
+    rounded = numpy.round(coords,int(precision))
+    if len(rounded) >= 2:
+        keep = numpy.empty(len(rounded),dtype=bool)
+        keep[0] = True
+        keep[1:] = numpy.any(rounded[1:] != rounded[:-1],axis=1)
+        rounded = rounded[keep]
+
+    if collapsed(rounded,ring):
+        return None
+
+    return rounded
+
+def _segmentDistances(points,start,end):
+    """Returns the distance of each point from the segment start to end.
+    """
+    seg = end - start
+    length = numpy.dot(seg,seg)
+    if length == 0.0:
+        return numpy.hypot(points[:,0] - start[0],points[:,1] - start[1])
+    t = numpy.clip(numpy.dot(points - start,seg) / length,0.0,1.0)
+    proj = start + t[:,None] * seg
+    return numpy.hypot(points[:,0] - proj[:,0],points[:,1] - proj[:,1])
+
+def douglasPeucker(coords,tolerance):
+    """Returns the coordinates simplified with the Douglas-Peucker algorithm.
+
+    The distances of all the points between the end points of each segment are
+    calculated in a single array operation.
+    """
+    n = len(coords)
+    if n < 3:
+        return coords
+    keep = numpy.zeros(n,dtype=bool)
+    keep[0] = keep[-1] = True
+
+    stack = [(0,n - 1)]
+    while stack:
+        first, last = stack.pop()
+        if last - first < 2:
+            continue
+        dists = _segmentDistances(coords[first + 1:last],coords[first],coords[last])
+        index = int(numpy.argmax(dists))
+        if dists[index] > tolerance:
+            index += first + 1
+            keep[index] = True
+            stack.append((first,index))
+            stack.append((index,last))
+
+    return coords[keep]
+
+def _triangleAreas(coords):
+    """Returns the area of the triangle formed by each inner vertex and its
+    neighbours.
+    """
+    a = coords[:-2]
+    b = coords[1:-1]
+    c = coords[2:]
+    return 0.5 * numpy.abs((b[:,0] - a[:,0]) * (c[:,1] - a[:,1]) -
+                           (c[:,0] - a[:,0]) * (b[:,1] - a[:,1]))
+
+def visvalingam(coords,tolerance):
+    """Returns the coordinates simplified with the Visvalingam-Whyatt
+    algorithm.
+
+    Vertices are removed smallest effective area first until every remaining
+    vertex has an area of at least tolerance squared. The initial areas are
+    calculated in a single array operation.
+    """
+    n = len(coords)
+    if n < 3:
+        return coords
+    threshold = tolerance * tolerance
+    xs = coords[:,0].tolist()
+    ys = coords[:,1].tolist()
+
+    def area(i,j,k):
+        return 0.5 * abs((xs[j] - xs[i]) * (ys[k] - ys[i]) - (xs[k] - xs[i]) * (ys[j] - ys[i]))
+
+    prev = list(range(-1,n - 1))
+    nxt = list(range(1,n + 1))
+    areas = [None] + _triangleAreas(coords).tolist() + [None]
+    heap = [(areas[i],i) for i in range(1,n - 1)]
+    heapq.heapify(heap)
+    removed = numpy.zeros(n,dtype=bool)
+
+    while heap:
+        a, i = heapq.heappop(heap)
+        if removed[i] or a != areas[i]:
+            # stale entry for a vertex whose area has changed
+            continue
+        if a >= threshold:
+            break
+        removed[i] = True
+        p, q = prev[i], nxt[i]
+        nxt[p] = q
+        prev[q] = p
+        # recalculate the neighbours, an area never drops below the area of
+        # the vertex just removed so the removal order is preserved
+        for j in (p,q):
+            if 0 < j < n - 1:
+                areas[j] = max(area(prev[j],j,nxt[j]),a)
+                heapq.heappush(heap,(areas[j],j))
+
+    return coords[~removed]
+
+def _selfIntersects(ring):
+    """Returns True if any two non adjacent edges of the closed ring cross.
+
+    Each edge is tested against all later edges with array operations.
+    """
+    starts = ring[:-1]
+    ends = ring[1:]
+    n = len(starts)
+    if n < 4:
+        return False
+
+    def orient(a,b,c):
+        return numpy.sign((b[...,0] - a[...,0]) * (c[...,1] - a[...,1]) -
+                          (b[...,1] - a[...,1]) * (c[...,0] - a[...,0]))
+
+    for i in range(n - 2):
+        a, b = starts[i], ends[i]
+        # skip the adjacent edges, the last edge is adjacent to the first
+        stop = n - 1 if i == 0 else n
+        c, d = starts[i + 2:stop], ends[i + 2:stop]
+        if not len(c):
+            continue
+        crosses = ((orient(a,b,c) * orient(a,b,d) < 0) &
+                   (orient(c,d,a) * orient(c,d,b) < 0))
+        if crosses.any():
+            return True
+
+    return False
+
+def simplify(coords,tolerance,method='douglas-peucker',ring=False):
+    """Returns the simplified coordinates of a line or ring.
+
+    method is one of 'douglas-peucker' or 'visvalingam'. Rings are kept closed
+    with at least four vertices and are not allowed to cross themselves.
+    """
+    if method == 'douglas-peucker':
+        func = douglasPeucker
+    elif method == 'visvalingam':
+        func = visvalingam
+    else:
+        raise ValueError("Unknown simplification method: {0}".format(method))
+
+    if not ring:
+        return func(coords,tolerance)
+
+    # simplify the ring as two halves split at the vertex furthest from the
+    # start so the ring cannot collapse to a line between its end points
+    n = len(coords)
+    if n <= 4:
+        return coords
+    far = int(numpy.argmax(numpy.hypot(coords[:,0] - coords[0,0],coords[:,1] - coords[0,1])))
+    far = min(max(far,1),n - 2)
+
+    for attempt in range(8):
+        first = func(coords[:far + 1],tolerance)
+        second = func(coords[far:],tolerance)
+        result = numpy.concatenate((first,second[1:]))
+        if len(result) >= 4 and not _selfIntersects(result):
+            return result
+        tolerance = tolerance / 2.0
+
+    return coords
@@ -0,0 +1,127 @@
+#-------------------------------------------------------------------------------
+# Name:        nvgSymbols.py
+# Purpose:     Symbol code lookup for writing NVG point features.
+#
+# Author:      Dave Barrett
+#
+# Created:     19/10/2026
+# Copyright:   (c) Dave 2026
+# Licence:     <your licence>
+#-------------------------------------------------------------------------------
+
+"""
+This module provides the lookup used to write the mandatory symbol attribute of
+NVG point features. Symbols are APP-6A or MIL-STD-2525B symbol identification
+codes (SIDC) written in the NVG form standard:code, for example
+app6a:SFGPUCI---*****.
+
+A symbol table maps the values of a field, such as the layer pack category of
+each feature, to a SIDC. Tables are kept as CSV files with the columns value,
+sidc and optionally standard. A table is compiled into a dictionary keyed on
+the normalised value when it is loaded, and is loaded again only if the CSV
+changes during the session. Every lookup is a single dictionary access.
+"""
+import os
+import re
+import csv
+
+# standards that can be written in the symbol attribute
+standards = ['app6a','2525b']
+
+# 15 character symbol identification code, '*' and '-' are unused positions
+_sidcPattern = re.compile(r'^[SGWIOE][PUAFNSHGWMDLJK\-*][PAGSUFXZ\-*][AP\-*]'
+                          r'[A-Z0-9\-*]{6}[A-Z0-9\-*]{2}[A-Z\-*]{2}[A-Z\-*]$')
+
+# tables already loaded in this session and the modification time of their
+# CSV when they were loaded
+_tables = {}
+
+try:
+    text = unicode
+except NameError:
+    text = str
+
+
+def _normalise(value):
+    """Returns the key used to look up a value.
+    """
+    if value is None:
+        return None
+    return text(value).strip().upper()
+
+def parseSymbol(value,standard='app6a'):
+    """Returns the NVG symbol string for a SIDC or NVG symbol string, or None
+    if the value is not a valid code.
+
+    Values may be a 15 character SIDC or already be in the standard:code form.
+    """
+    if value is None:
+        return None
+    value = text(value).strip()
+    if ':' in value:
+        standard, value = value.split(':',1)
+        standard = standard.lower()
+        if standard not in standards:
+            return None
+    code = value.upper()
+    if not _sidcPattern.match(code):
+        return None
+
+    return standard + ':' + code
+
+
+class SymbolTable(object):
+    """Compiled lookup of field values to NVG symbol strings.
+    """
+    def __init__(self,table=None,standard='app6a',default=None):
+        """Create the lookup from a dictionary of value: SIDC.
+
+        standard - the standard of codes that do not name one.
+        default - SIDC written when a value cannot be resolved.
+        """
+        self.standard = standard
+        self.symbols = {}
+        for value, sidc in (table or {}).items():
+            symbol = parseSymbol(sidc,standard)
+            if symbol is None:
+                raise ValueError("Invalid symbol code for {0}: {1}".format(value,sidc))
+            self.symbols[_normalise(value)] = symbol
+        self.default = parseSymbol(default,standard) if default else None
+
+        return
+
+    @classmethod
+    def load(cls,path,standard='app6a',default=None):
+        """Returns the symbol table compiled from the CSV file at path.
+
+        The table is reused by later loads in the session until the CSV is
+        changed.
+        """
+        path = os.path.abspath(path)
+        key = (path,standard,default)
+        mtime = os.path.getmtime(path)
+        if key in _tables and _tables[key][0] == mtime:
+            return _tables[key][1]
+
+        table = cls(standard=standard,default=default)
+        with open(path,'r') as f:
+            for row in csv.DictReader(f):
+                sidc = parseSymbol(row['sidc'],row.get('standard') or standard)
+                if sidc is None:
+                    raise ValueError("Invalid symbol code for {0}: {1}".format(row['value'],row['sidc']))
+                table.symbols[_normalise(row['value'])] = sidc
+        _tables[key] = (mtime,table)
+
+        return table
+
+    def resolve(self,value):
+        """Returns the NVG symbol string for a field value.
+
+        The value is looked up in the table first, if it is not found but is a
+        valid SIDC itself the code is used directly. The default is returned if
+        the value cannot be resolved.
+        """
+        symbol = self.symbols.get(_normalise(value))
+        if symbol is None:
+            symbol = parseSymbol(value,self.standard) or self.default
+        return symbol
@@ -0,0 +1,604 @@
+#-------------------------------------------------------------------------------
+# Name:        nvgTiles.py
+# Purpose:     Write NVG features as a Mapbox Vector Tile pyramid.
+#
+# Author:      Dave Barrett
+#
+# Created:     19/10/2026
+# Copyright:   (c) Dave 2026
+# Licence:     <your licence>
+#-------------------------------------------------------------------------------
+
+"""
+This module provides an export of the features read from NVG files to a
+pyramid of Mapbox Vector Tiles (MVT version 2) so web clients only fetch the
+tiles for their view.
+
+Tiles are written to a z/x/y folder of .pbf files or to a single MBTiles
+SQLite file. For each zoom level the geometry is simplified with nvgSimplify
+to a tolerance in tile pixels, clipped to each tile with a buffer and quantized
+to the tile extent. Tiles are encoded by a pool of worker processes. The
+protocol buffer encoding is written here so no other packages are required.
+
+Features are given as (layer, geometry, properties) where geometry is a
+GeoJSON style dictionary or an object with __geo_interface__, such as an arcpy
+geometry, in WGS84.
+"""
+import os
+import math
+import gzip
+import json
+import sqlite3
+from io import BytesIO
+from multiprocessing import Pool
+
+import numpy
+
+import nvgSimplify
+
+# MVT geometry types
+POINT = 1
+LINESTRING = 2
+POLYGON = 3
+
+# Web Mercator latitude limit
+_maxLat = 85.0511287798066
+
+# layer names for the lists returned by nvgReader.Reader.read
+readerLayers = ['points','polylines','polygons','multipoints']
+
+# state of each worker process, set by _initWorker
+_state = {}
+
+
+def readerFeatures(results,names):
+    """Returns the (layer, geometry, properties) of each feature in the lists
+    returned by nvgReader.Reader.read. names are the attribute names of the
+    values after the geometry in each row, nvgReader.attributeNames.
+    """
+    features = []
+    for layer, rows in zip(readerLayers,results):
+        for row in rows:
+            properties = dict((name,value) for name, value in zip(names,row[1:])
+                              if value is not None)
+            features.append((layer,row[0],properties))
+    return features
+
+def _mercator(coords):
+    """Returns WGS84 coordinates as Web Mercator coordinates normalised to 0 to
+    1 with y down, the coordinates of zoom level 0.
+    """
+    coords = numpy.asarray(coords,dtype=float).reshape(-1,2)
+    lat = numpy.radians(numpy.clip(coords[:,1],-_maxLat,_maxLat))
+    x = (coords[:,0] + 180.0) / 360.0
+    y = (1.0 - numpy.log(numpy.tan(lat) + 1.0 / numpy.cos(lat)) / math.pi) / 2.0
+    return numpy.column_stack((x,y))
+
+def _prepare(geometry):
+    """Returns (type, parts) for a geometry. parts is a list of arrays of
+    normalised mercator coordinates, for polygons a list of lists of rings.
+    """
+    if hasattr(geometry,'__geo_interface__'):
+        geometry = geometry.__geo_interface__
+    kind = geometry['type']
+    coordinates = geometry['coordinates']
+
+    if kind == 'Point':
+        return POINT, [_mercator([coordinates])]
+    if kind == 'MultiPoint':
+        return POINT, [_mercator(coordinates)]
+    if kind == 'LineString':
+        return LINESTRING, [_mercator(coordinates)]
+    if kind == 'MultiLineString':
+        return LINESTRING, [_mercator(line) for line in coordinates]
+    if kind == 'Polygon':
+        return POLYGON, [[_mercator(ring) for ring in coordinates]]
+    if kind == 'MultiPolygon':
+        return POLYGON, [[_mercator(ring) for ring in polygon] for polygon in coordinates]
+    raise ValueError("Unsupported geometry type: {0}".format(kind))
+
+def _bounds(kind,parts):
+    """Returns the minx, miny, maxx, maxy of the parts.
+    """
+    if kind == POLYGON:
+        arrays = [polygon[0] for polygon in parts if len(polygon)]
+    else:
+        arrays = parts
+    coords = numpy.concatenate(arrays)
+    return (coords[:,0].min(),coords[:,1].min(),coords[:,0].max(),coords[:,1].max())
+
+# protocol buffer encoding
+
+def _varint(value,out):
+    """Appends an unsigned varint to the bytearray out.
+    """
+    while value > 0x7f:
+        out.append((value & 0x7f) | 0x80)
+        value >>= 7
+    out.append(value)
+
+def _zigzag(value):
+    return (value << 1) ^ (value >> 63)
+
+def _field(number,wireType,out):
+    _varint((number << 3) | wireType,out)
+
+def _bytesField(number,data,out):
+    """Appends a length delimited field.
+    """
+    _field(number,2,out)
+    _varint(len(data),out)
+    out.extend(data)
+
+def _packed(number,values,out):
+    """Appends a packed repeated varint field.
+    """
+    data = bytearray()
+    for value in values:
+        _varint(value,data)
+    _bytesField(number,data,out)
+
+def _command(command,count):
+    return (command & 0x7) | (count << 3)
+
+def _encodeGeometry(kind,parts):
+    """Returns the MVT geometry commands for the quantized parts.
+    """
+    commands = []
+    x = y = 0
+    if kind == POINT:
+        points = numpy.concatenate(parts)
+        commands.append(_command(1,len(points)))
+        for px, py in points.tolist():
+            commands.append(_zigzag(px - x))
+            commands.append(_zigzag(py - y))
+            x, y = px, py
+        return commands
+
+    if kind == LINESTRING:
+        rings = [(part,False) for part in parts]
+    else:
+        rings = [(ring,True) for polygon in parts for ring in polygon]
+
+    for ring, closed in rings:
+        coords = ring.tolist()
+        if closed:
+            # the closing vertex is implied by ClosePath
+            coords = coords[:-1]
+        px, py = coords[0]
+        commands.append(_command(1,1))
+        commands.append(_zigzag(px - x))
+        commands.append(_zigzag(py - y))
+        x, y = px, py
+        commands.append(_command(2,len(coords) - 1))
+        for px, py in coords[1:]:
+            commands.append(_zigzag(px - x))
+            commands.append(_zigzag(py - y))
+            x, y = px, py
+        if closed:
+            commands.append(_command(7,1))
+
+    return commands
+
+def _encodeTile(layers,extent):
+    """Returns the encoded tile for a dictionary of layer name: list of
+    (type, parts, properties).
+    """
+    tile = bytearray()
+    for name in sorted(layers):
+        layer = bytearray()
+        _field(15,0,layer)
+        _varint(2,layer)
+        _bytesField(1,name.encode('utf-8'),layer)
+
+        keys = {}
+        values = {}
+        for kind, parts, properties in layers[name]:
+            feature = bytearray()
+            tags = []
+            for key in sorted(properties):
+                value = u'{0}'.format(properties[key])
+                tags.append(keys.setdefault(key,len(keys)))
+                tags.append(values.setdefault(value,len(values)))
+            if tags:
+                _packed(2,tags,feature)
+            _field(3,0,feature)
+            _varint(kind,feature)
+            _packed(4,_encodeGeometry(kind,parts),feature)
+            _bytesField(2,feature,layer)
+
+        for key in sorted(keys,key=keys.get):
+            _bytesField(3,key.encode('utf-8'),layer)
+        for value in sorted(values,key=values.get):
+            encoded = bytearray()
+            _bytesField(1,value.encode('utf-8'),encoded)
+            _bytesField(4,encoded,layer)
+        _field(5,0,layer)
+        _varint(extent,layer)
+
+        _bytesField(3,layer,tile)
+
+    return bytes(tile)
+
+# clipping
+
+def _clipSegment(a,b,lo,hi):
+    """Clips the segment a to b to the square lo to hi with the Liang-Barsky
+    algorithm. Returns the clipped end points or None.
+    """
+    x0, y0 = a
+    dx = b[0] - x0
+    dy = b[1] - y0
+    t0 = 0.0
+    t1 = 1.0
+    for p, q in ((-dx,x0 - lo),(dx,hi - x0),(-dy,y0 - lo),(dy,hi - y0)):
+        if p == 0:
+            if q < 0:
+                return None
+            continue
+        r = q / p
+        if p < 0:
+            if r > t1:
+                return None
+            if r > t0:
+                t0 = r
+        else:
+            if r < t0:
+                return None
+            if r < t1:
+                t1 = r
+    start = a if t0 == 0.0 else (x0 + t0 * dx,y0 + t0 * dy)
+    end = b if t1 == 1.0 else (x0 + t1 * dx,y0 + t1 * dy)
+    return start, end
+
+def _clipLine(line,lo,hi):
+    """Returns the pieces of the line inside the square lo to hi.
+    """
+    if line[:,0].min() >= lo and line[:,0].max() <= hi and line[:,1].min() >= lo and line[:,1].max() <= hi:
+        return [line]
+
+    coords = [tuple(p) for p in line.tolist()]
+    pieces = []
+    current = []
+    for a, b in zip(coords[:-1],coords[1:]):
+        clipped = _clipSegment(a,b,lo,hi)
+        if clipped is None:
+            if current:
+                pieces.append(current)
+                current = []
+            continue
+        start, end = clipped
+        if current and current[-1] != start:
+            pieces.append(current)
+            current = []
+        if not current:
+            current.append(start)
+        current.append(end)
+        if end != b:
+            # the line leaves the square
+            pieces.append(current)
+            current = []
+    if current:
+        pieces.append(current)
+
+    return [numpy.array(piece) for piece in pieces if len(piece) > 1]
+
+def _clipRing(ring,lo,hi):
+    """Returns the ring clipped to the square lo to hi with the
+    Sutherland-Hodgman algorithm, or None if nothing is left.
+    """
+    if ring[:,0].min() >= lo and ring[:,0].max() <= hi and ring[:,1].min() >= lo and ring[:,1].max() <= hi:
+        return ring
+
+    points = [tuple(p) for p in ring[:-1].tolist()]
+    for axis in (0,1):
+        for bound, lower in ((lo,True),(hi,False)):
+            if not points:
+                return None
+            output = []
+            prev = points[-1]
+            prevIn = prev[axis] >= bound if lower else prev[axis] <= bound
+            for cur in points:
+                curIn = cur[axis] >= bound if lower else cur[axis] <= bound
+                if curIn != prevIn:
+                    # add the point where the edge crosses the bound
+                    t = (bound - prev[axis]) / (cur[axis] - prev[axis])
+                    cross = [prev[0] + t * (cur[0] - prev[0]),prev[1] + t * (cur[1] - prev[1])]
+                    cross[axis] = bound
+                    output.append(tuple(cross))
+                if curIn:
+                    output.append(cur)
+                prev, prevIn = cur, curIn
+            points = output
+
+    if len(points) < 3:
+        return None
+    points.append(points[0])
+    return numpy.array(points)
+
+def _quantize(coords,extent):
+    """Returns the coordinates rounded to the tile extent without consecutive
+    duplicates.
+    """
+    coords = numpy.round(coords * extent).astype(numpy.int64)
+    if len(coords) > 1:
+        keep = numpy.ones(len(coords),dtype=bool)
+        keep[1:] = numpy.any(coords[1:] != coords[:-1],axis=1)
+        coords = coords[keep]
+    return coords
+
+def _ringArea(ring):
+    """Returns twice the signed area of a closed ring in tile coordinates, an
+    exterior ring has a positive area with the y axis down.
+    """
+    x = ring[:,0]
+    y = ring[:,1]
+    return int(numpy.sum(x[:-1] * y[1:] - x[1:] * y[:-1]))
+
+# tile generation, run in the worker processes
+
+def _initWorker(features,extent,buffer,tolerance,method):
+    """Stores the features and options in the worker process.
+    """
+    _state['features'] = features
+    _state['extent'] = extent
+    _state['buffer'] = buffer
+    _state['tolerance'] = tolerance
+    _state['method'] = method
+    _state['simplified'] = {}
+
+def _simplified(index,z):
+    """Returns the parts of a feature simplified for zoom level z. Results are
+    kept for the tiles of the same zoom level.
+    """
+    cache = _state['simplified']
+    key = (index,z)
+    if key in cache:
+        return cache[key]
+    if len(cache) > 100000:
+        cache.clear()
+
+    layer, kind, parts, properties = _state['features'][index]
+    tolerance = _state['tolerance'] / (_state['extent'] * 2.0 ** z)
+    if kind == POINT or tolerance <= 0:
+        result = parts
+    elif kind == LINESTRING:
+        result = [nvgSimplify.simplify(part,tolerance,_state['method']) for part in parts]
+    else:
+        result = [[nvgSimplify.simplify(ring,tolerance,_state['method'],ring=True) for ring in polygon]
+                  for polygon in parts]
+
+    cache[key] = result
+    return result
+
+def _tileFeature(kind,parts,z,x,y):
+    """Returns the parts of a feature clipped and quantized to the tile, or
+    None if nothing is left.
+    """
+    extent = _state['extent']
+    scale = 2.0 ** z
+    offset = numpy.array([x,y],dtype=float)
+    lo = -float(_state['buffer']) / extent
+    hi = 1.0 - lo
+
+    tiled = []
+    if kind == POINT:
+        for part in parts:
+            local = part * scale - offset
+            inside = ((local[:,0] >= lo) & (local[:,0] <= hi) &
+                      (local[:,1] >= lo) & (local[:,1] <= hi))
+            if inside.any():
+                tiled.append(_quantize(local[inside],extent))
+    elif kind == LINESTRING:
+        for part in parts:
+            for piece in _clipLine(part * scale - offset,lo,hi):
+                piece = _quantize(piece,extent)
+                if len(piece) > 1:
+                    tiled.append(piece)
+    else:
+        for polygon in parts:
+            rings = []
+            for i, ring in enumerate(polygon):
+                clipped = _clipRing(ring * scale - offset,lo,hi)
+                if clipped is None:
+                    if i == 0:
+                        break
+                    continue
+                clipped = _quantize(clipped,extent)
+                if len(clipped) < 4:
+                    if i == 0:
+                        break
+                    continue
+                area = _ringArea(clipped)
+                if area == 0:
+                    if i == 0:
+                        break
+                    continue
+                # exterior rings are clockwise and holes anticlockwise
+                if (area > 0) != (i == 0):
+                    clipped = clipped[::-1]
+                rings.append(clipped)
+            if rings:
+                tiled.append(rings)
+
+    return tiled or None
+
+def _makeTile(task):
+    """Encodes a single tile. Returns (z, x, y, data), data is None if the tile
+    is empty.
+    """
+    (z, x, y), indexes = task
+    layers = {}
+    for index in indexes:
+        layer, kind, parts, properties = _state['features'][index]
+        tiled = _tileFeature(kind,_simplified(index,z),z,x,y)
+        if tiled is not None:
+            layers.setdefault(layer,[]).append((kind,tiled,properties))
+
+    if not layers:
+        return z, x, y, None
+    return z, x, y, _encodeTile(layers,_state['extent'])
+
+# output
+
+def _gzip(data):
+    out = BytesIO()
+    with gzip.GzipFile(fileobj=out,mode='wb') as f:
+        f.write(data)
+    return out.getvalue()
+
+
+class _FolderOutput(object):
+    """Writes tiles to z/x/y.pbf files in a folder.
+    """
+    def __init__(self,folder,compress):
+        self.folder = folder
+        self.compress = compress
+
+    def write(self,z,x,y,data):
+        folder = os.path.join(self.folder,str(z),str(x))
+        if not os.path.isdir(folder):
+            os.makedirs(folder)
+        with open(os.path.join(folder,"{0}.pbf".format(y)),'wb') as f:
+            f.write(_gzip(data) if self.compress else data)
+
+    def close(self,metadata):
+        with open(os.path.join(self.folder,'metadata.json'),'w') as f:
+            json.dump(metadata,f,indent=2,sort_keys=True)
+
+
+class _MBTilesOutput(object):
+    """Writes tiles to an MBTiles SQLite file.
+    """
+    def __init__(self,path,compress):
+        if os.path.exists(path):
+            os.remove(path)
+        self.compress = compress
+        self.connection = sqlite3.connect(path)
+        self.connection.execute("CREATE TABLE metadata (name text, value text)")
+        self.connection.execute("CREATE TABLE tiles (zoom_level integer, tile_column integer, "
+                                "tile_row integer, tile_data blob)")
+        self.connection.execute("CREATE UNIQUE INDEX tile_index ON tiles "
+                                "(zoom_level, tile_column, tile_row)")
+        self.pending = []
+
+    def write(self,z,x,y,data):
+        data = _gzip(data) if self.compress else data
+        # MBTiles rows are numbered from the bottom
+        self.pending.append((z,x,(1 << z) - 1 - y,sqlite3.Binary(data)))
+        if len(self.pending) >= 1000:
+            self._flush()
+
+    def _flush(self):
+        self.connection.executemany("INSERT INTO tiles VALUES (?,?,?,?)",self.pending)
+        self.pending = []
+
+    def close(self,metadata):
+        self._flush()
+        rows = []
+        for name, value in sorted(metadata.items()):
+            if not isinstance(value,str):
+                value = json.dumps(value) if name == 'json' else ','.join(str(v) for v in value) \
+                        if isinstance(value,(list,tuple)) else str(value)
+            rows.append((name,value))
+        self.connection.executemany("INSERT INTO metadata VALUES (?,?)",rows)
+        self.connection.commit()
+        self.connection.close()
+
+
+def writeTiles(features,output,minZoom=0,maxZoom=14,extent=4096,buffer=64,
+               tolerance=1.0,method='douglas-peucker',workers=4,compress=None,name=None):
+    """Writes the features as a vector tile pyramid and returns the number of
+    tiles written.
+
+    features - iterable of (layer, geometry, properties), see readerFeatures.
+    output - an .mbtiles file or a folder for z/x/y.pbf tiles.
+    minZoom, maxZoom - the zoom levels written.
+    extent - the number of units across each tile.
+    buffer - the units outside the tile that features are clipped to.
+    tolerance - simplification tolerance in tile units at every zoom level,
+                0 to write all the vertices.
+    method - nvgSimplify method.
+    workers - number of processes encoding tiles.
+    compress - gzip each tile, by default MBTiles tiles are compressed and
+               folder tiles are not.
+    """
+    mbtiles = output.lower().endswith('.mbtiles')
+    if compress is None:
+        compress = mbtiles
+
+    # convert the features to normalised mercator once
+    prepared = []
+    bounds = []
+    for layer, geometry, properties in features:
+        kind, parts = _prepare(geometry)
+        prepared.append((layer,kind,parts,properties))
+        bounds.append(_bounds(kind,parts))
+    bounds = numpy.array(bounds,dtype=float).reshape(-1,4)
+
+    # the features touching each tile
+    tasks = []
+    for z in range(minZoom,maxZoom + 1):
+        n = 1 << z
+        margin = float(buffer) / extent / n
+        x0 = numpy.clip(numpy.floor((bounds[:,0] - margin) * n),0,n - 1).astype(int)
+        y0 = numpy.clip(numpy.floor((bounds[:,1] - margin) * n),0,n - 1).astype(int)
+        x1 = numpy.clip(numpy.floor((bounds[:,2] + margin) * n),0,n - 1).astype(int)
+        y1 = numpy.clip(numpy.floor((bounds[:,3] + margin) * n),0,n - 1).astype(int)
+        tiles = {}
+        for index in range(len(prepared)):
+            for x in range(x0[index],x1[index] + 1):
+                for y in range(y0[index],y1[index] + 1):
+                    tiles.setdefault((z,x,y),[]).append(index)
+        tasks.extend(sorted(tiles.items()))
+
+    if mbtiles:
+        out = _MBTilesOutput(output,compress)
+    else:
+        out = _FolderOutput(output,compress)
+
+    args = (prepared,extent,buffer,tolerance,method)
+    if workers > 1 and len(tasks) > 1:
+        pool = Pool(workers,_initWorker,args)
+        results = pool.imap_unordered(_makeTile,tasks,chunksize=16)
+    else:
+        pool = None
+        _initWorker(*args)
+        results = (_makeTile(task) for task in tasks)
+
+    count = 0
+    try:
+        for z, x, y, data in results:
+            if data is not None:
+                out.write(z,x,y,data)
+                count += 1
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+
+    # metadata for the clients
+    layers = sorted(set(feature[0] for feature in prepared))
+    fields = {}
+    for layer, kind, parts, properties in prepared:
+        fields.setdefault(layer,set()).update(properties)
+    if len(bounds):
+        west = bounds[:,0].min() * 360.0 - 180.0
+        east = bounds[:,2].max() * 360.0 - 180.0
+        north = math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * bounds[:,1].min()))))
+        south = math.degrees(math.atan(math.sinh(math.pi * (1 - 2 * bounds[:,3].max()))))
+    else:
+        west, south, east, north = -180.0, -_maxLat, 180.0, _maxLat
+    metadata = {'name': name or os.path.splitext(os.path.basename(output.rstrip('/\\')))[0],
+                'format': 'pbf',
+                'minzoom': minZoom,
+                'maxzoom': maxZoom,
+                'bounds': [round(west,6),round(south,6),round(east,6),round(north,6)],
+                'center': [round((west + east) / 2,6),round((south + north) / 2,6),minZoom],
+                'json': {'vector_layers': [{'id': layer,
+                                            'fields': dict((field,'String') for field in sorted(fields[layer])),
+                                            'minzoom': minZoom,
+                                            'maxzoom': maxZoom} for layer in layers]}}
+    out.close(metadata)
+
+    return count
@@ -0,0 +1,157 @@
+#-------------------------------------------------------------------------------
+# Name:        nvgTrack.py
+# Purpose:     Dead reckoning of NVG point features from course and speed.
+#
+# Author:      Dave Barrett
+#
+# Created:     19/10/2026
+# Copyright:   (c) Dave 2026
+# Licence:     <your licence>
+#-------------------------------------------------------------------------------
+
+"""
+This module provides batched dead reckoning of moving points, such as NVG
+point features with a course and speed.
+
+Positions, courses and speeds are held in numpy arrays and all the points are
+projected forward for one or many time offsets in a single set of array
+operations. Courses are in degrees clockwise from north, speeds in metres per
+second and times in seconds. Positions are WGS84 longitude and latitude.
+
+Two methods are supported:
+    ellipsoid - the geodesic on the WGS84 ellipsoid (Vincenty's direct
+                formula), accurate for any distance.
+    mercator  - a straight line in World Mercator using the scale factor at
+                the start position. This is faster and follows the rhumb line,
+                it is intended for short predictions.
+"""
+import numpy
+
+from nvgProject import mercatorY, mercatorLat
+
+# WGS84 ellipsoid
+_a = 6378137.0
+_f = 1 / 298.257223563
+_b = (1 - _f) * _a
+_e = numpy.sqrt(_f * (2 - _f))
+
+# dead reckoning methods supported by deadReckon
+methods = ['ellipsoid','mercator']
+
+
+def tracks(rows,course=6,speed=7):
+    """Returns numeric arrays for the rows of point features that have a valid
+    course and speed.
+
+    rows are the point rows returned by nvgReader.Reader.read, course and speed
+    are the positions of those attributes in each row. Returns a dictionary of
+    arrays: index (the position of each row in rows), lon, lat, course and
+    speed.
+    """
+    index = []
+    values = []
+    for i, row in enumerate(rows):
+        try:
+            c = float(row[course])
+            s = float(row[speed])
+        except (TypeError,ValueError):
+            continue
+        point = row[0].firstPoint
+        index.append(i)
+        values.append((point.X,point.Y,c,s))
+
+    values = numpy.array(values,dtype=float).reshape(-1,4)
+    valid = numpy.isfinite(values).all(axis=1)
+    values = values[valid]
+
+    return {'index': numpy.array(index,dtype=int)[valid],
+            'lon': values[:,0],
+            'lat': values[:,1],
+            'course': values[:,2],
+            'speed': values[:,3]}
+
+def _direct(lat,lon,course,distance):
+    """Solves the direct geodesic problem on the WGS84 ellipsoid for arrays of
+    start positions, courses and distances in metres. Angles are in radians.
+    """
+    sinA1 = numpy.sin(course)
+    cosA1 = numpy.cos(course)
+
+    tanU1 = (1 - _f) * numpy.tan(lat)
+    cosU1 = 1 / numpy.sqrt(1 + tanU1 * tanU1)
+    sinU1 = tanU1 * cosU1
+    sigma1 = numpy.arctan2(tanU1,cosA1)
+    sinAlpha = cosU1 * sinA1
+    cos2Alpha = 1 - sinAlpha * sinAlpha
+    u2 = cos2Alpha * (_a * _a - _b * _b) / (_b * _b)
+    A = 1 + u2 / 16384 * (4096 + u2 * (-768 + u2 * (320 - 175 * u2)))
+    B = u2 / 1024 * (256 + u2 * (-128 + u2 * (74 - 47 * u2)))
+
+    sigma0 = distance / (_b * A)
+    sigma = sigma0
+    for iteration in range(100):
+        cos2SigmaM = numpy.cos(2 * sigma1 + sigma)
+        sinSigma = numpy.sin(sigma)
+        cosSigma = numpy.cos(sigma)
+        deltaSigma = B * sinSigma * (cos2SigmaM + B / 4 * (cosSigma * (-1 + 2 * cos2SigmaM ** 2) -
+                     B / 6 * cos2SigmaM * (-3 + 4 * sinSigma ** 2) * (-3 + 4 * cos2SigmaM ** 2)))
+        previous = sigma
+        sigma = sigma0 + deltaSigma
+        if numpy.all(numpy.abs(sigma - previous) < 1e-12):
+            break
+
+    cos2SigmaM = numpy.cos(2 * sigma1 + sigma)
+    sinSigma = numpy.sin(sigma)
+    cosSigma = numpy.cos(sigma)
+    tmp = sinU1 * sinSigma - cosU1 * cosSigma * cosA1
+    lat2 = numpy.arctan2(sinU1 * cosSigma + cosU1 * sinSigma * cosA1,
+                         (1 - _f) * numpy.sqrt(sinAlpha * sinAlpha + tmp * tmp))
+    lam = numpy.arctan2(sinSigma * sinA1,cosU1 * cosSigma - sinU1 * sinSigma * cosA1)
+    C = _f / 16 * cos2Alpha * (4 + _f * (4 - 3 * cos2Alpha))
+    L = lam - (1 - C) * _f * sinAlpha * (sigma + C * sinSigma *
+                                         (cos2SigmaM + C * cosSigma * (-1 + 2 * cos2SigmaM ** 2)))
+
+    return lat2, lon + L
+
+def _mercator(lat,lon,course,distance):
+    """Moves the start positions the distance along the course in World
+    Mercator. Angles are in radians.
+    """
+    sinLat = numpy.sin(lat)
+    scale = numpy.sqrt(1 - _e * _e * sinLat * sinLat) / numpy.cos(lat)
+    x = _a * lon + distance * scale * numpy.sin(course)
+    y = mercatorY(lat) + distance * scale * numpy.cos(course)
+
+    return mercatorLat(y), x / _a
+
+def deadReckon(lon,lat,course,speed,times,method='ellipsoid'):
+    """Returns the predicted longitudes and latitudes of moving points.
+
+    lon, lat, course and speed are arrays with a value for each point, times
+    is a single time offset or an array of offsets in seconds. The result is
+    a tuple of arrays (lon, lat) with a row for each time offset and a column
+    for each point, or a single row if times is a single value.
+    """
+    if method == 'ellipsoid':
+        func = _direct
+    elif method == 'mercator':
+        func = _mercator
+    else:
+        raise ValueError("Unknown dead reckoning method: {0}".format(method))
+
+    single = numpy.ndim(times) == 0
+    times = numpy.atleast_1d(numpy.asarray(times,dtype=float))[:,None]
+    lon = numpy.radians(numpy.asarray(lon,dtype=float))[None,:]
+    lat = numpy.radians(numpy.asarray(lat,dtype=float))[None,:]
+    course = numpy.radians(numpy.asarray(course,dtype=float))[None,:]
+    distance = numpy.asarray(speed,dtype=float)[None,:] * times
+
+    lat2, lon2 = func(lat,lon,course,distance)
+
+    # wrap the longitudes to -180 to 180
+    lon2 = (numpy.degrees(lon2) + 180.0) % 360.0 - 180.0
+    lat2 = numpy.degrees(lat2)
+
+    if single:
+        return lon2[0], lat2[0]
+    return lon2, lat2
@@ -0,0 +1,273 @@
+#-------------------------------------------------------------------------------
+# Name:        nvgWatcher.py
+# Purpose:     Continuously load NVG files dropped into one or more hot folders.
+#
+# Author:      Dave Barrett
+#
+# Created:     19/10/2026
+# Copyright:   (c) Dave 2026
+# Licence:     <your licence>
+#-------------------------------------------------------------------------------
+
+"""
+This module provides a long running watcher that polls one or more folders for
+new or changed NVG files and passes them to an output target using the Reader
+class from nvgReader.
+
+Files are only processed once their modified time and size have stopped
+changing for a number of polls, this stops partially copied files from being
+read. A small JSON state file records the files that have been processed so a
+restarted watcher only processes files that are new or have changed.
+"""
+import os
+import time
+import json
+import fnmatch
+import logging
+from multiprocessing.pool import ThreadPool
+
+import nvgReader
+
+log = logging.getLogger(__name__)
+
+
+class GeodatabaseTarget(object):
+    """Output target that loads each NVG file into a new set of point,
+    polyline, polygon and multipoint feature classes in a file geodatabase.
+
+    The files are loaded with nvgLoader.Loader as the LoadNVG tool in the
+    sample toolbox does. Reading is done in the worker threads, the loader
+    serialises creating feature classes and inserting each batch of features.
+    """
+    def __init__(self,gdb,batchSize=1000):
+        """Set the output file geodatabase and the number of features read
+        before they are inserted.
+        """
+        import nvgLoader
+        self.loader = nvgLoader.Loader(gdb,batchSize=batchSize)
+
+        return
+
+    def __call__(self,nvgFile):
+        """Reads the nvgFile and loads the features into the geodatabase.
+
+        Returns the number of features loaded.
+        """
+        reader = nvgReader.Reader(nvgFile)
+        fcs, counts = self.loader.loadFile(reader,os.path.basename(nvgFile))
+
+        return sum(counts.values())
+
+
+class Watcher(object):
+    """Polls folders for NVG files and processes new or changed files with a
+    bounded pool of worker threads.
+    """
+    def __init__(self,folders,target,stateFile=None,pattern='*.nvg',interval=5.0,
+                 settle=2,workers=2,recursive=False):
+        """Set up the watcher.
+
+        folders - a folder or list of folders to watch.
+        target - callable that accepts the path of an NVG file and loads it,
+                 for example an instance of GeodatabaseTarget.
+        stateFile - optional JSON file used to remember processed files between
+                    restarts.
+        pattern - filename pattern of the files to process.
+        interval - seconds between polls.
+        settle - number of consecutive polls a file must be unchanged for
+                 before it is processed.
+        workers - maximum number of files processed at the same time.
+        recursive - watch sub folders as well.
+        """
+        if not isinstance(folders,(list,tuple)):
+            folders = [folders]
+        self.folders = list(folders)
+        self.target = target
+        self.stateFile = stateFile
+        self.pattern = pattern
+        self.interval = float(interval)
+        self.settle = max(int(settle),1)
+        self.workers = max(int(workers),1)
+        self.recursive = recursive
+
+        # path: [mtime, size] for every file that has been processed
+        self.processed = self._loadState()
+        # path: [signature, unchanged poll count] for files waiting to settle
+        self._pending = {}
+        # path: signature for files that failed, retried only once changed
+        self._failed = {}
+        # path: (signature, AsyncResult) for files being processed
+        self._running = {}
+
+        self._pool = ThreadPool(self.workers)
+
+        return
+
+    def _loadState(self):
+        """Returns the processed files recorded in the state file, or in its
+        backup if a save was interrupted before the state file was replaced.
+        """
+        if not self.stateFile:
+            return {}
+        for path in (self.stateFile,self.stateFile + '.bak'):
+            if os.path.exists(path):
+                try:
+                    with open(path,'r') as f:
+                        return json.load(f)
+                except ValueError:
+                    log.warning("Ignoring unreadable state file: %s",path)
+        return {}
+
+    def _saveState(self):
+        """Writes the processed files to the state file.
+
+        The state is written to a temporary file first and then moved over the
+        state file so an interrupted write does not lose the existing state.
+        """
+        if not self.stateFile:
+            return
+        tmp = self.stateFile + '.tmp'
+        with open(tmp,'w') as f:
+            json.dump(self.processed,f)
+
+        if hasattr(os,'replace'):
+            os.replace(tmp,self.stateFile)
+        else:
+            # os.rename cannot overwrite a file on Windows under Python 2, the
+            # old state is kept as a backup until the new state is in place
+            backup = self.stateFile + '.bak'
+            if os.path.exists(self.stateFile):
+                if os.path.exists(backup):
+                    os.remove(backup)
+                os.rename(self.stateFile,backup)
+            os.rename(tmp,self.stateFile)
+
+        return
+
+    def _scan(self):
+        """Returns a dictionary of path: [mtime, size] for every file in the
+        watched folders that matches the pattern.
+        """
+        found = {}
+        for folder in self.folders:
+            for root, dirs, files in os.walk(folder):
+                for name in fnmatch.filter(files,self.pattern):
+                    path = os.path.abspath(os.path.join(root,name))
+                    try:
+                        stat = os.stat(path)
+                    except OSError:
+                        # removed between listing and stat
+                        continue
+                    found[path] = [stat.st_mtime,stat.st_size]
+                if not self.recursive:
+                    break
+        return found
+
+    def _collect(self):
+        """Records the outcome of any files that have finished processing.
+        """
+        changed = False
+        for path in list(self._running):
+            sig, result = self._running[path]
+            if not result.ready():
+                continue
+            del self._running[path]
+            try:
+                count = result.get()
+            except Exception as e:
+                log.error("Failed to load %s: %s",path,e)
+                self._failed[path] = sig
+            else:
+                log.info("Loaded %s features from %s",count,path)
+                self.processed[path] = sig
+                self._failed.pop(path,None)
+                changed = True
+        if changed:
+            self._saveState()
+
+        return
+
+    def poll(self):
+        """Runs a single poll of the watched folders.
+
+        Returns the list of files submitted for processing.
+        """
+        self._collect()
+
+        submitted = []
+        found = self._scan()
+
+        # forget pending files that have been removed
+        for path in list(self._pending):
+            if path not in found:
+                del self._pending[path]
+
+        for path in sorted(found):
+            sig = found[path]
+            if self.processed.get(path) == sig or self._failed.get(path) == sig:
+                continue
+            if path in self._running:
+                continue
+
+            # debounce on mtime and size so partially copied files are skipped
+            previous = self._pending.get(path)
+            if previous is None or previous[0] != sig:
+                self._pending[path] = [sig,0]
+                continue
+            previous[1] += 1
+            if previous[1] < self.settle:
+                continue
+
+            # bound the number of files being processed, anything left over
+            # stays pending and is picked up on a later poll
+            if len(self._running) >= self.workers:
+                break
+            del self._pending[path]
+            self._running[path] = (sig,self._pool.apply_async(self.target,(path,)))
+            submitted.append(path)
+
+        return submitted
+
+    def run(self,stop=None):
+        """Polls the watched folders until stop (a threading.Event) is set or
+        the process is interrupted.
+        """
+        try:
+            while stop is None or not stop.is_set():
+                self.poll()
+                time.sleep(self.interval)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.close()
+
+        return
+
+    def close(self):
+        """Waits for running files to finish and saves the state.
+        """
+        self._pool.close()
+        self._pool.join()
+        self._collect()
+
+        return
+
+
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Load NVG files dropped into hot folders.")
+    parser.add_argument('folders',nargs='+',help="folders to watch")
+    parser.add_argument('--gdb',required=True,help="output file geodatabase")
+    parser.add_argument('--state',help="state file used to remember processed files")
+    parser.add_argument('--interval',type=float,default=5.0,help="seconds between polls")
+    parser.add_argument('--settle',type=int,default=2,help="polls a file must be unchanged for")
+    parser.add_argument('--workers',type=int,default=2,help="files processed at the same time")
+    parser.add_argument('--recursive',action='store_true',help="watch sub folders")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO,format="%(asctime)s %(message)s")
+    watcher = Watcher(args.folders,GeodatabaseTarget(args.gdb),stateFile=args.state,
+                      interval=args.interval,settle=args.settle,workers=args.workers,
+                      recursive=args.recursive)
+    watcher.run()
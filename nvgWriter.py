@@ -16,16 +16,174 @@ classes.
 """
 
 from xml.etree.ElementTree import ElementTree, Element, SubElement, Comment, tostring
+from xml.sax.saxutils import escape
+from array import array
+from multiprocessing.pool import ThreadPool
+import threading
+import codecs
+import json
+import math
 import sys
-from xml.dom import minidom
+import os
+import re
+from collections import OrderedDict
 import arcpy
+import numpy
+import nvgSimplify
+import nvgSymbols
+
+try:
+    from Queue import Queue, Full
+except ImportError:
+    from queue import Queue, Full
+
+# minus sign of a coordinate formatted as zero, such as -0.00
+_negativeZero = re.compile(r'(?<![\d.])-(?=0(?:\.0*)?(?![\d.]))')
+
+# parameters of circle, ellipse and arc elements after the centre, in the
+# order of the NVG schema
+_curveAttributes = ['r','rx','ry','rotation','startangle','endangle']
+
+# semi-major axis of the WGS84 ellipsoid in metres, used to scale distances in
+# world mercator
+_earthRadius = 6378137.0
+
+# XML declaration written by minidom's toprettyxml
+_prettyDeclaration = u'<?xml version="1.0" ?>\n'
+
+# toprettyxml writes attributes in name order before Python 3.8 and from 3.8
+# in the order they were set after the namespace declarations
+_sortAttributes = sys.version_info < (3,8)
+
+# characters replaced in attribute values, white space is written as character
+# references so it is not normalised to spaces when the file is read
+_attributeEntities = {'"': '&quot;', '\n': '&#10;', '\r': '&#13;', '\t': '&#9;'}
+
+def _prettyElement(elem,level=0,indent=u"\t"):
+    """Return the tab indented XML string for the element and its children.
+
+    The layout matches minidom's toprettyxml, including the order of the
+    attributes, and elements without children or text are self closing. The
+    string is unicode so labels that are not ASCII can be written.
+    """
+    pad = indent * level
+    items = elem.attrib.items()
+    if _sortAttributes:
+        items = sorted(items)
+    else:
+        items = sorted(items,key=lambda item: not item[0].startswith('xmlns'))
+    attrs = u''.join(u' {0}="{1}"'.format(name,escape(value,_attributeEntities))
+                     for name, value in items)
+    children = list(elem)
+    text = elem.text
+
+    if not children and not text:
+        return pad + u'<' + elem.tag + attrs + u'/>\n'
+    elif not children:
+        return pad + u'<' + elem.tag + attrs + u'>' + escape(text) + u'</' + elem.tag + u'>\n'
+
+    lines = [pad + u'<' + elem.tag + attrs + u'>\n']
+    if text and text.strip():
+        lines.append(pad + indent + escape(text) + u'\n')
+    for child in children:
+        lines.append(_prettyElement(child,level + 1,indent))
+    lines.append(pad + u'</' + elem.tag + u'>\n')
+
+    return u''.join(lines)
 
 def prettify(elem):
     """Return a pretty-printed XML string for the element
     """
-    rough_string = tostring(elem, 'utf-8')
-    reparsed = minidom.parseString(rough_string)
-    return reparsed.toprettyxml(indent="\t")
+    return _prettyDeclaration + _prettyElement(elem)
+
+def _serialize(elem):
+    """Return the UTF-8 encoded XML for a single element without an XML
+    declaration.
+    """
+    return tostring(elem, 'utf-8')
+
+# closing tag and self closing root element of an NVG document, with an
+# optional namespace prefix
+_endTag = re.compile(br'</((?:[A-Za-z_][\w.\-]*:)?nvg)\s*>')
+_emptyRoot = re.compile(br'<((?:[A-Za-z_][\w.\-]*:)?nvg)(?:\s[^<>]*?)?(\s*/>)')
+_comment = re.compile(br'<!--.*?-->',re.S)
+_encoding = re.compile(br'^(?:\xef\xbb\xbf)?<\?xml[^>]*encoding=["\']([A-Za-z0-9._\-]+)["\']')
+
+def _code(value):
+    """Returns a colour or fill code as the integer used by _generateStyle.
+    """
+    try:
+        return int(value)
+    except (TypeError,ValueError):
+        return value
+
+def _recordParts(geometry):
+    """Returns the writer shape type, Point, Polyline or Polygon, and the
+    parts of a record geometry. Points are returned as a list of x,y pairs,
+    lines and polygon exterior rings as lists of x,y pairs.
+    """
+    if hasattr(geometry,'__geo_interface__'):
+        geometry = geometry.__geo_interface__
+    if isinstance(geometry,dict):
+        kind = geometry['type']
+        coordinates = geometry['coordinates']
+    else:
+        # bare coordinates, the type is given by their depth
+        coordinates = geometry
+        depth = 0
+        item = coordinates
+        while isinstance(item,(list,tuple)) and item:
+            depth += 1
+            item = item[0]
+        kinds = {1: 'Point', 2: 'LineString', 3: 'Polygon'}
+        if depth not in kinds:
+            raise ValueError("Cannot tell the geometry type of coordinates: {0!r}".format(geometry))
+        kind = kinds[depth]
+
+    if kind == 'Point':
+        return 'Point', [coordinates]
+    if kind == 'MultiPoint':
+        return 'Point', list(coordinates)
+    if kind == 'LineString':
+        return 'Polyline', [coordinates]
+    if kind == 'MultiLineString':
+        return 'Polyline', list(coordinates)
+    if kind == 'Polygon':
+        return 'Polygon', [coordinates[0]]
+    if kind == 'MultiPolygon':
+        return 'Polygon', [polygon[0] for polygon in coordinates]
+    raise ValueError("Unsupported geometry type: {0}".format(kind))
+
+def geojsonRecords(source):
+    """Yields a (geometry, properties) record for each feature in a stream of
+    newline delimited GeoJSON, as accepted by Writer.writeRecords.
+
+    source is a file name or an open file. Each line holds a GeoJSON Feature
+    or geometry, blank lines and the record separators of GeoJSON text
+    sequences are ignored.
+    """
+    if isinstance(source,(str,type(u''))):
+        with open(source,'rb') as f:
+            for record in geojsonRecords(f):
+                yield record
+        return
+
+    for number, line in enumerate(source,1):
+        if isinstance(line,bytes):
+            line = line.decode('utf-8')
+        line = line.strip().lstrip(u'\x1e').strip()
+        if not line:
+            continue
+        try:
+            feature = json.loads(line)
+        except ValueError as e:
+            raise ValueError("Invalid GeoJSON on line {0}: {1}".format(number,e))
+        if feature.get('type') == 'Feature':
+            if feature.get('geometry') is None:
+                continue
+            yield feature['geometry'], feature.get('properties') or {}
+        else:
+            yield feature, {}
 
 nvg = Element('nvg')
 nvg.set('version', '1.4.0')
@@ -51,6 +209,19 @@ class Writer(object):
         self.nvg.set('xmlns', 'http://tide.act.nato.int/schemas/2008/10/nvg')
         #self.nvg.append(Comment('NVG generated by nvgWriter.py'))
 
+        # shape type and field names of each feature class, fetched once
+        self._metadata = {}
+
+        # number of features skipped by the last write for each source and
+        # reason, see summary
+        self.skipped = {}
+        self._skippedLock = threading.Lock()
+
+        # circles, ellipses and arcs are measured in world mercator to match
+        # the units used by nvgReader
+        self.wgs84 = arcpy.SpatialReference(4326)
+        self.world_merc = arcpy.SpatialReference(3395)
+
         return
 
     def _generateStyle(self,geometryType,colour=None,width=None,fill=None):
@@ -95,33 +266,300 @@ class Writer(object):
         """
         return arcpy.Describe(fc)
 
-    def _pointString(self,points):
-            """Returns a string in the format required by NVG for point coordinates.
+    def _getMetadata(self,fc):
+        """Returns the shape type and list of field names of the feature class.
+
+        The values are cached so each feature class is only described once.
+        """
+        if fc not in self._metadata:
+            shapeType = self._describe(fc).shapeType
+            fieldNames = [field.name for field in arcpy.ListFields(fc)]
+            self._metadata[fc] = (shapeType,fieldNames)
+
+        return self._metadata[fc]
+
+    def _getCoordinates(self,geom):
+        """Returns an array of x,y values for the first part of the geometry.
+
+        For polygons only the exterior ring of the first part is returned, this
+        is the same ring as the first ring of the geometry's JSON.
+        """
+        coords = array('d')
+        for pnt in geom.getPart(0):
+            # interior rings are separated from the exterior ring by None
+            if pnt is None:
+                break
+            coords.append(pnt.X)
+            coords.append(pnt.Y)
+
+        return coords
+
+    def _reduceCoordinates(self,coords,ring,precision=None,tolerance=None,
+                           method='douglas-peucker'):
+        """Returns the coordinates quantized to precision decimal places and
+        simplified to the tolerance.
+
+        coords is a flat array of x,y values as returned by _getCoordinates and
+        a flat list of x,y values is returned. ring is True for polygon rings
+        so the simplified ring stays closed and valid. None is returned if
+        rounding collapses the line or ring.
+        """
+        if precision is None and not tolerance:
+            return coords
+
+        points = numpy.frombuffer(coords,dtype=numpy.float64).reshape(-1,2)
+        if precision is not None:
+            points = nvgSimplify.quantize(points,precision,ring)
+            if points is None:
+                return None
+        if tolerance:
+            points = nvgSimplify.simplify(points,tolerance,method,ring)
 
-            This method is used to parse the coordinates from each geometry into a
-            string sutiable for writing into the NVG file.
-            """
-            s = ''
-            for pnt in points:
-                pnt = str(pnt).strip('[]').replace(" ","")
-                s = s + pnt + " "
+        return points.ravel().tolist()
 
-            return s.rstrip()
+    def _pointString(self,coords,precision=None):
+        """Returns a string in the format required by NVG for point coordinates.
 
-    def _fieldCheck(self,fc):
+        coords is a flat sequence of x,y values as returned by _getCoordinates.
+        precision is the number of decimal places to write, by default the
+        shortest representation of each value is written. Small negative
+        values rounded to zero are written without a minus sign.
+        """
+        if precision is None:
+            fmt = "%r,%r"
+        else:
+            fmt = "%.{0}f,%.{0}f".format(int(precision))
+
+        # format every coordinate pair with a single string operation
+        points = " ".join([fmt] * (len(coords) // 2)) % tuple(coords)
+        if precision is not None:
+            points = _negativeZero.sub('',points)
+
+        return points
+
+    def _circumcircle(self,p1,p2,p3):
+        """Returns the centre x, y and radius of the circle through 3 points.
+        """
+        ax, ay = p1[0], p1[1]
+        bx, by = p2[0], p2[1]
+        cx, cy = p3[0], p3[1]
+        d = 2.0 * (ax * (by - cy) + bx * (cy - ay) + cx * (ay - by))
+        if d == 0:
+            return None
+        a2 = ax * ax + ay * ay
+        b2 = bx * bx + by * by
+        c2 = cx * cx + cy * cy
+        x = (a2 * (by - cy) + b2 * (cy - ay) + c2 * (ay - by)) / d
+        y = (a2 * (cx - bx) + b2 * (ax - cx) + c2 * (bx - ax)) / d
+
+        return x, y, math.hypot(ax - x,ay - y)
+
+    def _angle(self,cx,cy,x,y):
+        """Returns the angle in degrees from the centre to x,y in the 0 to 360
+        range.
+        """
+        return math.degrees(math.atan2(y - cy,x - cx)) % 360.0
+
+    def _curveSegment(self,start,segment):
+        """Returns the parameters of a circular or elliptic arc segment from
+        the JSON of a curved geometry.
+
+        The result is a tuple of (end, cx, cy, rx, ry, rotation, startangle,
+        endangle) with the angles in degrees in the direction used by nvgReader
+        and rotation in the convention used by nvgReader. None is returned for
+        bezier curves and straight segments.
+        """
+        if not isinstance(segment,dict):
+            return None
+
+        if 'c' in segment:
+            # circular arc through an interior point
+            end, interior = segment['c']
+            circle = self._circumcircle(start,interior,end)
+            if circle is None:
+                return None
+            cx, cy, r = circle
+            rx = ry = r
+            rotation = 0.0
+            # counter clockwise if start, interior and end turn left
+            ccw = ((interior[0] - start[0]) * (end[1] - start[1]) -
+                   (interior[1] - start[1]) * (end[0] - start[0])) > 0
+            startangle = self._angle(cx,cy,start[0],start[1])
+            endangle = self._angle(cx,cy,end[0],end[1])
+
+        elif 'a' in segment:
+            arc = segment['a']
+            end, centre = arc[0], arc[1]
+            cx, cy = centre[0], centre[1]
+            ccw = not arc[3]
+            if len(arc) >= 7:
+                # elliptic arc with the major axis rotated counter clockwise
+                phi, rx, ry = arc[4], arc[5], arc[5] * arc[6]
+            else:
+                # circular arc defined by its centre
+                phi = 0.0
+                rx = ry = math.hypot(start[0] - cx,start[1] - cy)
+            if rx == 0 or ry == 0:
+                return None
+            # parametric angles of the end points in the frame of the ellipse
+            angles = []
+            for x, y in (start,end):
+                dx, dy = x - cx, y - cy
+                lx = dx * math.cos(phi) + dy * math.sin(phi)
+                ly = -dx * math.sin(phi) + dy * math.cos(phi)
+                angles.append(math.degrees(math.atan2(ly / ry,lx / rx)) % 360.0)
+            startangle, endangle = angles
+            # nvgReader rotates points clockwise by the rotation
+            rotation = -math.degrees(phi) % 360.0
+        else:
+            return None
+
+        if not ccw:
+            # nvgReader draws arcs counter clockwise from start to end
+            startangle, endangle = endangle, startangle
+
+        return end, cx, cy, rx, ry, rotation, startangle, endangle
+
+    def _fitCircle(self,coords,curveTolerance):
+        """Returns the centre x, y and radius of the circle that fits the
+        closed ring of world mercator coordinates within curveTolerance, or
+        None.
+
+        The circle is fitted by least squares and both the vertices and the
+        mid point of each edge must lie within curveTolerance of it, so
+        polygons with few vertices are not mistaken for circles.
+        curveTolerance is in metres and is scaled to world mercator units at
+        the centre of the circle.
+        """
+        points = numpy.asarray(coords,dtype=numpy.float64).reshape(-1,2)
+        if len(points) < 9:
+            return None
+        x = points[:,0]
+        y = points[:,1]
+        A = numpy.column_stack((x,y,numpy.ones(len(x))))
+        b = x * x + y * y
+        # rcond=-1 is the default of numpy before 1.14, passing it keeps the
+        # same result on every version without a warning
+        solution = numpy.linalg.lstsq(A,b,rcond=-1)[0]
+        cx = float(solution[0]) / 2.0
+        cy = float(solution[1]) / 2.0
+        r = math.sqrt(max(solution[2] + cx * cx + cy * cy,0.0))
+        if r == 0:
+            return None
+
+        mids = (points[:-1] + points[1:]) / 2.0
+        test = numpy.concatenate((points,mids))
+        residuals = numpy.abs(numpy.hypot(test[:,0] - cx,test[:,1] - cy) - r)
+        if residuals.max() > curveTolerance * math.cosh(cy / _earthRadius):
+            return None
+
+        return cx, cy, r
+
+    def _curveElement(self,geom,shapeType,curveTolerance=None,precision=None):
+        """Returns the tag and attributes of a native NVG circle, ellipse or
+        arc element for the geometry, or None if it cannot be written as one.
+
+        True curves stored by ArcGIS are read from the geometry's JSON. If
+        curveTolerance is set, densified polygons that fit a circle to within
+        curveTolerance metres are also written as circles. Parameters are
+        measured in world mercator so radii match the units used by nvgReader.
+        """
+        if geom.partCount != 1:
+            return None
+        hasCurves = getattr(geom,'hasCurves',False)
+        if not hasCurves and (curveTolerance is None or shapeType != 'Polygon'):
+            return None
+
+        projected = geom.projectAs(self.world_merc)
+        attrs = None
+
+        if hasCurves:
+            data = json.loads(projected.JSON)
+            key = 'curveRings' if shapeType == 'Polygon' else 'curvePaths'
+            parts = data.get(key)
+            if not parts or len(parts) != 1:
+                return None
+            part = parts[0]
+            segments = []
+            current = part[0]
+            for segment in part[1:]:
+                params = self._curveSegment(current,segment)
+                if params is None:
+                    return None
+                segments.append(params)
+                current = params[0]
+
+            if shapeType == 'Polyline' and len(segments) == 1:
+                end, cx, cy, rx, ry, rotation, startangle, endangle = segments[0]
+                attrs = {'rx': rx, 'ry': ry, 'rotation': rotation,
+                         'startangle': startangle, 'endangle': endangle}
+                tag = 'arc'
+            elif shapeType == 'Polygon' and current[:2] == part[0][:2]:
+                # a closed ring of arcs that all share the same ellipse
+                first = segments[0]
+                limit = 1e-6 * max(first[3],1.0)
+                for other in segments[1:]:
+                    if max(abs(other[i] - first[i]) for i in (1,2,3,4)) > limit:
+                        return None
+                end, cx, cy, rx, ry, rotation = first[:6]
+                if abs(rx - ry) <= 1e-9 * rx:
+                    attrs = {'r': rx}
+                    tag = 'circle'
+                else:
+                    attrs = {'rx': rx, 'ry': ry, 'rotation': rotation}
+                    tag = 'ellipse'
+            else:
+                return None
+        else:
+            coords = self._getCoordinates(projected)
+            circle = self._fitCircle(coords,curveTolerance)
+            if circle is None:
+                return None
+            cx, cy, r = circle
+            attrs = {'r': r}
+            tag = 'circle'
+
+        # the centre is written in wgs84 like every other coordinate
+        centre = arcpy.PointGeometry(arcpy.Point(cx,cy),self.world_merc).projectAs(self.wgs84)
+        x, y = self._pointString((centre.firstPoint.X,centre.firstPoint.Y),precision).split(",")
+        # the centre and then the other parameters in the order of the NVG
+        # schema so the geometry is written before the label and style
+        values = OrderedDict([('cx',x),('cy',y)])
+        for key in _curveAttributes:
+            if key in attrs:
+                values[key] = repr(round(float(attrs[key]),3))
+
+        return tag, values
+
+    def _curveFeature(self,geom,shapeType,label,style,curveTolerance=None,precision=None):
+        """Returns the circle, ellipse or arc element for a line or polygon
+        feature, or None if it cannot be written as one, see _curveElement.
+
+        The geometry attributes are written before the label and style as for
+        every other element.
+        """
+        curve = self._curveElement(geom,shapeType,curveTolerance,precision)
+        if not curve:
+            return None
+        tag, attrs = curve
+        attrs['label'] = label
+        attrs['style'] = style
+
+        return self._writeElement(tag,**attrs)
+
+    def _fieldCheck(self,fc,symbolField='SYMBOL'):
         """Returns True if the required fields are present in the feature class.
 
         The Label, Colour, Width and Fill fields are required to generate an NVG
-        file that can be read by ComBAT.
+        file that can be read by ComBAT. Points also require the symbolField
+        used to look up their symbol code.
         """
         result = False
-        shapeType = self._describe(fc).shapeType
-        fields = arcpy.ListFields(fc)
-        fieldNames = [field.name for field in fields]
+        shapeType, fieldNames = self._getMetadata(fc)
 
         # check required fileds are present
         if shapeType == 'Point':
-            if 'LABEL' in fieldNames:
+            if 'LABEL' in fieldNames and symbolField in fieldNames:
                 result = True
         elif shapeType == 'Polyline':
             lineFields = ['LABEL', 'COLOUR', 'WIDTH']
@@ -138,70 +576,179 @@ class Writer(object):
 
         return result
 
-    def _getFeatures(self,fc):
-        """Returns the features and attributes from the input feature class.
+    def _pointElement(self,xy,label,value,precision=None,symbols=None,
+                      symbolField='SYMBOL',source=None):
+        """Returns the point element for a point feature.
+
+        value is the symbolField value of the feature, resolved to its symbol
+        code with the symbols nvgSymbols.SymbolTable. A point whose value has
+        no symbol code and no table default is counted in skipped and None is
+        returned, source describes where the feature came from.
         """
-        pntFields = ['SHAPE@XY', 'LABEL']
+        if precision is None:
+            x = str(xy[0])
+            y = str(xy[1])
+        else:
+            x, y = self._pointString(xy,precision).split(",")
+        if label is None:
+            label = ""
+
+        # points must have a valid symbol code, skip the point rather than
+        # abandon a partly written file
+        symbol = symbols.resolve(value)
+        if symbol is None:
+            self._skip(source,"no symbol code for {0} value {1}".format(symbolField,value))
+            return None
+
+        return self._writeElement('point',x=x,y=y,symbol=symbol,label=label)
+
+    def _shapeElement(self,shapeType,coords,label,style,precision=None,tolerance=None,
+                      method='douglas-peucker',source=None):
+        """Returns the polyline or polygon element for a line or polygon
+        feature. coords is a flat array of x,y values as returned by
+        _getCoordinates.
+
+        A feature that rounding to precision would collapse is written at full
+        precision. A line with fewer than two distinct vertices or a ring with
+        fewer than three is counted in skipped and None is returned, source
+        describes where the feature came from.
+        """
+        if label is None:
+            label = ""
+        ring = shapeType == 'Polygon'
+
+        # return a string of point coordinates
+        reduced = self._reduceCoordinates(coords,ring,precision,tolerance,method)
+        if reduced is None:
+            precision = None
+            reduced = self._reduceCoordinates(coords,ring,None,tolerance,method)
+        if nvgSimplify.collapsed(reduced,ring):
+            self._skip(source,"{0} with too few vertices".format(shapeType.lower()))
+            return None
+        points = self._pointString(reduced,precision)
+
+        # create the element
+        return self._writeElement(shapeType.lower(),points=points,label=label,style=style)
+
+    def _getFeatures(self,fc,precision=None,tolerance=None,method='douglas-peucker',
+                     curveTolerance=None,symbols=None,symbolField='SYMBOL'):
+        """Yields an NVG element for each feature in the input feature class.
+
+        Elements are created as the search cursor returns each row so only a
+        single feature is held in memory at a time. The cursor projects every
+        feature to WGS84, the coordinate system of NVG. precision is the number of
+        decimal places written for each coordinate, tolerance and method set
+        the simplification applied to lines and polygons. Curves are written
+        as circle, ellipse and arc elements, see _curveElement. The symbol of
+        each point is resolved from the value of its symbolField with the
+        symbols nvgSymbols.SymbolTable.
+        """
+        pntFields = ['SHAPE@XY', 'LABEL', symbolField]
         lineFields = ['SHAPE@','LABEL', 'COLOUR', 'WIDTH']
         polyFields = ['SHAPE@','LABEL', 'COLOUR', 'WIDTH', 'FILL']
 
-        shapeType = self._describe(fc).shapeType
+        shapeType = self._getMetadata(fc)[0]
 
         # check the fields
-        if self._fieldCheck(fc):
+        if self._fieldCheck(fc,symbolField):
             # extract the feature and attribute data
 
             if shapeType == 'Point':
                 # read point information
-                with arcpy.da.SearchCursor(fc,pntFields) as cursor:
+                with arcpy.da.SearchCursor(fc,pntFields,spatial_reference=self.wgs84) as cursor:
                     for row in cursor:
-                        x = str(row[0][0])
-                        y = str(row[0][1])
-                        label = str(row[1])
-
-                        if label is None:
-                            label = ""
                         # write the point element
-                        self._writeElement('point',x=x,y=y,label=label)
+                        element = self._pointElement(row[0],row[1],row[2],precision,symbols,
+                                                     symbolField,fc)
+                        if element is not None:
+                            yield element
 
             elif shapeType == 'Polyline':
-                with arcpy.da.SearchCursor(fc,lineFields) as cursor:
+                with arcpy.da.SearchCursor(fc,lineFields,spatial_reference=self.wgs84) as cursor:
                     for row in cursor:
-                        geom = eval(row[0].JSON)
-
-                        # return a string of point coordinates
-                        points = self._pointString(geom['paths'][0])
-
                         style = self._generateStyle(shapeType,colour=row[2],width=row[3])
                         label = row[1]
                         if label is None:
                             label = ""
-                        # create the element
-                        self._writeElement('polyline',points=points,label=label,style=style)
 
-            elif shapeType == 'Polygon':
-                with arcpy.da.SearchCursor(fc,polyFields) as cursor:
-                    for row in cursor:
-                        geom = eval(row[0].JSON)
+                        # write arcs as native elements
+                        curve = self._curveFeature(row[0],shapeType,label,style,
+                                                   curveTolerance,precision)
+                        if curve is not None:
+                            yield curve
+                            continue
 
-                        # return a string of point coordinates
-                        points = self._pointString(geom['rings'][0])
+                        element = self._shapeElement(shapeType,self._getCoordinates(row[0]),label,
+                                                     style,precision,tolerance,method,fc)
+                        if element is not None:
+                            yield element
 
+            elif shapeType == 'Polygon':
+                with arcpy.da.SearchCursor(fc,polyFields,spatial_reference=self.wgs84) as cursor:
+                    for row in cursor:
                         style = self._generateStyle(shapeType,colour=row[2],width=row[3],fill=row[4])
                         label = row[1]
                         if label is None:
                             label = ""
 
-                        # create the element
-                        self._writeElement('polygon',points=points,label=label,style=style)
+                        # write circles and ellipses as native elements
+                        curve = self._curveFeature(row[0],shapeType,label,style,
+                                                   curveTolerance,precision)
+                        if curve is not None:
+                            yield curve
+                            continue
+
+                        element = self._shapeElement(shapeType,self._getCoordinates(row[0]),label,
+                                                     style,precision,tolerance,method,fc)
+                        if element is not None:
+                            yield element
 
         else:
             # need to raise an error and terminate the script
             raise arcpy.ExecuteError()
         return
 
+    def _getRecords(self,records,precision=None,tolerance=None,method='douglas-peucker',
+                    symbols=None,symbolField='SYMBOL'):
+        """Yields an NVG element for each (geometry, attributes) record.
+
+        The geometry is a GeoJSON geometry, an object with __geo_interface__
+        or bare coordinates nested as in a GeoJSON Point, LineString or
+        Polygon. attributes is a dictionary using the feature class field
+        names LABEL, COLOUR, WIDTH, FILL and symbolField, matched ignoring
+        case. Each part of a multipart geometry is written as its own element
+        and only the exterior ring of a polygon is written.
+        """
+        for geometry, attributes in records:
+            shapeType, parts = _recordParts(geometry)
+            values = dict((str(key).upper(),value) for key, value in (attributes or {}).items())
+            label = values.get('LABEL')
+
+            if shapeType == 'Point':
+                for xy in parts:
+                    element = self._pointElement(xy[:2],label,values.get(symbolField.upper()),
+                                                 precision,symbols,symbolField,'records')
+                    if element is not None:
+                        yield element
+                continue
+
+            if shapeType == 'Polyline':
+                style = self._generateStyle(shapeType,colour=_code(values.get('COLOUR')),
+                                            width=values.get('WIDTH'))
+            else:
+                style = self._generateStyle(shapeType,colour=_code(values.get('COLOUR')),
+                                            width=values.get('WIDTH'),fill=_code(values.get('FILL')))
+            for part in parts:
+                coords = array('d',[float(v) for xy in part for v in xy[:2]])
+                element = self._shapeElement(shapeType,coords,label,style,precision,tolerance,
+                                             method,'records')
+                if element is not None:
+                    yield element
+
+        return
+
     def _writeElement(self,element,**kwargs):
-        """Sets keyword attributes for the supplied element.
+        """Returns a new element with the keyword attributes set.
 
         The element is the NVG element to write, for example point, polyline,
         polygon.
@@ -210,8 +757,9 @@ class Writer(object):
         example a point will have the attributes x,y and label supplied.
         """
 
-        # creates a cild element of NVG with the element name and attributes
-        # from the kwargs. Each keyword will become an attribute.
+        # creates an element with the element name and attributes from the
+        # kwargs. Each keyword will become an attribute. The element is not
+        # added to the NVG document so it can be written out and discarded.
 
         # currently no checking of the kwargs to determine if they are valid
         # for the supplied nvg element.
@@ -219,9 +767,179 @@ class Writer(object):
         # need to ensure that the geometry tags are written first due to ComBAT
         # failing to read the items if this is not the case.
 
-        return SubElement(self.nvg,element,kwargs)
+        return Element(element,kwargs)
+
+    def _streamXML(self,elements,nvgFile,prettyXML=False):
+        """Writes the NVG document to the open nvgFile one element at a time.
+
+        The output is identical to writing the complete document with
+        ElementTree, or with prettify when prettyXML is True, but only the
+        current element is held in memory.
+        """
+        # split the serialised document element into its start and end tags
+        root = Element(self.nvg.tag,self.nvg.attrib)
+        root.text = 'x'
+        if prettyXML:
+            declaration = _prettyDeclaration.encode('utf-8')
+            start, end = _prettyElement(root).encode('utf-8').rsplit(b'x',1)
+            start = start + b'\n'
+            serialize = lambda element: _prettyElement(element,1).encode('utf-8')
+        else:
+            declaration = b"<?xml version='1.0' encoding='UTF-8'?>\n"
+            start, end = _serialize(root).rsplit(b'x',1)
+            serialize = _serialize
+
+        nvgFile.write(declaration)
+        empty = True
+        for element in elements:
+            if empty:
+                nvgFile.write(start)
+                empty = False
+            nvgFile.write(serialize(element))
+
+        if empty:
+            # an empty document is written as a self closing tag
+            if prettyXML:
+                nvgFile.write(_prettyElement(self.nvg).encode('utf-8'))
+            else:
+                nvgFile.write(_serialize(self.nvg))
+        else:
+            nvgFile.write(end)
+
+        return
+
+    def _findEnd(self,nvgFile,chunkSize=65536):
+        """Returns (position, prefix, selfClosing) for the end of the root
+        element of the open nvgFile.
+
+        The file is searched backwards from the end in chunks so only the tail
+        of a large document is read. position is the start of the closing tag,
+        or of the /> ending a self closing root element, prefix is the namespace
+        prefix of the root element including the colon.
+        """
+        nvgFile.seek(0,os.SEEK_END)
+        size = nvgFile.tell()
+        length = min(chunkSize,size)
+        while True:
+            nvgFile.seek(size - length)
+            tail = nvgFile.read(length)
+            for pattern, selfClosing in ((_endTag,False),(_emptyRoot,True)):
+                for match in reversed(list(pattern.finditer(tail))):
+                    # only whitespace and comments may follow the root element
+                    if _comment.sub(b'',tail[match.end():]).strip():
+                        continue
+                    prefix = match.group(1).decode('ascii')[:-3]
+                    if selfClosing:
+                        return size - length + match.start(2), prefix, True
+                    return size - length + match.start(), prefix, False
+            if length == size:
+                raise ValueError("No closing nvg tag found in {0}".format(nvgFile.name))
+            length = min(length * 2,size)
+
+    def _appendXML(self,elements,outFile,prettyXML=False):
+        """Adds the elements to the end of the existing NVG document outFile.
 
-    def write(self,inFC,outFile,prettyXML=True):
+        The closing tag of the root element is found without parsing the rest
+        of the document. The new elements are serialised first and then
+        written over the closing tag with a new closing tag in a single write,
+        so the file is only incomplete for the time of that write.
+        """
+        with open(outFile,'r+b') as nvgFile:
+            encoding = _encoding.match(nvgFile.read(256))
+            encoding = codecs.lookup(encoding.group(1).decode('ascii')).name if encoding else 'utf-8'
+            if encoding.startswith('utf-16') or encoding.startswith('utf-32'):
+                raise ValueError("Cannot append to a {0} encoded NVG file".format(encoding))
+
+            position, prefix, selfClosing = self._findEnd(nvgFile)
+
+            def serialize(element):
+                if prefix:
+                    # elements use the namespace prefix of the root element
+                    for child in element.iter():
+                        child.tag = prefix + child.tag
+                if prettyXML:
+                    text = _prettyElement(element,1)
+                else:
+                    text = _serialize(element).decode('utf-8')
+                return text.encode(encoding,'xmlcharrefreplace')
+
+            data = b''.join(serialize(element) for element in elements)
+            if not data:
+                return
+
+            nvgFile.seek(position)
+            tail = nvgFile.read()
+            if selfClosing:
+                # the empty root element gets a start and end tag
+                start = b'>\n' if prettyXML else b'>'
+                end = '</{0}nvg>'.format(prefix).encode(encoding)
+                tail = start + data + end + tail[tail.index(b'/>') + 2:]
+            else:
+                tail = data + tail
+            nvgFile.seek(position)
+            nvgFile.write(tail)
+            nvgFile.truncate()
+
+        return
+
+    def _parallelFeatures(self,fcs,workers,bufferSize=1000,**options):
+        """Yields the NVG elements of each feature class in fcs, reading the
+        feature classes concurrently with a pool of worker threads.
+
+        Elements are yielded in the order of fcs so the output is the same as
+        reading the feature classes one at a time. Each worker buffers up to
+        bufferSize elements for a feature class that is not yet being written.
+        """
+        done = object()
+        cancel = threading.Event()
+        queues = [Queue(bufferSize) for fc in fcs]
+
+        def put(queue,item):
+            # give up if the consumer has stopped so workers cannot block
+            while not cancel.is_set():
+                try:
+                    queue.put(item,timeout=0.1)
+                    return True
+                except Full:
+                    pass
+            return False
+
+        def produce(index):
+            queue = queues[index]
+            try:
+                for element in self._getFeatures(fcs[index],**options):
+                    if not put(queue,element):
+                        return
+            except Exception as e:
+                put(queue,e)
+            put(queue,done)
+
+        # describe each feature class before the workers start
+        for fc in fcs:
+            self._getMetadata(fc)
+
+        pool = ThreadPool(workers)
+        try:
+            # tasks start in order so the feature class being written is
+            # always being read
+            for index in range(len(fcs)):
+                pool.apply_async(produce,(index,))
+            for queue in queues:
+                while True:
+                    item = queue.get()
+                    if item is done:
+                        break
+                    if isinstance(item,Exception):
+                        raise item
+                    yield item
+        finally:
+            cancel.set()
+            pool.close()
+            pool.join()
+
+    def write(self,inFC,outFile,prettyXML=True,precision=None,tolerance=None,
+              simplify='douglas-peucker',workers=1,curveTolerance=None,symbols=None,
+              symbolField='SYMBOL',append=False):
         """Writes the contents of the input feature class(es) to NVG format.
 
         inFC - can be a single or list of File GeoDatabase Feature Classes. These
@@ -229,22 +947,117 @@ class Writer(object):
                with the appropriate templates for editing in ArcGIS.
         outFile - location and filename for the output NVG document. This should
                   .nvg file extension supplied.
+        prettyXML - indent the output with tabs.
+        precision - number of decimal places written for each coordinate, by
+                    default the full precision of each value is written.
+                    Vertices that become duplicates once rounded are removed.
+        tolerance - simplify lines and polygon rings to this tolerance, in
+                    decimal degrees as features are written in WGS84.
+        simplify - simplification method, 'douglas-peucker' or 'visvalingam'.
+        workers - number of feature classes read at the same time by worker
+                  threads, by default they are read one at a time. The
+                  features are written in the order of inFC. Only use more
+                  than one worker with ArcGIS Pro, arcpy is not thread safe in
+                  ArcGIS Desktop where feature classes should be written by
+                  separate processes instead.
+        curveTolerance - write densified polygons that fit a circle to within
+                         this many metres as circle elements.
+        symbols - nvgSymbols.SymbolTable or the path of a symbol table CSV
+                  used to look up the symbol code of each point from its
+                  symbolField. Without a table the field must hold valid
+                  APP-6A codes.
+        symbolField - field of point feature classes holding the symbol code
+                      or the value looked up in the symbol table.
+        append - add the features to the end of an existing outFile rather
+                 than replacing it. The existing features are not read so
+                 this is fast for large files, a new file is written if
+                 outFile does not exist.
+
+        Each element is written to the file as it is read so memory use does
+        not grow with the number of features. Points with no symbol code and
+        lines and polygons with too few vertices are skipped and counted in
+        skipped, see summary.
 
-        The method does not currently handle circle and ellipse polygons. This is
-        due to ArcGIS representing these as curved lines with only 2 points.
-        Future versions will add support by densifying the lines.
+        Circles, ellipses and arcs stored by ArcGIS as true curves are written
+        as NVG circle, ellipse and arc elements rather than densified lines.
         """
 
         fcs = list(inFC)
+        self.skipped = {}
 
-        for fc in fcs:
-            self._getFeatures(fc)
+        # stream each element to the file as it is read from the cursor
+        # the symbol table is compiled once and shared by every feature class
+        symbols = self._symbolTable(symbols)
 
-        if prettyXML:
-            with open(outFile,'wb') as nvgFile:
-                nvgFile.write(prettify(self.nvg))
+        options = {'precision': precision, 'tolerance': tolerance, 'method': simplify,
+                   'curveTolerance': curveTolerance, 'symbols': symbols,
+                   'symbolField': symbolField}
+        if workers > 1 and len(fcs) > 1:
+            elements = self._parallelFeatures(fcs,min(workers,len(fcs)),**options)
         else:
-            with open(outFile,'wb') as nvgFile:
-                ElementTree(self.nvg).write(nvgFile,encoding="UTF-8", xml_declaration=True)
+            elements = (element for fc in fcs
+                        for element in self._getFeatures(fc,**options))
+        self._output(elements,outFile,prettyXML,append)
+
+        return True
+
+    def writeRecords(self,records,outFile,prettyXML=True,precision=None,tolerance=None,
+                     simplify='douglas-peucker',symbols=None,symbolField='SYMBOL',append=False):
+        """Writes (geometry, attributes) records to NVG format without a
+        feature class.
+
+        records - iterable of (geometry, attributes) records, such as the
+                  records yielded by geojsonRecords. The geometry is a GeoJSON
+                  geometry or bare coordinates and the attributes use the
+                  feature class field names, see _getRecords.
+        The other arguments are as for write. Coordinates are written as they
+        are given, which for GeoJSON is WGS84.
+
+        Records are written as they are read so a stream of any length can be
+        written. Features are skipped as for write, see summary.
+        """
+        self.skipped = {}
+        symbols = self._symbolTable(symbols)
+        elements = self._getRecords(records,precision,tolerance,simplify,symbols,symbolField)
+        self._output(elements,outFile,prettyXML,append)
 
         return True
+
+    def _skip(self,source,reason):
+        """Counts a feature from source skipped for reason in skipped.
+        """
+        key = (source,reason)
+        with self._skippedLock:
+            self.skipped[key] = self.skipped.get(key,0) + 1
+
+    def summary(self):
+        """Returns a description of the features skipped by the last write,
+        points with no symbol code and lines and polygons with too few
+        vertices, or an empty string if none were skipped.
+        """
+        lines = []
+        for (source,reason), count in sorted(self.skipped.items(),key=str):
+            lines.append("Skipped {0} features in {1}: {2}".format(count,source,reason))
+        return "\n".join(lines)
+
+    def _symbolTable(self,symbols):
+        """Returns the nvgSymbols.SymbolTable for the symbols argument of
+        write.
+        """
+        if symbols is None:
+            return nvgSymbols.SymbolTable()
+        elif not isinstance(symbols,nvgSymbols.SymbolTable):
+            return nvgSymbols.SymbolTable.load(symbols)
+        return symbols
+
+    def _output(self,elements,outFile,prettyXML,append):
+        """Writes the elements to a new outFile or appends them to the
+        existing file.
+        """
+        if append and os.path.isfile(outFile) and os.path.getsize(outFile):
+            self._appendXML(elements,outFile,prettyXML)
+        else:
+            with open(outFile,'wb') as nvgFile:
+                self._streamXML(elements,nvgFile,prettyXML)
+
+        return
@@ -0,0 +1,304 @@
+#-------------------------------------------------------------------------------
+# Name:        nvgtools.py
+# Purpose:     Command line batch processing of NVG files.
+#
+# Author:      Dave Barrett
+#
+# Created:     19/10/2026
+# Copyright:   (c) Dave 2026
+# Licence:     <your licence>
+#-------------------------------------------------------------------------------
+
+"""
+This module provides a command line interface to the NVG tools for scripted
+batch jobs, for example:
+
+    python -m nvgtools convert "incoming/*.nvg" --format nvg --version 2.0.0 -o out --jobs 4
+    python -m nvgtools convert "incoming/*.nvg" --format mbtiles --max-zoom 12 -o tiles
+    python -m nvgtools scan "incoming/*.nvg"
+
+Files are processed by a pool of worker processes and the time taken and
+number of features for each file are printed as each one finishes.
+
+The nvg format and the scan command do not require arcpy. The other formats
+read the files with nvgReader and can only be used where arcpy is installed.
+
+Exit codes:
+    0 - every file was processed
+    1 - one or more files failed
+    2 - invalid arguments, no input files matched or the format requires
+        arcpy and it is not installed
+"""
+import os
+import sys
+import glob
+import json
+import time
+import argparse
+import traceback
+from multiprocessing import Pool
+
+from nvgIO import namespaces
+
+# output formats and the file extension written for each
+formats = {'nvg': '.nvg',
+           'geojson': '.geojson',
+           'mbtiles': '.mbtiles',
+           'mvt': '',
+           'parquet': '.parquet',
+           'npz': '.npz'}
+
+# formats read with nvgReader, which requires arcpy
+_readerFormats = ['geojson','mbtiles','mvt','parquet','npz']
+
+# geometry types of the lists returned by nvgReader.Reader.read
+_geometryTypes = ['Point','LineString','Polygon','MultiPoint']
+
+EXIT_OK = 0
+EXIT_FAILED = 1
+EXIT_USAGE = 2
+
+
+def _expand(patterns):
+    """Returns the sorted unique list of files matching the glob patterns.
+    """
+    files = set()
+    for pattern in patterns:
+        matches = glob.glob(pattern)
+        if not matches and os.path.isfile(pattern):
+            matches = [pattern]
+        files.update(os.path.abspath(match) for match in matches if os.path.isfile(match))
+    return sorted(files)
+
+def _outputName(nvgFile,outDir,extension):
+    """Returns the output path for the input file in outDir.
+    """
+    name = os.path.basename(nvgFile)
+    for suffix in ('.gz','.bz2','.zip'):
+        if name.lower().endswith(suffix):
+            name = name[:-len(suffix)]
+    root = os.path.splitext(name)[0]
+    return os.path.join(outDir,root + extension)
+
+def _outputPath(nvgFile,outDir,outFormat):
+    """Returns the output path for the input file converted to outFormat,
+    a zip archive converted to nvg is written to a folder of the same name.
+    """
+    if outFormat == 'nvg' and nvgFile.lower().endswith('.zip'):
+        return os.path.join(outDir,os.path.splitext(os.path.basename(nvgFile))[0])
+    return _outputName(nvgFile,outDir,formats[outFormat])
+
+def _writeGeoJSON(nvgFile,outFile,tolerant=False):
+    """Reads nvgFile with nvgReader and writes the features to outFile as a
+    GeoJSON feature collection. Returns the number of features written.
+
+    In tolerant mode features that cannot be read are skipped and the reader
+    summary is written to stderr.
+    """
+    import nvgReader
+
+    reader = nvgReader.Reader(nvgFile,tolerant=tolerant)
+    results = reader.read()
+    if reader.quarantine:
+        sys.stderr.write(reader.summary() + '\n')
+    count = 0
+    with open(outFile,'w') as out:
+        out.write('{"type": "FeatureCollection", "features": [\n')
+        for geometryType, features in zip(_geometryTypes,results):
+            for feature in features:
+                geometry = feature[0].__geo_interface__
+                properties = dict(zip(nvgReader.attributeNames,feature[1:]))
+                if count:
+                    out.write(',\n')
+                out.write(json.dumps({'type': 'Feature',
+                                      'geometry': geometry,
+                                      'properties': properties}))
+                count += 1
+        out.write('\n]}\n')
+
+    return count
+
+def _writeTiles(nvgFile,output,minZoom,maxZoom,tolerant=False):
+    """Reads nvgFile with nvgReader and writes the features to output as a
+    vector tile pyramid, an MBTiles file or a folder of z/x/y tiles. Returns
+    the number of features written.
+    """
+    import nvgReader
+    import nvgTiles
+
+    reader = nvgReader.Reader(nvgFile,tolerant=tolerant)
+    results = reader.read()
+    if reader.quarantine:
+        sys.stderr.write(reader.summary() + '\n')
+    features = nvgTiles.readerFeatures(results,nvgReader.attributeNames)
+    # files are already processed in parallel, worker processes cannot start
+    # their own pool
+    nvgTiles.writeTiles(features,output,minZoom,maxZoom,workers=1)
+
+    return len(features)
+
+def _writeColumns(nvgFile,output,tolerant=False):
+    """Reads nvgFile with nvgReader and writes the features to output as a
+    columnar snapshot, Parquet or a numpy archive. Returns the number of
+    features written.
+    """
+    import nvgReader
+    import nvgColumns
+
+    reader = nvgReader.Reader(nvgFile,tolerant=tolerant)
+    results = reader.read()
+    if reader.quarantine:
+        sys.stderr.write(reader.summary() + '\n')
+    data = nvgColumns.columns(results,nvgReader.attributeNames,reader.targetCrs)
+    nvgColumns.write(data,output)
+
+    return len(data['layer'])
+
+def _convertFile(args):
+    """Converts a single file, run in a worker process.
+
+    Returns (nvgFile, output, count, seconds, error).
+    """
+    nvgFile, outDir, outFormat, version, tolerant, minZoom, maxZoom = args
+    start = time.time()
+    output = _outputPath(nvgFile,outDir,outFormat)
+    try:
+        if outFormat == 'nvg':
+            import nvgConvert
+            results = nvgConvert.convert(nvgFile,output,version)
+            count = sum(result['features'] for result in results)
+        elif outFormat == 'geojson':
+            count = _writeGeoJSON(nvgFile,output,tolerant)
+        elif outFormat in ('mbtiles','mvt'):
+            count = _writeTiles(nvgFile,output,minZoom,maxZoom,tolerant)
+        elif outFormat in ('parquet','npz'):
+            count = _writeColumns(nvgFile,output,tolerant)
+    except Exception:
+        return nvgFile, output, 0, time.time() - start, traceback.format_exc()
+
+    return nvgFile, output, count, time.time() - start, None
+
+def _scanFile(args):
+    """Summarises a single file with nvgScanner, run in a worker process.
+
+    Returns (nvgFile, summary, count, seconds, error).
+    """
+    nvgFile = args[0]
+    start = time.time()
+    try:
+        import nvgScanner
+        with nvgScanner.Scanner(nvgFile) as scanner:
+            summary = scanner.summary()
+    except Exception:
+        return nvgFile, None, 0, time.time() - start, traceback.format_exc()
+
+    return nvgFile, summary, summary['total'], time.time() - start, None
+
+def _hasArcpy():
+    """Returns True if arcpy can be imported.
+    """
+    try:
+        import arcpy
+    except ImportError:
+        return False
+    return True
+
+def _run(func,tasks,jobs,out=sys.stdout):
+    """Runs func over tasks with jobs worker processes, printing a line for
+    each file as it finishes. Returns the exit code.
+    """
+    failed = 0
+    total = 0
+    start = time.time()
+
+    if jobs > 1 and len(tasks) > 1:
+        pool = Pool(min(jobs,len(tasks)))
+        results = pool.imap_unordered(func,tasks)
+    else:
+        pool = None
+        results = (func(task) for task in tasks)
+
+    try:
+        for nvgFile, output, count, seconds, error in results:
+            if error:
+                failed += 1
+                out.write("FAILED {0} ({1:.2f}s)\n{2}\n".format(nvgFile,seconds,error.rstrip()))
+            else:
+                total += count
+                detail = output if isinstance(output,str) else json.dumps(output,sort_keys=True)
+                out.write("OK {0} {1} features {2:.2f}s -> {3}\n".format(nvgFile,count,seconds,detail))
+            out.flush()
+    finally:
+        if pool is not None:
+            pool.close()
+            pool.join()
+
+    out.write("{0} files, {1} failed, {2} features in {3:.2f}s\n".format(
+              len(tasks),failed,total,time.time() - start))
+
+    return EXIT_FAILED if failed else EXIT_OK
+
+def main(argv=None):
+    """Runs the command line interface and returns the exit code.
+    """
+    parser = argparse.ArgumentParser(prog='nvgtools',description="Batch processing of NVG files.")
+    commands = parser.add_subparsers(dest='command')
+
+    convert = commands.add_parser('convert',help="convert NVG files to another format or version")
+    convert.add_argument('inputs',nargs='+',help="input files or glob patterns")
+    convert.add_argument('-f','--format',choices=sorted(formats),default='nvg',
+                         help="output format (default nvg)")
+    convert.add_argument('-o','--output',required=True,help="output folder")
+    convert.add_argument('--version',default='1.5.0',dest='nvgVersion',
+                         choices=sorted(namespaces),
+                         help="NVG version written by the nvg format (default 1.5.0)")
+    convert.add_argument('-j','--jobs',type=int,default=1,help="number of worker processes")
+    convert.add_argument('--tolerant',action='store_true',
+                         help="skip features that cannot be read (all formats except nvg)")
+    convert.add_argument('--min-zoom',type=int,default=0,dest='minZoom',
+                         help="lowest zoom level of the tile formats (default 0)")
+    convert.add_argument('--max-zoom',type=int,default=14,dest='maxZoom',
+                         help="highest zoom level of the tile formats (default 14)")
+
+    scan = commands.add_parser('scan',help="summarise NVG files with the byte level scanner")
+    scan.add_argument('inputs',nargs='+',help="input files or glob patterns")
+    scan.add_argument('-j','--jobs',type=int,default=1,help="number of worker processes")
+
+    try:
+        args = parser.parse_args(argv)
+    except SystemExit as e:
+        return e.code
+
+    if not args.command:
+        parser.print_usage(sys.stderr)
+        return EXIT_USAGE
+
+    files = _expand(args.inputs)
+    if not files:
+        sys.stderr.write("nvgtools: no input files matched\n")
+        return EXIT_USAGE
+
+    if args.command == 'convert':
+        if args.format in _readerFormats and not _hasArcpy():
+            sys.stderr.write("nvgtools: the {0} format requires arcpy, only the nvg format "
+                             "can be converted without it\n".format(args.format))
+            return EXIT_USAGE
+        # an output that is also an input would be overwritten while it is read
+        inputs = set(os.path.normcase(nvgFile) for nvgFile in files)
+        for nvgFile in files:
+            output = os.path.abspath(_outputPath(nvgFile,args.output,args.format))
+            if os.path.normcase(output) in inputs:
+                sys.stderr.write("nvgtools: the output {0} would overwrite an input file, "
+                                 "choose another output folder\n".format(output))
+                return EXIT_USAGE
+        if not os.path.isdir(args.output):
+            os.makedirs(args.output)
+        tasks = [(nvgFile,args.output,args.format,args.nvgVersion,args.tolerant,
+                  args.minZoom,args.maxZoom) for nvgFile in files]
+        return _run(_convertFile,tasks,args.jobs)
+    elif args.command == 'scan':
+        return _run(_scanFile,[(nvgFile,) for nvgFile in files],args.jobs)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,91 @@
+#-------------------------------------------------------------------------------
+# Name:        test_columns.py
+# Purpose:     Tests the columnar snapshots of nvgColumns.
+#
+# Author:      Dave Barrett
+#
+# Created:     19/10/2026
+# Copyright:   (c) Dave 2026
+# Licence:     <your licence>
+#-------------------------------------------------------------------------------
+
+"""
+Builds columns from rows in the form returned by nvgReader, with GeoJSON
+geometry, and checks snapshots load back unchanged. The parquet tests are
+skipped where pyarrow is not installed.
+"""
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+
+import numpy
+
+sys.path.insert(0,os.path.join(os.path.dirname(os.path.abspath(__file__)),os.pardir))
+
+import nvgColumns
+
+_names = ['label','speed']
+
+_results = [
+    [[{'type': 'Point', 'coordinates': [1.0, 2.0]}, 'hq', '5']],
+    [[{'type': 'MultiLineString', 'coordinates': [[[0, 0], [1, 1]], [[2, 2], [3, 3], [4, 4]]]}, None, 'fast']],
+    [[{'type': 'Polygon', 'coordinates': [[[0, 0], [1, 0], [1, 1], [0, 0]],
+                                          [[0.2, 0.2], [0.3, 0.2], [0.3, 0.3], [0.2, 0.2]]]}, 'area', None]],
+    [[{'type': 'MultiPoint', 'coordinates': [[7, 7], [8, 8]]}, 'obs', 1.5]],
+]
+
+
+class ColumnsTest(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.data = nvgColumns.columns(_results,_names)
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def test_columns(self):
+        data = self.data
+        self.assertEqual(data['layer'].tolist(),[0,1,2,3])
+        self.assertEqual(data['geometry_offsets'].tolist(),[0,1,3,4,6])
+        self.assertEqual(data['part_offsets'].tolist(),[0,1,2,3,5,6,7])
+        self.assertEqual(data['ring_offsets'].tolist(),[0,1,3,6,10,14,15,16])
+        self.assertEqual(data['label'].tolist(),[u'hq',u'',u'area',u'obs'])
+        self.assertEqual(numpy.isnan(data['speed']).tolist(),[False,True,True,False])
+        for index, rows in enumerate(_results):
+            self.assertEqual(nvgColumns.geometry(data,index),rows[0][0])
+
+    def _roundTrip(self,extension):
+        path = nvgColumns.write(self.data,os.path.join(self.folder,'snapshot' + extension))
+        loaded = nvgColumns.load(path)
+        self.assertEqual(sorted(loaded),sorted(self.data))
+        self.assertEqual(loaded['crs'],4326)
+        for name in self.data:
+            if name != 'crs':
+                numpy.testing.assert_array_equal(loaded[name],self.data[name])
+        self.assertFalse(loaded['coords'].flags.writeable)
+        return loaded
+
+    def test_npz(self):
+        loaded = self._roundTrip('.npz')
+        # stored uncompressed and memory mapped
+        self.assertIsInstance(loaded['coords'],numpy.memmap)
+        self.assertIsInstance(loaded['ring_offsets'],numpy.memmap)
+
+    @unittest.skipIf(nvgColumns.pyarrow is None,"parquet snapshots require pyarrow")
+    def test_parquet(self):
+        self._roundTrip('.parquet')
+
+    def test_empty(self):
+        self.data = nvgColumns.columns([[],[],[],[]],_names)
+        extensions = ['.npz'] if nvgColumns.pyarrow is None else ['.npz','.parquet']
+        for extension in extensions:
+            loaded = nvgColumns.load(nvgColumns.write(self.data,os.path.join(self.folder,'empty' + extension)))
+            self.assertEqual(loaded['coords'].shape,(0,2))
+            self.assertEqual(loaded['geometry_offsets'].tolist(),[0])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,121 @@
+#-------------------------------------------------------------------------------
+# Name:        test_convert.py
+# Purpose:     Tests converting NVG documents between versions.
+#
+# Author:      Dave Barrett
+#
+# Created:     19/10/2026
+# Copyright:   (c) Dave 2026
+# Licence:     <your licence>
+#-------------------------------------------------------------------------------
+
+"""
+Converts small NVG documents with nvgConvert and checks the namespace,
+version and renamed attributes, round trips between versions and the handling
+of compressed, zipped and failed conversions.
+"""
+import os
+import sys
+import gzip
+import shutil
+import zipfile
+import tempfile
+import unittest
+
+sys.path.insert(0,os.path.join(os.path.dirname(os.path.abspath(__file__)),os.pardir))
+
+import nvgConvert
+from nvgIO import namespaces
+
+_document = (u'<?xml version="1.0" encoding="UTF-8"?>\n'
+             u'<nvg xmlns="http://tide.act.nato.int/schemas/2009/10/nvg" version="1.5.0">\n'
+             u'\t<!-- overlay -->\n'
+             u'\t<point x="1.5" y="2.5" symbol="app6a:SFGPU----------" label="a &amp; &quot;b&quot;" modifiers="T:x"/>\n'
+             u'\t<g label="group">\n'
+             u'\t\t<polyline points="0,0 1,1" label="\u00e9t\u00e9"/>\n'
+             u'\t\t<circle cx="1" cy="1" r="10"/>\n'
+             u'\t</g>\n'
+             u'</nvg>\n').encode('utf-8')
+
+
+class ConvertTest(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.nvgFile = self._path('overlay.nvg')
+        with open(self.nvgFile,'wb') as f:
+            f.write(_document)
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def _path(self,name):
+        return os.path.join(self.folder,name)
+
+    def _read(self,path):
+        with open(path,'rb') as f:
+            return f.read()
+
+    def test_round_trip(self):
+        result = nvgConvert.convert(self.nvgFile,self._path('v2.nvg'),'2.0.0')
+        self.assertEqual(result[0]['version'],'1.5.0')
+        self.assertEqual(result[0]['features'],3)
+        converted = self._read(self._path('v2.nvg'))
+        self.assertIn(namespaces['2.0.0'].encode('ascii'),converted)
+        self.assertIn(b'version="2.0.0"',converted)
+
+        result = nvgConvert.convert(self._path('v2.nvg'),self._path('v15.nvg'),'1.5.0')
+        self.assertEqual(result[0]['version'],'2.0.0')
+        self.assertEqual(self._read(self._path('v15.nvg')),_document)
+
+    def test_modifiers_renamed(self):
+        nvgConvert.convert(self.nvgFile,self._path('v14.nvg'),'1.4.0')
+        converted = self._read(self._path('v14.nvg'))
+        self.assertIn(b' modifier="T:x"',converted)
+        self.assertIn(b'version="1.4.0"',converted)
+
+        nvgConvert.convert(self._path('v14.nvg'),self._path('v15.nvg'),'1.5.0')
+        self.assertEqual(self._read(self._path('v15.nvg')),_document)
+
+    def test_later_elements_dropped(self):
+        document = _document.replace(b'\t</g>',b'\t\t<rect x="0" y="0" width="1" height="1"><point x="0" y="0"/></rect>\n\t</g>')
+        with open(self.nvgFile,'wb') as f:
+            f.write(document)
+        result = nvgConvert.convert(self.nvgFile,self._path('v15.nvg'),'1.5.0')
+        self.assertEqual(result[0]['skipped'],{'rect': 1})
+        self.assertEqual(result[0]['features'],3)
+        self.assertNotIn(b'rect',self._read(self._path('v15.nvg')))
+
+    def test_gzip_output(self):
+        nvgConvert.convert(self.nvgFile,self._path('v15.nvg.gz'),'1.5.0')
+        with gzip.open(self._path('v15.nvg.gz'),'rb') as f:
+            self.assertEqual(f.read(),_document)
+        # the temporary file has been moved over the target
+        self.assertEqual(sorted(os.listdir(self.folder)),['overlay.nvg','v15.nvg.gz'])
+
+    def test_zip_archive(self):
+        archive = self._path('overlays.zip')
+        with zipfile.ZipFile(archive,'w') as z:
+            z.writestr('one.nvg',_document)
+            z.writestr('nested/two.nvg',_document)
+        results = nvgConvert.convert(archive,self._path('out'),'2.0.0')
+        self.assertEqual(sorted(os.listdir(self._path('out'))),['one.nvg','two.nvg'])
+        self.assertEqual([os.path.relpath(result['source'],archive) for result in results],
+                         ['one.nvg',os.path.join('nested','two.nvg')])
+
+    def test_failure_keeps_target(self):
+        target = self._path('v2.nvg')
+        with open(target,'wb') as f:
+            f.write(b'previous')
+        with open(self.nvgFile,'wb') as f:
+            f.write(_document[:-20])
+        self.assertRaises(Exception,nvgConvert.convert,self.nvgFile,target,'2.0.0')
+        self.assertEqual(self._read(target),b'previous')
+        self.assertEqual(sorted(os.listdir(self.folder)),['overlay.nvg','v2.nvg'])
+
+    def test_unsupported_version(self):
+        self.assertRaises(ValueError,nvgConvert.Converter,'3.0.0')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,80 @@
+#-------------------------------------------------------------------------------
+# Name:        test_dedupe.py
+# Purpose:     Tests duplicate detection with nvgDedupe.
+#
+# Author:      Dave Barrett
+#
+# Created:     19/10/2026
+# Copyright:   (c) Dave 2026
+# Licence:     <your licence>
+#-------------------------------------------------------------------------------
+
+"""
+Fingerprints minidom elements with nvgDedupe.Deduplicator and checks which
+copies of a feature are treated as duplicates.
+"""
+import os
+import sys
+import binascii
+import unittest
+import xml.dom.minidom
+
+sys.path.insert(0,os.path.join(os.path.dirname(os.path.abspath(__file__)),os.pardir))
+
+import nvgDedupe
+
+_namespace = 'http://tide.act.nato.int/schemas/2009/10/nvg'
+
+
+def _element(markup):
+    document = xml.dom.minidom.parseString('<nvg xmlns="{0}">{1}</nvg>'.format(_namespace,markup))
+    return document.documentElement.firstChild
+
+
+class DeduplicatorTest(unittest.TestCase):
+
+    def setUp(self):
+        self.dedupe = nvgDedupe.Deduplicator()
+
+    def test_duplicates(self):
+        first = self.dedupe.add(_element('<point x="1.0" y="2" label="hq" uri="a"/>'),'a.nvg')
+        self.assertEqual(len(first),8)
+        # precision, negative zero, uri and style do not matter
+        self.assertEqual(self.dedupe.add(_element('<point x="1.0000001" y="2.0" label=" hq" '
+                                                  'uri="b" style="x"/>'),'b.nvg'),None)
+        self.assertNotEqual(self.dedupe.add(_element('<polyline points="0,-0 1,1"/>'),'a.nvg'),None)
+        self.assertEqual(self.dedupe.add(_element('<polyline points="0,0  1.0,1"/>'),'c.nvg'),None)
+        self.assertEqual(self.dedupe.duplicates,2)
+        self.assertEqual(len(self.dedupe),2)
+        self.assertEqual(self.dedupe.sourcesOf(first),['a.nvg','b.nvg'])
+        self.assertEqual(self.dedupe.sourcesOf(binascii.hexlify(first).decode('ascii')),['a.nvg','b.nvg'])
+
+    def test_different(self):
+        elements = ['<point x="1" y="2" label="hq"/>',
+                    '<point x="1" y="2" label="hq2"/>',
+                    '<point x="1" y="2.001" label="hq"/>',
+                    '<text x="1" y="2" label="hq"><content>one</content></text>',
+                    '<text x="1" y="2" label="hq"><content>two</content></text>',
+                    '<circle cx="1" cy="2" r="5"/>',
+                    '<circle cx="1" cy="2" r="6"/>']
+        for markup in elements:
+            self.assertNotEqual(self.dedupe.add(_element(markup),'a.nvg'),None)
+        self.assertEqual(self.dedupe.duplicates,0)
+
+    def test_keys_and_precision(self):
+        dedupe = nvgDedupe.Deduplicator(keys=[],precision=2)
+        dedupe.add(_element('<point x="1.001" y="2" label="hq"/>'),'a.nvg')
+        self.assertEqual(dedupe.add(_element('<point x="1.002" y="2" label="other"/>'),'b.nvg'),None)
+
+    def test_max_items(self):
+        dedupe = nvgDedupe.Deduplicator(maxItems=2)
+        for x in range(3):
+            dedupe.add(_element('<point x="{0}" y="0"/>'.format(x)),'a.nvg')
+        self.assertEqual(len(dedupe),2)
+        # the oldest fingerprint was forgotten so the feature is kept again
+        self.assertNotEqual(dedupe.add(_element('<point x="0" y="0"/>'),'b.nvg'),None)
+        self.assertEqual(dedupe.add(_element('<point x="2" y="0"/>'),'b.nvg'),None)
+
+
+if __name__ == '__main__':
+    unittest.main()
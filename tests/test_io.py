@@ -0,0 +1,93 @@
+#-------------------------------------------------------------------------------
+# Name:        test_io.py
+# Purpose:     Tests opening NVG documents with nvgIO.
+#
+# Author:      Dave Barrett
+#
+# Created:     19/10/2026
+# Copyright:   (c) Dave 2026
+# Licence:     <your licence>
+#-------------------------------------------------------------------------------
+
+"""
+Tests nvgIO with plain, compressed and zipped files and open file objects.
+"""
+import io
+import os
+import sys
+import bz2
+import gzip
+import shutil
+import zipfile
+import tempfile
+import unittest
+
+sys.path.insert(0,os.path.join(os.path.dirname(os.path.abspath(__file__)),os.pardir))
+
+import nvgIO
+
+_document = (b'<?xml version="1.0" encoding="UTF-8"?>\n'
+             b'<nvg xmlns="http://tide.act.nato.int/schemas/2009/10/nvg" version="1.5.0">\n'
+             b'\t<point x="1.5" y="2.5" symbol="app6a:SFGPU----------"/>\n'
+             b'</nvg>\n')
+
+
+class _Unseekable(io.RawIOBase):
+    """Stream that can only be read forwards, like a socket or pipe.
+    """
+    def __init__(self,data):
+        self.data = io.BytesIO(data)
+
+    def readable(self):
+        return True
+
+    def readinto(self,buffer):
+        return self.data.readinto(buffer)
+
+
+class OpenNVGTest(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def _path(self,name):
+        return os.path.join(self.folder,name)
+
+    def _documents(self,nvgFile):
+        return [(name,stream.read()) for name, stream in nvgIO.openNVG(nvgFile)]
+
+    def test_compressed(self):
+        with gzip.open(self._path('a.nvg.gz'),'wb') as f:
+            f.write(_document)
+        with bz2.BZ2File(self._path('a.nvg.bz2'),'wb') as f:
+            f.write(_document)
+        for name in ('a.nvg.gz','a.nvg.bz2'):
+            self.assertEqual(self._documents(self._path(name)),[(self._path(name),_document)])
+
+    def test_zip_members(self):
+        with zipfile.ZipFile(self._path('a.zip'),'w') as archive:
+            archive.writestr('one.nvg',_document)
+            archive.writestr('readme.txt',b'not an nvg')
+            archive.writestr('two.NVG',_document)
+        names = [name for name, data in self._documents(self._path('a.zip'))]
+        self.assertEqual(names,[self._path('a.zip') + '/one.nvg',self._path('a.zip') + '/two.NVG'])
+
+    def test_versions_rewind_file_object(self):
+        f = io.BytesIO(_document)
+        self.assertEqual(nvgIO.documentVersions(f),[(None,'1.5.0')])
+        # the document can still be read in full
+        self.assertEqual(f.read(),_document)
+
+    def test_seekable(self):
+        f = io.BytesIO(_document)
+        self.assertIs(nvgIO.seekable(f),f)
+        copy = nvgIO.seekable(io.BufferedReader(_Unseekable(_document)))
+        self.assertEqual(nvgIO.documentVersions(copy),[(None,'1.5.0')])
+        self.assertEqual(copy.read(),_document)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,87 @@
+#-------------------------------------------------------------------------------
+# Name:        test_loader.py
+# Purpose:     Tests the loading of NVG features with nvgLoader.
+#
+# Author:      Dave Barrett
+#
+# Created:     19/10/2026
+# Copyright:   (c) Dave 2026
+# Licence:     <your licence>
+#-------------------------------------------------------------------------------
+
+"""
+Loads the batches of a stand in reader into stand in insert cursors to check
+the fields, the values added to each row and the counts returned.
+nvgLoader requires arcpy so the tests are skipped where it is not installed.
+"""
+import os
+import sys
+import datetime
+import unittest
+
+sys.path.insert(0,os.path.join(os.path.dirname(os.path.abspath(__file__)),os.pardir))
+
+try:
+    import nvgLoader
+except ImportError:
+    nvgLoader = None
+
+
+class _Reader(object):
+    """Yields fixed batches as Reader.iterBatches does."""
+    def __init__(self,batches):
+        self.batches = batches
+        self.batchSize = None
+
+    def iterBatches(self,batchSize=1000):
+        self.batchSize = batchSize
+        for fType, rows in self.batches:
+            yield fType, [list(row) for row in rows]
+
+
+class _Cursor(object):
+    def __init__(self):
+        self.rows = []
+
+    def insertRow(self,row):
+        self.rows.append(row)
+
+
+@unittest.skipIf(nvgLoader is None,"nvgLoader requires arcpy")
+class LoaderTest(unittest.TestCase):
+
+    def _cursors(self):
+        return dict((fType,_Cursor()) for fType in nvgLoader.featureTypes)
+
+    def test_fields(self):
+        loader = nvgLoader.Loader('test.gdb')
+        self.assertEqual(loader.cursorFields[0],"SHAPE@")
+        self.assertEqual(loader.extraFields,[])
+
+        loader = nvgLoader.Loader('test.gdb',fingerprint=True,merge=True)
+        self.assertEqual(loader.cursorFields[-3:],["fingerprint","source_file","load_time"])
+        self.assertEqual([field[0] for field in loader.extraFields],["sources","source_file","load_time"])
+        # the merge fields are not part of the rows returned by the reader
+        self.assertEqual(loader.fields,loader.cursorFields[:-2])
+
+    def test_load(self):
+        loader = nvgLoader.Loader('test.gdb',batchSize=2)
+        reader = _Reader([('point',[['p1'],['p2']]),('polygon',[['a1']]),('point',[['p3']])])
+        cursors = self._cursors()
+        counts = loader.load(reader,cursors)
+        self.assertEqual(reader.batchSize,2)
+        self.assertEqual(counts,{'point': 3, 'polyline': 0, 'polygon': 1, 'multipoint': 0})
+        self.assertEqual(cursors['point'].rows,[['p1'],['p2'],['p3']])
+        self.assertEqual(cursors['polygon'].rows,[['a1']])
+
+    def test_load_extra(self):
+        loader = nvgLoader.Loader('test.gdb',merge=True)
+        loadTime = datetime.datetime(2026,10,19)
+        cursors = self._cursors()
+        loader.load(_Reader([('polyline',[['l1']])]),cursors,['a.nvg',loadTime])
+        loader.load(_Reader([('polyline',[['l2']])]),cursors,['b.nvg',loadTime])
+        self.assertEqual(cursors['polyline'].rows,[['l1','a.nvg',loadTime],['l2','b.nvg',loadTime]])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,88 @@
+#-------------------------------------------------------------------------------
+# Name:        test_nvgtools.py
+# Purpose:     Tests the exit codes of the nvgtools command line.
+#
+# Author:      Dave Barrett
+#
+# Created:     19/10/2026
+# Copyright:   (c) Dave 2026
+# Licence:     <your licence>
+#-------------------------------------------------------------------------------
+
+"""
+Runs nvgtools.main with the nvg format and the scan command, which do not
+require arcpy, and checks the exit codes and the files written.
+"""
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+
+sys.path.insert(0,os.path.join(os.path.dirname(os.path.abspath(__file__)),os.pardir))
+
+import nvgtools
+
+_document = (b'<?xml version="1.0" encoding="UTF-8"?>\n'
+             b'<nvg xmlns="http://tide.act.nato.int/schemas/2009/10/nvg" version="1.5.0">\n'
+             b'\t<point x="1.5" y="2.5" symbol="app6a:SFGPU----------"/>\n'
+             b'\t<polyline points="0,0 1,1"/>\n'
+             b'</nvg>\n')
+
+
+class MainTest(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.nvgFile = self._write('overlay.nvg',_document)
+        self.output = os.path.join(self.folder,'out')
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def _write(self,name,data):
+        path = os.path.join(self.folder,name)
+        with open(path,'wb') as f:
+            f.write(data)
+        return path
+
+    def _read(self,path):
+        with open(path,'rb') as f:
+            return f.read()
+
+    def test_convert(self):
+        code = nvgtools.main(['convert',self.nvgFile,'--version','2.0.0','-o',self.output])
+        self.assertEqual(code,nvgtools.EXIT_OK)
+        self.assertIn(b'version="2.0.0"',self._read(os.path.join(self.output,'overlay.nvg')))
+
+    def test_failed_file(self):
+        self._write('broken.nvg',_document[:-20])
+        code = nvgtools.main(['convert',os.path.join(self.folder,'*.nvg'),'-o',self.output])
+        self.assertEqual(code,nvgtools.EXIT_FAILED)
+        self.assertEqual(os.listdir(self.output),['overlay.nvg'])
+
+    def test_scan(self):
+        self.assertEqual(nvgtools.main(['scan',self.nvgFile]),nvgtools.EXIT_OK)
+
+    def test_usage(self):
+        self.assertEqual(nvgtools.main([]),nvgtools.EXIT_USAGE)
+        self.assertEqual(nvgtools.main(['scan',os.path.join(self.folder,'*.missing')]),
+                         nvgtools.EXIT_USAGE)
+        self.assertEqual(nvgtools.main(['convert',self.nvgFile,'--version','1.6.0','-o',self.output]),
+                         nvgtools.EXIT_USAGE)
+        self.assertFalse(os.path.exists(self.output))
+
+    def test_output_over_input(self):
+        code = nvgtools.main(['convert',self.nvgFile,'-o',self.folder])
+        self.assertEqual(code,nvgtools.EXIT_USAGE)
+        self.assertEqual(self._read(self.nvgFile),_document)
+
+    @unittest.skipIf(nvgtools._hasArcpy(),"arcpy is installed")
+    def test_format_requires_arcpy(self):
+        code = nvgtools.main(['convert',self.nvgFile,'--format','geojson','-o',self.output])
+        self.assertEqual(code,nvgtools.EXIT_USAGE)
+        self.assertFalse(os.path.exists(self.output))
+
+
+if __name__ == '__main__':
+    unittest.main()
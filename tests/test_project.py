@@ -0,0 +1,81 @@
+#-------------------------------------------------------------------------------
+# Name:        test_project.py
+# Purpose:     Tests coordinate transformation with nvgProject.
+#
+# Author:      Dave Barrett
+#
+# Created:     19/10/2026
+# Copyright:   (c) Dave 2026
+# Licence:     <your licence>
+#-------------------------------------------------------------------------------
+
+"""
+Checks the transformations from WGS84 against known coordinates and that they
+round trip. The same values are expected with and without pyproj.
+"""
+import os
+import sys
+import unittest
+
+import numpy
+
+sys.path.insert(0,os.path.join(os.path.dirname(os.path.abspath(__file__)),os.pardir))
+
+import nvgProject
+
+
+class TransformerTest(unittest.TestCase):
+
+    def _transform(self,source,target,x,y):
+        return nvgProject.Transformer(source,target).transform(x,y)
+
+    def test_utm(self):
+        x, y = self._transform(4326,32631,[3.0,2.0,4.0],[45.0,45.0,45.0])
+        numpy.testing.assert_allclose(x,[500000.0,421184.697,578815.303],atol=1e-3)
+        numpy.testing.assert_allclose(y,[4982950.400,4983436.768,4983436.768],atol=1e-3)
+
+        x, y = self._transform(4326,32731,[3.0],[-45.0])
+        numpy.testing.assert_allclose(x,[500000.0],atol=1e-3)
+        numpy.testing.assert_allclose(y,[10000000.0 - 4982950.400],atol=1e-3)
+
+    def test_mercator(self):
+        x, y = self._transform(4326,3395,[0.0,180.0],[45.0,0.0])
+        numpy.testing.assert_allclose(x,[0.0,20037508.343],atol=1e-3)
+        numpy.testing.assert_allclose(y,[5591295.919,0.0],atol=1e-3)
+
+        x, y = self._transform(4326,3857,[180.0],[85.0511287798066])
+        numpy.testing.assert_allclose(x,[20037508.343],atol=1e-3)
+        numpy.testing.assert_allclose(y,[20037508.343],atol=1e-3)
+
+    def test_round_trip(self):
+        lon = numpy.array([-179.5,-45.0,0.0,12.25,170.0])
+        lat = numpy.array([-80.0,-33.5,0.0,51.5,84.0])
+        for code in (3395,3857):
+            x, y = self._transform(4326,code,lon,lat)
+            lon2, lat2 = self._transform(code,4326,x,y)
+            numpy.testing.assert_allclose(lon2,lon,atol=1e-9)
+            numpy.testing.assert_allclose(lat2,lat,atol=1e-9)
+
+        # world mercator to utm goes through geographic coordinates
+        x, y = self._transform(3395,32631,*self._transform(4326,3395,[2.0],[45.0]))
+        numpy.testing.assert_allclose(x,[421184.697],atol=1e-3)
+        numpy.testing.assert_allclose(y,[4983436.768],atol=1e-3)
+
+    def test_same_system(self):
+        x, y = self._transform(4326,4326,[1,2],[3,4])
+        self.assertEqual((x.dtype,x.tolist(),y.tolist()),(numpy.dtype(float),[1.0,2.0],[3.0,4.0]))
+
+    def test_supported(self):
+        self.assertTrue(nvgProject.supported(4326))
+        self.assertTrue(nvgProject.supported(32760))
+        self.assertFalse(nvgProject.supported(32661))
+        self.assertFalse(nvgProject.supported(27700))
+
+    @unittest.skipIf(nvgProject.pyproj is not None,"pyproj is installed")
+    def test_requires_pyproj(self):
+        self.assertRaises(ValueError,nvgProject.Transformer,32631,4326)
+        self.assertRaises(ValueError,nvgProject.Transformer,4326,27700)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,124 @@
+#-------------------------------------------------------------------------------
+# Name:        test_reader.py
+# Purpose:     Tests reading NVG documents with nvgReader.
+#
+# Author:      Dave Barrett
+#
+# Created:     19/10/2026
+# Copyright:   (c) Dave 2026
+# Licence:     <your licence>
+#-------------------------------------------------------------------------------
+
+"""
+Tests nvgReader.Reader. The reader builds arcpy geometry so the tests are
+skipped where arcpy is not installed.
+"""
+import io
+import os
+import sys
+import shutil
+import zipfile
+import tempfile
+import unittest
+
+sys.path.insert(0,os.path.join(os.path.dirname(os.path.abspath(__file__)),os.pardir))
+
+try:
+    import nvgReader
+except ImportError:
+    nvgReader = None
+
+_document = (b'<?xml version="1.0" encoding="UTF-8"?>\n'
+             b'<nvg xmlns="http://tide.act.nato.int/schemas/2008/10/nvg" version="1.4.0">\n'
+             b'\t<point x="1" y="2" symbol="app6a:SFGPU----------" label="a"/>\n'
+             b'\t<polyline points="0,0 1,1 2,0" label="b"/>\n'
+             b'\t<point x="3" y="4" symbol="app6a:SFGPU----------" label="c"/>\n'
+             b'\t<polygon points="0,0 1,0 1,1 0,0" label="d"/>\n'
+             b'</nvg>\n')
+
+
+def _labels(results):
+    return [[row[3] for row in rows] for rows in results]
+
+
+class _FailingDedupe(object):
+    def add(self,element,source):
+        raise KeyError('fingerprint')
+
+
+@unittest.skipIf(nvgReader is None,"nvgReader requires arcpy")
+class ReaderTest(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.nvgFile = os.path.join(self.folder,'a.nvg')
+        with open(self.nvgFile,'wb') as f:
+            f.write(_document)
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def test_read(self):
+        reader = nvgReader.Reader(self.nvgFile)
+        self.assertEqual(reader.version,'1.4.0')
+        self.assertEqual(_labels(reader.read()),[['a','c'],['b'],['d'],[]])
+
+    def test_document_order(self):
+        # features are returned in document order, not grouped by element
+        with open(self.nvgFile,'wb') as f:
+            f.write(_document.replace(b'\t<point x="1"',b'\t<text x="0" y="0" label="t"/>\n\t<point x="1"')
+                             .replace(b'\t<polygon',b'\t<circle cx="1" cy="1" r="100" label="e"/>\n\t<polygon'))
+        results = nvgReader.Reader(self.nvgFile).read()
+        self.assertEqual(_labels(results),[['t','a','c'],['b'],['e','d'],[]])
+
+    def _writeBroken(self):
+        with open(self.nvgFile,'wb') as f:
+            f.write(_document.replace(b'points="0,0 1,1 2,0"',b'points="0,0 east,1" uri="u1"'))
+
+    def test_error_location(self):
+        self._writeBroken()
+        reader = nvgReader.Reader(self.nvgFile)
+        with self.assertRaises(nvgReader.ReadError) as context:
+            reader.read()
+        error = context.exception
+        self.assertEqual(error.location,{'source': self.nvgFile,'tag': 'polyline','index': 0,'uri': 'u1'})
+        self.assertTrue(str(error).startswith(self.nvgFile + ': polyline[0] uri=u1: '))
+
+        reader = nvgReader.Reader(self.nvgFile,dedupe=_FailingDedupe())
+        with self.assertRaises(nvgReader.ReadError) as context:
+            reader.read()
+        self.assertEqual(context.exception.location['tag'],'point')
+        self.assertIn("point[0]: KeyError: 'fingerprint'",str(context.exception))
+
+    def test_quarantine_location(self):
+        self._writeBroken()
+        reader = nvgReader.Reader(self.nvgFile,tolerant=True)
+        self.assertEqual(_labels(reader.read()),[['a','c'],[],['d'],[]])
+        self.assertEqual(len(reader.quarantine),1)
+        quarantined = dict(reader.quarantine[0])
+        self.assertTrue(quarantined.pop('error').startswith('ValueError: '))
+        self.assertEqual(quarantined,{'source': self.nvgFile,'tag': 'polyline','index': 0,'uri': 'u1'})
+
+        reader = nvgReader.Reader(self.nvgFile,tolerant=True,dedupe=_FailingDedupe())
+        reader.read()
+        self.assertEqual([(q['tag'],q['index']) for q in reader.quarantine],
+                         [('point',0),('polyline',0),('point',1),('polygon',0)])
+
+    def test_file_object(self):
+        with open(self.nvgFile,'rb') as f:
+            results = nvgReader.Reader(f).read()
+        self.assertEqual(_labels(results),[['a','c'],['b'],['d'],[]])
+        results = nvgReader.Reader(io.BytesIO(_document)).read()
+        self.assertEqual(_labels(results),[['a','c'],['b'],['d'],[]])
+
+    def test_zip_members(self):
+        archive = os.path.join(self.folder,'a.zip')
+        with zipfile.ZipFile(archive,'w') as z:
+            z.writestr('one.nvg',_document)
+            z.writestr('two.nvg',_document)
+        results = nvgReader.Reader(archive).read()
+        self.assertEqual(_labels(results),[['a','c','a','c'],['b','b'],['d','d'],[]])
+
+
+if __name__ == '__main__':
+    unittest.main()
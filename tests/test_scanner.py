@@ -0,0 +1,95 @@
+#-------------------------------------------------------------------------------
+# Name:        test_scanner.py
+# Purpose:     Tests the byte level scanner against the expat fallback.
+#
+# Author:      Dave Barrett
+#
+# Created:     19/10/2026
+# Copyright:   (c) Dave 2026
+# Licence:     <your licence>
+#-------------------------------------------------------------------------------
+
+"""
+Scans small NVG documents with the byte level scanner and with the expat
+parser it falls back to and checks both find the same elements.
+"""
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+
+sys.path.insert(0,os.path.join(os.path.dirname(os.path.abspath(__file__)),os.pardir))
+
+import nvgScanner
+
+_document = u'''<?xml version="1.0" encoding="UTF-8"?>
+<nvg:nvg xmlns:nvg="http://tide.act.nato.int/schemas/2009/10/nvg" version="1.5.0">
+  <nvg:point x="1" y="2" symbol="app6a:SFGPU----------" label="a &amp; b" uri="u1"/>
+  <nvg:g label="group">
+    <nvg:polyline points="0,0 1,1" label="x > y" uri='u2'/>
+    <nvg:polygon points="0,0 1,0 1,1 0,0" label="&#233;t&#xE9;"></nvg:polygon>
+  </nvg:g>
+  <nvg:pointer x="5"/>
+  <nvg:circle cx="1" cy="1" r="10" label="c"/>
+  <nvg:multipoint points="1,1 2,2" uri="u3"/>
+</nvg:nvg>
+'''
+
+
+class ScannerTest(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.nvgFile = self._write('scan.nvg',_document)
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def _write(self,name,text):
+        path = os.path.join(self.folder,name)
+        with open(path,'wb') as f:
+            f.write(text.encode('utf-8'))
+        return path
+
+    def _scan(self,nvgFile,fast=True):
+        with nvgScanner.Scanner(nvgFile) as scanner:
+            if not fast:
+                scanner.fast = False
+            elements = [(offset,tag,scanner.attributes(raw)) for offset, tag, raw in scanner.scan()]
+            return elements, scanner.count(), list(scanner.values('uri'))
+
+    def test_matches_expat(self):
+        fast = self._scan(self.nvgFile)
+        slow = self._scan(self.nvgFile,fast=False)
+        self.assertEqual(fast,slow)
+
+        elements, counts, uris = fast
+        self.assertEqual([tag for offset, tag, attrs in elements],
+                         ['point','polyline','polygon','circle','multipoint'])
+        self.assertEqual(counts['point'],1)
+        self.assertEqual(sum(counts.values()),5)
+        self.assertEqual([attrs.get('label') for offset, tag, attrs in elements],
+                         [u'a & b',u'x > y',u'\xe9t\xe9',u'c',None])
+        self.assertEqual([(tag,uri) for offset, tag, uri in uris],
+                         [('point',u'u1'),('polyline',u'u2'),('multipoint',u'u3')])
+
+    def test_comment_uses_expat(self):
+        text = _document.replace(u'<nvg:g ',u'<!-- <nvg:point x="9" y="9"/> -->\n  <nvg:g ')
+        nvgFile = self._write('comment.nvg',text)
+        with nvgScanner.Scanner(nvgFile) as scanner:
+            self.assertFalse(scanner.fast)
+            summary = scanner.summary()
+        self.assertEqual(summary['version'],'1.5.0')
+        self.assertEqual(summary['total'],5)
+        self.assertEqual(summary['counts'],self._scan(self.nvgFile)[1])
+
+    def test_empty_file(self):
+        nvgFile = self._write('empty.nvg',u'')
+        with nvgScanner.Scanner(nvgFile) as scanner:
+            self.assertEqual(scanner.size,0)
+            self.assertEqual(scanner.version(),None)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,154 @@
+#-------------------------------------------------------------------------------
+# Name:        test_schema.py
+# Purpose:     Tests validating NVG elements with nvgSchema.
+#
+# Author:      Dave Barrett
+#
+# Created:     19/10/2026
+# Copyright:   (c) Dave 2026
+# Licence:     <your licence>
+#-------------------------------------------------------------------------------
+
+"""
+Compiles a small schema in the NVG 1.5.0 namespace, with an included file of
+simple types, and validates minidom elements against it.
+"""
+import os
+import sys
+import shutil
+import tempfile
+import unittest
+import xml.dom.minidom
+
+sys.path.insert(0,os.path.join(os.path.dirname(os.path.abspath(__file__)),os.pardir))
+
+import nvgSchema
+from nvgIO import namespaces
+
+_namespace = namespaces['1.5.0']
+
+_types = '''<?xml version="1.0" encoding="UTF-8"?>
+<xs:schema xmlns:xs="http://www.w3.org/2001/XMLSchema">
+  <xs:simpleType name="symbolType">
+    <xs:restriction base="xs:string">
+      <xs:pattern value="(app6a|2525b):[A-Z*-]{15}"/>
+    </xs:restriction>
+  </xs:simpleType>
+  <xs:simpleType name="coordinates">
+    <xs:list itemType="xs:string"/>
+  </xs:simpleType>
+  <xs:simpleType name="heading">
+    <xs:union memberTypes="xs:double">
+      <xs:simpleType>
+        <xs:restriction base="xs:string">
+          <xs:enumeration value="unknown"/>
+        </xs:restriction>
+      </xs:simpleType>
+    </xs:union>
+  </xs:simpleType>
+</xs:schema>
+'''
+
+_schema = '''<?xml version="1.0" encoding="UTF-8"?>
+<xs:schema xmlns:xs="http://www.w3.org/2001/XMLSchema" targetNamespace="{0}">
+  <xs:include schemaLocation="types.xsd"/>
+  <xs:attributeGroup name="common">
+    <xs:attribute name="label" type="xs:string"/>
+    <xs:attribute name="uri" type="xs:anyURI"/>
+  </xs:attributeGroup>
+  <xs:complexType name="feature">
+    <xs:attributeGroup ref="common"/>
+    <xs:attribute name="course" type="heading"/>
+  </xs:complexType>
+  <xs:complexType name="pointType">
+    <xs:complexContent>
+      <xs:extension base="feature">
+        <xs:attribute name="x" type="xs:double" use="required"/>
+        <xs:attribute name="y" type="xs:double" use="required"/>
+        <xs:attribute name="symbol" type="symbolType"/>
+        <xs:attribute name="size">
+          <xs:simpleType>
+            <xs:restriction base="xs:integer">
+              <xs:minInclusive value="1"/>
+              <xs:maxInclusive value="10"/>
+            </xs:restriction>
+          </xs:simpleType>
+        </xs:attribute>
+      </xs:extension>
+    </xs:complexContent>
+  </xs:complexType>
+  <xs:complexType name="polylineType">
+    <xs:complexContent>
+      <xs:restriction base="feature">
+        <xs:attribute name="course" use="prohibited"/>
+        <xs:attribute name="points" type="coordinates" use="required"/>
+      </xs:restriction>
+    </xs:complexContent>
+  </xs:complexType>
+  <xs:element name="point" type="pointType"/>
+  <xs:element name="polyline" type="polylineType"/>
+  <xs:element name="g">
+    <xs:complexType>
+      <xs:anyAttribute processContents="lax"/>
+    </xs:complexType>
+  </xs:element>
+</xs:schema>
+'''
+
+
+class SchemaTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.folder = tempfile.mkdtemp()
+        for name, text in (('types.xsd',_types),('nvg.xsd',_schema.format(_namespace))):
+            with open(os.path.join(cls.folder,name),'w') as f:
+                f.write(text)
+        cls.schema = nvgSchema.Schema(os.path.join(cls.folder,'nvg.xsd'))
+
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.folder)
+
+    def _element(self,markup):
+        document = xml.dom.minidom.parseString('<nvg xmlns="{0}">{1}</nvg>'.format(_namespace,markup))
+        return document.documentElement.firstChild
+
+    def _errors(self,markup):
+        return self.schema.errors(self._element(markup))
+
+    def test_versions(self):
+        self.assertEqual(self.schema.versions,['1.5.0'])
+
+    def test_valid(self):
+        self.assertEqual(self._errors('<point x="1" y="-2.5" symbol="app6a:SFGPU----------" '
+                                      'label="hq" course="unknown" size="3"/>'),[])
+        self.assertEqual(self._errors('<polyline points="0,0 1,1" label="route"/>'),[])
+        self.assertEqual(self._errors('<g anything="at all"/>'),[])
+
+    def test_invalid(self):
+        self.assertEqual(self._errors('<point y="2"/>'),["missing required attribute 'x'"])
+        self.assertEqual(self._errors('<point x="east" y="2"/>'),["invalid value for attribute 'x': 'east'"])
+        self.assertEqual(self._errors('<point x="1" y="2" symbol="SFGPU"/>'),
+                         ["invalid value for attribute 'symbol': 'SFGPU'"])
+        self.assertEqual(self._errors('<point x="1" y="2" size="11"/>'),
+                         ["invalid value for attribute 'size': '11'"])
+        self.assertEqual(self._errors('<point x="1" y="2" course="north"/>'),
+                         ["invalid value for attribute 'course': 'north'"])
+        self.assertEqual(self._errors('<polyline points="0,0" course="1"/>'),
+                         ["attribute 'course' is not allowed"])
+        self.assertEqual(self._errors('<arc cx="1"/>'),["element 'arc' is not declared in the schema"])
+
+    def test_validate(self):
+        element = self._element('<point x="1"/>')
+        with self.assertRaises(nvgSchema.ValidationError) as context:
+            self.schema.validate(element,location='overlay.nvg point 3')
+        self.assertEqual(str(context.exception),"overlay.nvg point 3: missing required attribute 'y'")
+        self.schema.validate(self._element('<point x="1" y="2"/>'))
+
+    def test_no_schema(self):
+        self.assertRaises(ValueError,nvgSchema.Schema,os.path.join(self.folder,'types.xsd'))
+
+
+if __name__ == '__main__':
+    unittest.main()
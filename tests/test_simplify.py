@@ -0,0 +1,93 @@
+#-------------------------------------------------------------------------------
+# Name:        test_simplify.py
+# Purpose:     Tests coordinate quantization and simplification.
+#
+# Author:      Dave Barrett
+#
+# Created:     19/10/2026
+# Copyright:   (c) Dave 2026
+# Licence:     <your licence>
+#-------------------------------------------------------------------------------
+
+"""
+Tests nvgSimplify keeps lines and rings valid.
+"""
+import os
+import sys
+import math
+import unittest
+
+import numpy
+
+sys.path.insert(0,os.path.join(os.path.dirname(os.path.abspath(__file__)),os.pardir))
+
+import nvgSimplify
+
+
+def _circle(n,r=1.0):
+    angles = numpy.linspace(0.0,2.0 * math.pi,n)
+    ring = numpy.column_stack((r * numpy.cos(angles),r * numpy.sin(angles)))
+    ring[-1] = ring[0]
+    return ring
+
+
+class QuantizeTest(unittest.TestCase):
+
+    def test_removes_duplicates(self):
+        line = numpy.array([[0.0,0.0],[0.001,0.001],[1.0,1.0],[1.004,1.0]])
+        result = nvgSimplify.quantize(line,2)
+        self.assertEqual(result.tolist(),[[0.0,0.0],[1.0,1.0]])
+
+    def test_collapsed_ring(self):
+        ring = numpy.array([[0.0,0.0],[0.001,0.0],[0.001,0.001],[0.0,0.001],[0.0,0.0]])
+        self.assertIsNone(nvgSimplify.quantize(ring,2,ring=True))
+        self.assertEqual(len(nvgSimplify.quantize(ring,3,ring=True)),5)
+
+    def test_collapsed_line(self):
+        line = numpy.array([[0.0,0.0],[0.001,0.001]])
+        self.assertIsNone(nvgSimplify.quantize(line,2))
+
+    def test_collapsed(self):
+        self.assertTrue(nvgSimplify.collapsed([[0,0],[0,0]]))
+        self.assertFalse(nvgSimplify.collapsed([[0,0],[1,0]]))
+        self.assertTrue(nvgSimplify.collapsed([[0,0],[1,0],[0,0]],ring=True))
+        self.assertFalse(nvgSimplify.collapsed([[0,0],[1,0],[1,1],[0,0]],ring=True))
+
+
+class SimplifyTest(unittest.TestCase):
+
+    def test_line_keeps_end_points(self):
+        x = numpy.linspace(0.0,10.0,101)
+        line = numpy.column_stack((x,0.01 * numpy.sin(x)))
+        for method in nvgSimplify.methods:
+            result = nvgSimplify.simplify(line,0.1,method)
+            self.assertEqual(result[0].tolist(),line[0].tolist())
+            self.assertEqual(result[-1].tolist(),line[-1].tolist())
+            self.assertLess(len(result),len(line))
+
+    def test_douglas_peucker_tolerance(self):
+        line = numpy.array([[0.0,0.0],[1.0,0.05],[2.0,0.0],[3.0,1.0],[4.0,0.0]])
+        result = nvgSimplify.douglasPeucker(line,0.1)
+        self.assertEqual(result.tolist(),[[0.0,0.0],[2.0,0.0],[3.0,1.0],[4.0,0.0]])
+
+    def test_ring_stays_valid(self):
+        ring = _circle(200)
+        for method in nvgSimplify.methods:
+            for tolerance in (0.01,0.5,10.0):
+                result = nvgSimplify.simplify(ring,tolerance,method,ring=True)
+                self.assertGreaterEqual(len(result),4)
+                self.assertEqual(result[0].tolist(),result[-1].tolist())
+                self.assertFalse(nvgSimplify._selfIntersects(result))
+
+    def test_self_intersects(self):
+        bowtie = numpy.array([[0.0,0.0],[1.0,1.0],[1.0,0.0],[0.0,1.0],[0.0,0.0]])
+        square = numpy.array([[0.0,0.0],[1.0,0.0],[1.0,1.0],[0.0,1.0],[0.0,0.0]])
+        self.assertTrue(nvgSimplify._selfIntersects(bowtie))
+        self.assertFalse(nvgSimplify._selfIntersects(square))
+
+    def test_unknown_method(self):
+        self.assertRaises(ValueError,nvgSimplify.simplify,_circle(10),0.1,'unknown')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,174 @@
+#-------------------------------------------------------------------------------
+# Name:        test_tiles.py
+# Purpose:     Tests the vector tile pyramid written by nvgTiles.
+#
+# Author:      Dave Barrett
+#
+# Created:     19/10/2026
+# Copyright:   (c) Dave 2026
+# Licence:     <your licence>
+#-------------------------------------------------------------------------------
+
+"""
+Writes small tile pyramids to a folder and an MBTiles file and decodes the
+tiles with a minimal protocol buffer reader to check the layers, properties
+and geometry commands.
+"""
+import os
+import sys
+import gzip
+import json
+import shutil
+import sqlite3
+import tempfile
+import unittest
+from io import BytesIO
+
+sys.path.insert(0,os.path.join(os.path.dirname(os.path.abspath(__file__)),os.pardir))
+
+import nvgTiles
+
+_features = [
+    ('points',{'type': 'Point', 'coordinates': [0.0, 0.0]},{'label': 'hq'}),
+    ('polylines',{'type': 'LineString', 'coordinates': [[-90.0, 10.0], [90.0, 10.0]]},{'width': 3}),
+    ('polygons',{'type': 'Polygon', 'coordinates': [[[-10, -10], [-10, 10], [10, 10], [10, -10], [-10, -10]]]},{}),
+]
+
+
+def _fields(data):
+    """Returns the (number, value) of each field in a protocol buffer message,
+    varints as integers and length delimited fields as bytes.
+    """
+    data = bytearray(data)
+    fields = []
+    pos = 0
+
+    def varint(pos):
+        value = shift = 0
+        while True:
+            byte = data[pos]
+            value |= (byte & 0x7f) << shift
+            shift += 7
+            pos += 1
+            if not byte & 0x80:
+                return value, pos
+
+    while pos < len(data):
+        key, pos = varint(pos)
+        if key & 7 == 0:
+            value, pos = varint(pos)
+        else:
+            length, pos = varint(pos)
+            value = bytes(data[pos:pos + length])
+            pos += length
+        fields.append((key >> 3,value))
+    return fields
+
+def _varints(data):
+    values = []
+    value = shift = 0
+    for byte in bytearray(data):
+        value |= (byte & 0x7f) << shift
+        shift += 7
+        if not byte & 0x80:
+            values.append(value)
+            value = shift = 0
+    return values
+
+def _unzigzag(value):
+    return (value >> 1) ^ -(value & 1)
+
+def _decode(data):
+    """Returns a dictionary of layer name: list of (type, properties, commands).
+    """
+    layers = {}
+    for number, layerData in _fields(data):
+        fields = _fields(layerData)
+        name = [value for n, value in fields if n == 1][0].decode('utf-8')
+        keys = [value.decode('utf-8') for n, value in fields if n == 3]
+        values = [_fields(value)[0][1].decode('utf-8') for n, value in fields if n == 4]
+        features = []
+        for n, featureData in fields:
+            if n != 2:
+                continue
+            feature = dict(_fields(featureData))
+            tags = _varints(feature.get(2,b''))
+            properties = dict((keys[tags[i]],values[tags[i + 1]]) for i in range(0,len(tags),2))
+            features.append((feature[3],properties,_varints(feature[4])))
+        layers[name] = features
+    return layers
+
+
+class WriteTilesTest(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def _read(self,path):
+        with open(path,'rb') as f:
+            return f.read()
+
+    def test_folder(self):
+        output = os.path.join(self.folder,'tiles')
+        count = nvgTiles.writeTiles(_features,output,0,1,workers=1)
+        self.assertEqual(count,5)
+        self.assertTrue(os.path.exists(os.path.join(output,'1','1','1.pbf')))
+
+        layers = _decode(self._read(os.path.join(output,'0','0','0.pbf')))
+        self.assertEqual(sorted(layers),['points','polygons','polylines'])
+
+        kind, properties, commands = layers['points'][0]
+        self.assertEqual((kind,properties),(nvgTiles.POINT,{'label': 'hq'}))
+        # a single MoveTo to the centre of the tile
+        self.assertEqual(commands[0],(1 << 3) | 1)
+        self.assertEqual([_unzigzag(value) for value in commands[1:]],[2048,2048])
+
+        kind, properties, commands = layers['polylines'][0]
+        self.assertEqual((kind,properties),(nvgTiles.LINESTRING,{'width': '3'}))
+        self.assertEqual([commands[0],commands[3]],[(1 << 3) | 1,(1 << 3) | 2])
+
+        kind, properties, commands = layers['polygons'][0]
+        self.assertEqual(kind,nvgTiles.POLYGON)
+        # MoveTo, LineTo three vertices and ClosePath
+        self.assertEqual([commands[0],commands[3],commands[-1]],[(1 << 3) | 1,(3 << 3) | 2,(1 << 3) | 7])
+
+        with open(os.path.join(output,'metadata.json')) as f:
+            metadata = json.load(f)
+        self.assertEqual([layer['id'] for layer in metadata['json']['vector_layers']],
+                         ['points','polygons','polylines'])
+        self.assertEqual(metadata['bounds'][0],-90.0)
+
+    def test_clipped_line(self):
+        output = os.path.join(self.folder,'tiles')
+        nvgTiles.writeTiles(_features[1:2],output,1,1,workers=1,buffer=0)
+        # the line is split between the two northern tiles
+        self.assertEqual(sorted(os.listdir(os.path.join(output,'1'))),['0','1'])
+        for x in (0,1):
+            commands = _decode(self._read(os.path.join(output,'1',str(x),'0.pbf')))['polylines'][0][2]
+            start = [_unzigzag(value) for value in commands[1:3]]
+            end = [a + _unzigzag(value) for a, value in zip(start,commands[4:6])]
+            self.assertEqual(sorted([start[0],end[0]]),[2048,4096] if x == 0 else [0,2048])
+
+    def test_mbtiles(self):
+        output = os.path.join(self.folder,'overlay.mbtiles')
+        count = nvgTiles.writeTiles(_features,output,0,1,workers=1)
+        connection = sqlite3.connect(output)
+        try:
+            rows = connection.execute("SELECT zoom_level, tile_column, tile_row, tile_data FROM tiles").fetchall()
+            metadata = dict(connection.execute("SELECT name, value FROM metadata").fetchall())
+        finally:
+            connection.close()
+        self.assertEqual(len(rows),count)
+        self.assertEqual(metadata['name'],'overlay')
+        self.assertEqual(metadata['minzoom'],'0')
+        tiles = dict(((z,x,y),data) for z, x, y, data in rows)
+        # rows are numbered from the bottom and tiles are compressed
+        data = gzip.GzipFile(fileobj=BytesIO(bytes(tiles[(1,1,1)]))).read()
+        self.assertIn('points',_decode(data))
+
+
+if __name__ == '__main__':
+    unittest.main()
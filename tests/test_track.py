@@ -0,0 +1,106 @@
+#-------------------------------------------------------------------------------
+# Name:        test_track.py
+# Purpose:     Tests dead reckoning with nvgTrack.
+#
+# Author:      Dave Barrett
+#
+# Created:     19/10/2026
+# Copyright:   (c) Dave 2026
+# Licence:     <your licence>
+#-------------------------------------------------------------------------------
+
+"""
+Checks the track arrays built from reader rows and the positions predicted by
+both dead reckoning methods against known geodesics.
+"""
+import os
+import sys
+import unittest
+
+import numpy
+
+sys.path.insert(0,os.path.join(os.path.dirname(os.path.abspath(__file__)),os.pardir))
+
+import nvgTrack
+
+
+class _Point(object):
+    def __init__(self,x,y):
+        self.X = x
+        self.Y = y
+
+
+class _Geometry(object):
+    """Stands in for the point geometry of a reader row.
+    """
+    def __init__(self,x,y):
+        self.firstPoint = _Point(x,y)
+
+
+def _dms(degrees,minutes,seconds):
+    sign = -1 if degrees < 0 else 1
+    return sign * (abs(degrees) + minutes / 60.0 + seconds / 3600.0)
+
+
+class TracksTest(unittest.TestCase):
+
+    def test_tracks(self):
+        rows = [[_Geometry(1,2),'a',None,None,None,None,'90','5'],
+                [_Geometry(3,4),'b',None,None,None,None,'','5'],
+                [_Geometry(5,6),'c',None,None,None,None,'45','nan'],
+                [_Geometry(7,8),'d',None,None,None,None,45.0,10.0]]
+        result = nvgTrack.tracks(rows)
+        self.assertEqual(result['index'].tolist(),[0,3])
+        self.assertEqual(result['lon'].tolist(),[1.0,7.0])
+        self.assertEqual(result['lat'].tolist(),[2.0,8.0])
+        self.assertEqual(result['course'].tolist(),[90.0,45.0])
+        self.assertEqual(result['speed'].tolist(),[5.0,10.0])
+
+    def test_no_tracks(self):
+        result = nvgTrack.tracks([[_Geometry(1,2),'a',None,None,None,None,None,None]])
+        self.assertEqual(len(result['index']),0)
+        self.assertEqual(len(result['lon']),0)
+
+
+class DeadReckonTest(unittest.TestCase):
+
+    def test_vincenty_direct(self):
+        # the Flinders Peak to Buninyong example of Vincenty's direct formula
+        lon, lat = nvgTrack.deadReckon([_dms(144,25,29.52440)],[_dms(-37,57,3.72030)],
+                                       [_dms(306,52,5.37)],[54972.271],1.0)
+        self.assertAlmostEqual(lat[0],_dms(-37,39,10.15610),delta=1e-8)
+        self.assertAlmostEqual(lon[0],_dms(143,55,35.38390),delta=1e-8)
+
+    def test_equator(self):
+        # one degree of longitude along the equator
+        metres = 2 * numpy.pi * 6378137.0 / 360.0
+        for method in nvgTrack.methods:
+            lon, lat = nvgTrack.deadReckon([0.0],[0.0],[90.0],[metres],1.0,method)
+            self.assertAlmostEqual(lon[0],1.0,places=9)
+            self.assertAlmostEqual(lat[0],0.0,places=9)
+
+    def test_methods_agree_for_short_tracks(self):
+        args = ([10.0,-70.0],[50.0,-33.0],[30.0,200.0],[10.0,15.0])
+        ellipsoid = nvgTrack.deadReckon(*args,times=60.0)
+        mercator = nvgTrack.deadReckon(*args,times=60.0,method='mercator')
+        numpy.testing.assert_allclose(ellipsoid,mercator,atol=1e-7)
+
+    def test_times(self):
+        lon, lat = nvgTrack.deadReckon([0.0,10.0],[0.0,20.0],[0.0,90.0],[1.0,2.0],[0.0,60.0,120.0])
+        self.assertEqual(lon.shape,(3,2))
+        self.assertEqual(lon[0].tolist(),[0.0,10.0])
+        self.assertEqual(lat[0].tolist(),[0.0,20.0])
+        # heading north the latitude increases, heading east the longitude
+        self.assertTrue(lat[2,0] > lat[1,0] > 0)
+        self.assertTrue(lon[2,1] > lon[1,1] > 10.0)
+
+    def test_wraps_longitude(self):
+        lon, lat = nvgTrack.deadReckon([179.9],[0.0],[90.0],[1000.0],60.0)
+        self.assertTrue(-180.0 < lon[0] < -179.0)
+
+    def test_unknown_method(self):
+        self.assertRaises(ValueError,nvgTrack.deadReckon,[0],[0],[0],[1],1.0,'rhumb')
+
+
+if __name__ == '__main__':
+    unittest.main()
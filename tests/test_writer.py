@@ -0,0 +1,69 @@
+#-------------------------------------------------------------------------------
+# Name:        test_writer.py
+# Purpose:     Tests the elements written by nvgWriter.
+#
+# Author:      Dave Barrett
+#
+# Created:     19/10/2026
+# Copyright:   (c) Dave 2026
+# Licence:     <your licence>
+#-------------------------------------------------------------------------------
+
+"""
+Checks the circle and arc elements written for curved features keep their
+geometry attributes ahead of the label and style, which ComBAT requires.
+nvgWriter requires arcpy so the tests are skipped where it is not installed.
+"""
+import os
+import sys
+import json
+import math
+import unittest
+
+sys.path.insert(0,os.path.join(os.path.dirname(os.path.abspath(__file__)),os.pardir))
+
+try:
+    import arcpy
+    import nvgWriter
+except ImportError:
+    nvgWriter = None
+
+
+class _CurvedLine(object):
+    """A true curve line in world mercator, as read from ArcGIS."""
+    hasCurves = True
+    partCount = 1
+    JSON = json.dumps({'curvePaths': [[[0, 0], {'a': [[200000, 0], [100000, 0], 0, 1]}]]})
+
+    def projectAs(self,spatialReference):
+        return self
+
+
+@unittest.skipIf(nvgWriter is None,"nvgWriter requires arcpy")
+class CurveFeatureTest(unittest.TestCase):
+
+    def setUp(self):
+        self.writer = nvgWriter.Writer()
+
+    def test_circle_attribute_order(self):
+        # a densified circle of about 1km radius at 50N, the longitude is
+        # stretched so the ring is round in world mercator
+        scale = math.cos(math.radians(50))
+        ring = [arcpy.Point(10 + 0.01 * math.cos(math.radians(a)) / scale,
+                            50 + 0.01 * math.sin(math.radians(a)))
+                for a in range(0,361,5)]
+        polygon = arcpy.Polygon(arcpy.Array(ring),self.writer.wgs84)
+        element = self.writer._curveFeature(polygon,'Polygon','lbl','sty',curveTolerance=5)
+        self.assertEqual(element.tag,'circle')
+        self.assertEqual(list(element.attrib),['cx','cy','r','label','style'])
+
+    def test_arc_attribute_order(self):
+        element = self.writer._curveFeature(_CurvedLine(),'Polyline','lbl','sty')
+        self.assertEqual(element.tag,'arc')
+        self.assertEqual(list(element.attrib),['cx','cy','rx','ry','rotation',
+                                               'startangle','endangle','label','style'])
+        self.assertEqual((element.get('label'),element.get('style')),('lbl','sty'))
+
+
+if __name__ == '__main__':
+    unittest.main()
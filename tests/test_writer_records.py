@@ -0,0 +1,107 @@
+#-------------------------------------------------------------------------------
+# Name:        test_writer_records.py
+# Purpose:     Tests writing NVG from NDJSON GeoJSON records.
+#
+# Author:      Dave Barrett
+#
+# Created:     19/10/2026
+# Copyright:   (c) Dave 2026
+# Licence:     <your licence>
+#-------------------------------------------------------------------------------
+
+"""
+Streams a mix of Point, LineString and MultiPolygon NDJSON features through
+nvgWriter.geojsonRecords and Writer.writeRecords. nvgWriter requires arcpy so
+the tests are skipped where it is not installed.
+"""
+import io
+import os
+import sys
+import json
+import shutil
+import tempfile
+import unittest
+from xml.etree.ElementTree import parse
+
+sys.path.insert(0,os.path.join(os.path.dirname(os.path.abspath(__file__)),os.pardir))
+
+try:
+    import nvgWriter
+except ImportError:
+    nvgWriter = None
+
+_ns = '{http://tide.act.nato.int/schemas/2008/10/nvg}'
+
+_features = [
+    {'type': 'Feature', 'properties': {'label': 'hq', 'symbol': 'SFGPU----------'},
+     'geometry': {'type': 'Point', 'coordinates': [1.5, 2.25, 10.0]}},
+    {'type': 'Feature', 'properties': {'Label': 'route', 'colour': '14', 'width': 3},
+     'geometry': {'type': 'LineString', 'coordinates': [[0, 0], [1, 1], [2, 0]]}},
+    {'type': 'Feature', 'properties': {'label': 'no symbol'},
+     'geometry': {'type': 'Point', 'coordinates': [3.0, 4.0]}},
+    {'type': 'Feature', 'properties': {'COLOUR': 4, 'FILL': 2, 'WIDTH': 1},
+     'geometry': {'type': 'MultiPolygon', 'coordinates': [
+         [[[0, 0], [1, 0], [1, 1], [0, 0]]],
+         [[[5, 5], [6, 5], [6, 6], [5, 5]]]]}},
+    {'type': 'Feature', 'properties': {}, 'geometry': None},
+]
+
+
+@unittest.skipIf(nvgWriter is None,"nvgWriter requires arcpy")
+class WriteRecordsTest(unittest.TestCase):
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        self.nvgFile = os.path.join(self.folder,'records.nvg')
+        self.ndjson = '\n'.join(json.dumps(feature) for feature in _features) + '\n'
+
+    def tearDown(self):
+        shutil.rmtree(self.folder)
+
+    def _write(self,**kwargs):
+        writer = nvgWriter.Writer()
+        source = io.BytesIO(self.ndjson.encode('utf-8'))
+        writer.writeRecords(nvgWriter.geojsonRecords(source),self.nvgFile,**kwargs)
+        return writer, parse(self.nvgFile).getroot()
+
+    def test_mixed_geometry(self):
+        writer, root = self._write()
+        tags = [element.tag.replace(_ns,'') for element in root]
+        self.assertEqual(tags,['point','polyline','polygon','polygon'])
+
+        point = root[0]
+        self.assertEqual(point.get('label'),'hq')
+        self.assertEqual(point.get('symbol'),'app6a:SFGPU----------')
+        self.assertEqual((float(point.get('x')),float(point.get('y'))),(1.5,2.25))
+        self.assertEqual(root[1].get('label'),'route')
+        self.assertEqual(root[1].get('points'),'0.0,0.0 1.0,1.0 2.0,0.0')
+        self.assertEqual(root[3].get('points'),'5.0,5.0 6.0,5.0 6.0,6.0 5.0,5.0')
+
+    def test_point_without_symbol_is_skipped(self):
+        writer, root = self._write()
+        self.assertEqual(sum(writer.skipped.values()),1)
+        self.assertIn('Skipped 1 features in records: no symbol code',writer.summary())
+
+    def test_collapsed_geometry(self):
+        self.ndjson = '\n'.join(json.dumps({'type': 'Feature', 'properties': {}, 'geometry': geometry})
+                                for geometry in [
+            {'type': 'Polygon', 'coordinates': [[[0, 0], [0.001, 0], [0.001, 0.001], [0, 0.001], [0, 0]]]},
+            {'type': 'LineString', 'coordinates': [[0, 0], [0.001, 0.001]]},
+            {'type': 'LineString', 'coordinates': [[5, 5], [5, 5]]}]) + '\n'
+        writer, root = self._write(precision=2)
+        # collapsed by rounding, written at full precision
+        self.assertEqual(root[0].get('points'),'0.0,0.0 0.001,0.0 0.001,0.001 0.0,0.001 0.0,0.0')
+        self.assertEqual(root[1].get('points'),'0.0,0.0 0.001,0.001')
+        # a line with a single distinct vertex is skipped
+        self.assertEqual(len(root),2)
+        self.assertEqual(writer.skipped,{('records','polyline with too few vertices'): 1})
+
+    def test_append(self):
+        self._write()
+        writer, root = self._write(append=True,precision=2)
+        self.assertEqual(len(root),8)
+        self.assertEqual(root[5].get('points'),'0.00,0.00 1.00,1.00 2.00,0.00')
+
+
+if __name__ == '__main__':
+    unittest.main()
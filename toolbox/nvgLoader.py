@@ -0,0 +1,155 @@
+#-------------------------------------------------------------------------------
+# Name:        nvgLoader.py
+# Purpose:     Load the features read from NVG files into a geodatabase.
+#
+# Author:      Dave Barrett
+#
+# Created:     19/10/2026
+# Copyright:   (c) Dave 2026
+# Licence:     <your licence>
+#-------------------------------------------------------------------------------
+
+"""
+This module provides the loading of NVG features into feature classes used by
+the Load NVG tool and by nvgWatcher.
+
+Each file, or every file in merge mode, is loaded into a point, polyline,
+polygon and multipoint feature class with a text field for each attribute
+returned by nvgReader. The features are read with Reader.iterBatches and each
+batch is inserted as it is read, so only one batch of geometry is held in
+memory. Creating feature classes and inserting rows are serialised with a lock
+so a loader can be shared by threads loading different files, file
+geodatabases do not support concurrent schema changes.
+"""
+import os
+import threading
+
+import arcpy
+
+from nvgReader import attributeNames, featureTypes
+
+# fields of the rows returned by nvgReader, SHAPE@ is used by the insert
+# cursors only
+fields = ["SHAPE@"] + attributeNames
+
+
+class Loader(object):
+    """Creates feature classes in a geodatabase and inserts the features read
+    by nvgReader.Reader into them.
+    """
+    def __init__(self,gdb,sr=None,fingerprint=False,merge=False,batchSize=1000):
+        """Set the output geodatabase and the fields of the feature classes.
+
+        sr is the spatial reference of the feature classes, WGS84 by default,
+        and should be the target of the readers. If fingerprint is True the
+        rows end with the fingerprint added by a reader with a dedupe and a
+        sources field is added, see recordSources. In merge mode the source
+        file and load time of each feature are added, see load. batchSize is
+        the number of features read before they are inserted.
+        """
+        self.gdb = gdb
+        self.sr = sr if sr is not None else arcpy.SpatialReference(4326)
+        self.batchSize = batchSize
+
+        self.fields = list(fields)
+        # fields added with their own types, they are not part of the rows
+        # returned by the reader
+        self.extraFields = []
+        if fingerprint:
+            self.fields.append("fingerprint")
+            self.extraFields.append(("sources","TEXT",4000))
+        self.cursorFields = list(self.fields)
+        if merge:
+            self.extraFields.extend([("source_file","TEXT",255),("load_time","DATE",None)])
+            self.cursorFields.extend(["source_file","load_time"])
+
+        # every feature class created by the loader
+        self.featureClasses = []
+        self._lock = threading.Lock()
+
+        return
+
+    def createFeatureClasses(self,name):
+        """Creates a point, polyline, polygon and multipoint feature class
+        named from name and returns a dictionary of feature type: feature class.
+        """
+        fcs = {}
+        with self._lock:
+            for fType in featureTypes:
+                # create the output name
+                outName = arcpy.ValidateTableName(name + "_" + fType,self.gdb)
+                outName = arcpy.CreateUniqueName(outName,self.gdb)
+
+                outFC = arcpy.CreateFeatureclass_management(self.gdb,os.path.basename(outName),
+                                                            fType.upper(),spatial_reference=self.sr)
+                # add the required fields
+                for field in self.fields[1:]:
+                    arcpy.AddField_management(outFC,field,"TEXT",field_length=255)
+                for field, fieldType, length in self.extraFields:
+                    arcpy.AddField_management(outFC,field,fieldType,field_length=length)
+                fcs[fType] = outFC
+                self.featureClasses.append(outFC)
+
+        return fcs
+
+    def openCursors(self,fcs):
+        """Returns a dictionary of feature type: insert cursor for the feature
+        classes returned by createFeatureClasses.
+        """
+        return dict((fType,arcpy.da.InsertCursor(fcs[fType],self.cursorFields))
+                    for fType in featureTypes)
+
+    def load(self,reader,cursors,extra=None):
+        """Inserts the features read by reader batch by batch with the open
+        insert cursors and returns a dictionary of feature type: number of
+        features inserted.
+
+        extra is the list of values added to every row, the source file and
+        load time in merge mode. The cursors are left open.
+        """
+        extra = list(extra or [])
+        counts = dict((fType,0) for fType in featureTypes)
+        cursor = None
+        try:
+            for fType, rows in reader.iterBatches(self.batchSize):
+                cursor = cursors[fType]
+                with self._lock:
+                    for row in rows:
+                        cursor.insertRow(row + extra)
+                counts[fType] += len(rows)
+        finally:
+            # a traceback would keep the cursor open
+            cursor = None
+
+        return counts
+
+    def loadFile(self,reader,name):
+        """Creates the feature classes named from name and loads the features
+        read by reader into them.
+
+        Returns the dictionary of feature classes and the counts returned by
+        load. The feature classes are left in place if the read fails.
+        """
+        fcs = self.createFeatureClasses(name)
+        cursors = self.openCursors(fcs)
+        try:
+            counts = self.load(reader,cursors)
+        finally:
+            # release the insert cursors
+            cursors.clear()
+
+        return fcs, counts
+
+    def recordSources(self,dedupe):
+        """Records the files each feature was found in, from the
+        nvgDedupe.Deduplicator shared by the readers, in the sources field of
+        every feature class created.
+        """
+        for fc in self.featureClasses:
+            with arcpy.da.UpdateCursor(fc,["fingerprint","sources"]) as cursor:
+                for row in cursor:
+                    sources = [os.path.basename(source) for source in dedupe.sourcesOf(row[0])]
+                    row[1] = ';'.join(sources)[:4000]
+                    cursor.updateRow(row)
+
+        return
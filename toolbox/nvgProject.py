@@ -0,0 +1,180 @@
+#-------------------------------------------------------------------------------
+# Name:        nvgProject.py
+# Purpose:     Transform coordinate arrays between coordinate systems.
+#
+# Author:      Dave Barrett
+#
+# Created:     19/10/2026
+# Copyright:   (c) Dave 2026
+# Licence:     <your licence>
+#-------------------------------------------------------------------------------
+
+"""
+This module provides transformation of whole arrays of coordinates between
+coordinate systems identified by their EPSG code.
+
+pyproj is used when it is installed so any coordinate system can be used.
+Without pyproj the following are supported using the WGS84 ellipsoid:
+    4326           - WGS84 geographic
+    3395           - World Mercator
+    3857           - Web Mercator
+    32601 - 32660  - WGS84 UTM zones north
+    32701 - 32760  - WGS84 UTM zones south
+
+UTM coordinates are calculated with the Kruger series to sixth order which is
+accurate to well under a millimetre within the zone.
+"""
+import numpy
+
+try:
+    import pyproj
+except ImportError:
+    pyproj = None
+
+# WGS84 ellipsoid
+_a = 6378137.0
+_f = 1 / 298.257223563
+_e = numpy.sqrt(_f * (2 - _f))
+
+# Kruger series coefficients for the transverse mercator projection
+_n = _f / (2 - _f)
+_A = _a / (1 + _n) * (1 + _n ** 2 / 4 + _n ** 4 / 64 + _n ** 6 / 256)
+_alpha = [_n / 2 - 2 * _n ** 2 / 3 + 5 * _n ** 3 / 16 + 41 * _n ** 4 / 180 - 127 * _n ** 5 / 288 + 7891 * _n ** 6 / 37800,
+          13 * _n ** 2 / 48 - 3 * _n ** 3 / 5 + 557 * _n ** 4 / 1440 + 281 * _n ** 5 / 630 - 1983433 * _n ** 6 / 1935360,
+          61 * _n ** 3 / 240 - 103 * _n ** 4 / 140 + 15061 * _n ** 5 / 26880 + 167603 * _n ** 6 / 181440,
+          49561 * _n ** 4 / 161280 - 179 * _n ** 5 / 168 + 6601661 * _n ** 6 / 7257600,
+          34729 * _n ** 5 / 80640 - 3418889 * _n ** 6 / 1995840,
+          212378941 * _n ** 6 / 319334400]
+
+
+def mercatorX(lon):
+    """Returns the World Mercator easting of longitudes in radians.
+    """
+    return _a * lon
+
+def mercatorY(lat):
+    """Returns the World Mercator northing of latitudes in radians.
+    """
+    sinLat = numpy.sin(lat)
+    return _a * numpy.log(numpy.tan(numpy.pi / 4 + lat / 2) *
+                          ((1 - _e * sinLat) / (1 + _e * sinLat)) ** (_e / 2))
+
+def mercatorLat(y):
+    """Returns the latitudes in radians of World Mercator northings.
+    """
+    t = numpy.exp(-y / _a)
+    lat = numpy.pi / 2 - 2 * numpy.arctan(t)
+    for iteration in range(15):
+        sinLat = numpy.sin(lat)
+        previous = lat
+        lat = numpy.pi / 2 - 2 * numpy.arctan(t * ((1 - _e * sinLat) / (1 + _e * sinLat)) ** (_e / 2))
+        if numpy.all(numpy.abs(lat - previous) < 1e-14):
+            break
+
+    return lat
+
+def _utmZone(code):
+    """Returns (zone, south) for a WGS84 UTM EPSG code, or None.
+    """
+    if 32601 <= code <= 32660:
+        return code - 32600, False
+    if 32701 <= code <= 32760:
+        return code - 32700, True
+    return None
+
+def _utm(lon,lat,zone,south):
+    """Returns the UTM easting and northing of longitudes and latitudes in
+    degrees.
+    """
+    lam = numpy.radians(lon - (zone * 6 - 183))
+    # keep the longitude difference within -180 to 180
+    lam = (lam + numpy.pi) % (2 * numpy.pi) - numpy.pi
+    phi = numpy.radians(lat)
+
+    sinPhi = numpy.sin(phi)
+    t = numpy.sinh(numpy.arctanh(sinPhi) - _e * numpy.arctanh(_e * sinPhi))
+    xiP = numpy.arctan2(t,numpy.cos(lam))
+    etaP = numpy.arctanh(numpy.sin(lam) / numpy.sqrt(1 + t * t))
+
+    xi = xiP.copy()
+    eta = etaP.copy()
+    for j, alpha in enumerate(_alpha):
+        k = 2 * (j + 1)
+        xi += alpha * numpy.sin(k * xiP) * numpy.cosh(k * etaP)
+        eta += alpha * numpy.cos(k * xiP) * numpy.sinh(k * etaP)
+
+    k0 = 0.9996
+    x = 500000.0 + k0 * _A * eta
+    y = k0 * _A * xi
+    if south:
+        y = y + 10000000.0
+
+    return x, y
+
+def supported(code):
+    """Returns True if the coordinate system can be used without pyproj.
+    """
+    return code in (4326,3395,3857) or _utmZone(code) is not None
+
+def _toGeographic(code,x,y):
+    """Returns the longitudes and latitudes in degrees of coordinates in the
+    coordinate system code. Only geographic and World Mercator are supported.
+    """
+    if code == 4326:
+        return x, y
+    if code == 3395:
+        return numpy.degrees(x / _a), numpy.degrees(mercatorLat(y))
+    if code == 3857:
+        return numpy.degrees(x / _a), numpy.degrees(2 * numpy.arctan(numpy.exp(y / _a)) - numpy.pi / 2)
+    raise ValueError("Unsupported source coordinate system: {0}".format(code))
+
+def _fromGeographic(code,lon,lat):
+    """Returns the coordinates in the coordinate system code of longitudes and
+    latitudes in degrees.
+    """
+    if code == 4326:
+        return lon, lat
+    if code == 3395:
+        return mercatorX(numpy.radians(lon)), mercatorY(numpy.radians(lat))
+    if code == 3857:
+        return _a * numpy.radians(lon), _a * numpy.log(numpy.tan(numpy.pi / 4 + numpy.radians(lat) / 2))
+    zone = _utmZone(code)
+    if zone is not None:
+        return _utm(lon,lat,zone[0],zone[1])
+    raise ValueError("Unsupported target coordinate system: {0}".format(code))
+
+
+class Transformer(object):
+    """Transforms coordinate arrays from one coordinate system to another.
+    """
+    def __init__(self,source,target):
+        """source and target are EPSG codes.
+        """
+        self.source = int(source)
+        self.target = int(target)
+        self._transformer = None
+
+        if self.source == self.target:
+            pass
+        elif pyproj is not None and hasattr(pyproj,'Transformer'):
+            self._transformer = pyproj.Transformer.from_crs("EPSG:{0}".format(self.source),
+                                                            "EPSG:{0}".format(self.target),
+                                                            always_xy=True)
+        elif not (self.source in (4326,3395,3857) and supported(self.target)):
+            raise ValueError("Transformation from {0} to {1} requires pyproj".format(self.source,self.target))
+
+        return
+
+    def transform(self,x,y):
+        """Returns the transformed arrays of x and y coordinates.
+        """
+        x = numpy.asarray(x,dtype=float)
+        y = numpy.asarray(y,dtype=float)
+        if self.source == self.target:
+            return x, y
+        if self._transformer is not None:
+            tx, ty = self._transformer.transform(x,y)
+            return numpy.asarray(tx), numpy.asarray(ty)
+
+        lon, lat = _toGeographic(self.source,x,y)
+        return _fromGeographic(self.target,lon,lat)
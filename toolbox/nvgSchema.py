@@ -0,0 +1,422 @@
+#-------------------------------------------------------------------------------
+# Name:        nvgSchema.py
+# Purpose:     Validate NVG elements against the NVG XML schemas.
+#
+# Author:      Dave Barrett
+#
+# Created:     19/10/2026
+# Copyright:   (c) Dave 2026
+# Licence:     <your licence>
+#-------------------------------------------------------------------------------
+
+"""
+This module provides validation of NVG elements against the NVG 1.4.0, 1.5.0
+and 2.0.0 XML schema definitions (XSD) supplied as local files.
+
+The schema is compiled into a validator for each element name holding the
+required attributes and a check for the type of every declared attribute.
+Elements are validated one at a time so the reader can check each element as
+it extracts the feature instead of validating the whole document in a separate
+pass. Only the parts of XSD used for attributes are supported: simple types
+derived by restriction, list or union with enumeration, pattern, length and
+range facets, attribute groups and complex types derived by extension or
+restriction. The content model of elements is not checked.
+"""
+import os
+import re
+import xml.dom.minidom
+
+from nvgIO import namespaces
+
+XSD = 'http://www.w3.org/2001/XMLSchema'
+
+try:
+    stringTypes = basestring
+except NameError:
+    stringTypes = str
+
+
+class ValidationError(ValueError):
+    """Raised when an NVG element does not conform to the schema.
+    """
+    pass
+
+
+def _isDouble(value):
+    try:
+        float(value)
+    except ValueError:
+        return value in ('INF','-INF','NaN')
+    return True
+
+def _integer(minimum=None,maximum=None):
+    """Returns a check for an integer type with optional bounds.
+    """
+    def check(value):
+        try:
+            number = int(value)
+        except ValueError:
+            return False
+        if minimum is not None and number < minimum:
+            return False
+        if maximum is not None and number > maximum:
+            return False
+        return True
+    return check
+
+# checks for the built in types, types not listed accept any value
+_builtins = {'double': _isDouble,
+             'float': _isDouble,
+             'decimal': lambda value: re.match(r'^[+-]?(\d+\.?\d*|\.\d+)$',value) is not None,
+             'integer': _integer(),
+             'long': _integer(),
+             'int': _integer(-2 ** 31,2 ** 31 - 1),
+             'short': _integer(-2 ** 15,2 ** 15 - 1),
+             'byte': _integer(-128,127),
+             'nonNegativeInteger': _integer(0),
+             'positiveInteger': _integer(1),
+             'nonPositiveInteger': _integer(None,0),
+             'negativeInteger': _integer(None,-1),
+             'unsignedInt': _integer(0,2 ** 32 - 1),
+             'unsignedShort': _integer(0,2 ** 16 - 1),
+             'unsignedByte': _integer(0,255),
+             'boolean': lambda value: value in ('true','false','1','0')}
+
+
+def _number(value):
+    """Returns the value as a float for the range facets, NaN if it is not a
+    number so every comparison fails.
+    """
+    try:
+        return float(value)
+    except ValueError:
+        return float('nan')
+
+def _localName(qname):
+    """Returns the name without the namespace prefix.
+    """
+    return qname.split(':',1)[-1] if qname else qname
+
+def _children(node,*tags):
+    """Returns the XSD child elements of node with one of the tags.
+    """
+    return [child for child in node.childNodes
+            if child.nodeType == child.ELEMENT_NODE and child.namespaceURI == XSD
+            and child.localName in tags]
+
+def _accept(value):
+    return True
+
+
+class _Validator(object):
+    """Attribute validator for a single element.
+    """
+    def __init__(self,tag,required,checks,anyAttribute):
+        self.tag = tag
+        self.required = required
+        self.checks = checks
+        self.anyAttribute = anyAttribute
+
+    def errors(self,attributes):
+        """Returns a list of errors for the dictionary of attribute values.
+        """
+        errors = []
+        for name in self.required:
+            if name not in attributes:
+                errors.append("missing required attribute '{0}'".format(name))
+        for name, value in attributes.items():
+            if name.startswith('xmlns') or ':' in name:
+                continue
+            check = self.checks.get(name)
+            if check is None:
+                if not self.anyAttribute:
+                    errors.append("attribute '{0}' is not allowed".format(name))
+            elif not check(value):
+                errors.append("invalid value for attribute '{0}': '{1}'".format(name,value))
+        return errors
+
+
+class _Definitions(object):
+    """Named types, attribute groups and elements of one target namespace.
+    """
+    def __init__(self):
+        self.simpleTypes = {}
+        self.complexTypes = {}
+        self.attributeGroups = {}
+        self.attributes = {}
+        self.elements = {}
+
+
+class Schema(object):
+    """Compiled NVG schemas, one for each NVG version loaded.
+    """
+    def __init__(self,xsdFiles):
+        """Load the schema from one or more local XSD files.
+
+        The version of each schema is taken from its target namespace. Files
+        included or imported by a schema are loaded from the same folder.
+        """
+        if isinstance(xsdFiles,stringTypes):
+            xsdFiles = [xsdFiles]
+
+        self._definitions = {}
+        self._loaded = set()
+        self._validators = {}
+        for xsdFile in xsdFiles:
+            self._load(xsdFile)
+
+        # the NVG versions with a schema
+        self.versions = sorted(version for version, namespace in namespaces.items()
+                               if namespace in self._definitions)
+
+        if not self.versions:
+            raise ValueError("No NVG schema found in: {0}".format(xsdFiles))
+
+        return
+
+    def _load(self,xsdFile,namespace=''):
+        """Reads the declarations from xsdFile and any files it includes.
+
+        An included file without a target namespace takes the namespace of the
+        file including it.
+        """
+        xsdFile = os.path.abspath(xsdFile)
+        if xsdFile in self._loaded:
+            return
+        self._loaded.add(xsdFile)
+
+        root = xml.dom.minidom.parse(xsdFile).documentElement
+        target = root.getAttribute('targetNamespace') or namespace
+        definitions = self._definitions.setdefault(target,_Definitions())
+
+        folder = os.path.dirname(xsdFile)
+        for node in _children(root,'include','import','redefine'):
+            location = node.getAttribute('schemaLocation')
+            if location and '://' not in location:
+                included = target if node.localName != 'import' else ''
+                self._load(os.path.join(folder,location),included)
+
+        for node in _children(root,'simpleType'):
+            definitions.simpleTypes[node.getAttribute('name')] = node
+        for node in _children(root,'complexType'):
+            definitions.complexTypes[node.getAttribute('name')] = node
+        for node in _children(root,'attributeGroup'):
+            definitions.attributeGroups[node.getAttribute('name')] = node
+        for node in _children(root,'attribute'):
+            definitions.attributes[node.getAttribute('name')] = node
+
+        # element declarations can be global or local to a type or group, the
+        # first declaration of each name is used
+        for node in root.getElementsByTagNameNS(XSD,'element'):
+            name = node.getAttribute('name')
+            if name and name not in definitions.elements:
+                definitions.elements[name] = node
+
+        return
+
+    def _simpleCheck(self,definitions,node,depth=0):
+        """Returns the check for the values of a simpleType node.
+        """
+        if depth > 32:
+            return _accept
+
+        restriction = _children(node,'restriction')
+        if restriction:
+            restriction = restriction[0]
+            base = _localName(restriction.getAttribute('base'))
+            inline = _children(restriction,'simpleType')
+            if inline:
+                baseCheck = self._simpleCheck(definitions,inline[0],depth + 1)
+            else:
+                baseCheck = self._typeCheck(definitions,base,depth + 1)
+            return self._facets(restriction,baseCheck)
+
+        items = _children(node,'list')
+        if items:
+            items = items[0]
+            inline = _children(items,'simpleType')
+            if inline:
+                itemCheck = self._simpleCheck(definitions,inline[0],depth + 1)
+            else:
+                itemCheck = self._typeCheck(definitions,_localName(items.getAttribute('itemType')),depth + 1)
+            return lambda value: all(itemCheck(item) for item in value.split())
+
+        union = _children(node,'union')
+        if union:
+            union = union[0]
+            members = [self._typeCheck(definitions,_localName(name),depth + 1)
+                       for name in union.getAttribute('memberTypes').split()]
+            members.extend(self._simpleCheck(definitions,inline,depth + 1)
+                           for inline in _children(union,'simpleType'))
+            return lambda value: any(check(value) for check in members)
+
+        return _accept
+
+    def _facets(self,restriction,baseCheck):
+        """Returns the check for a restriction with its facets.
+        """
+        enumeration = set()
+        patterns = []
+        limits = []
+        for facet in _children(restriction,'enumeration','pattern','length','minLength',
+                               'maxLength','minInclusive','maxInclusive',
+                               'minExclusive','maxExclusive'):
+            value = facet.getAttribute('value')
+            name = facet.localName
+            if name == 'enumeration':
+                enumeration.add(value)
+            elif name == 'pattern':
+                try:
+                    patterns.append(re.compile('^(?:' + value + ')$'))
+                except re.error:
+                    # XSD specific escapes such as \i and \c are not checked
+                    pass
+            elif name == 'length':
+                limits.append(lambda v, n=int(value): len(v) == n)
+            elif name == 'minLength':
+                limits.append(lambda v, n=int(value): len(v) >= n)
+            elif name == 'maxLength':
+                limits.append(lambda v, n=int(value): len(v) <= n)
+            else:
+                try:
+                    bound = float(value)
+                except ValueError:
+                    # range facets of date and time types are not checked
+                    continue
+                if name == 'minInclusive':
+                    limits.append(lambda v, n=bound: _number(v) >= n)
+                elif name == 'maxInclusive':
+                    limits.append(lambda v, n=bound: _number(v) <= n)
+                elif name == 'minExclusive':
+                    limits.append(lambda v, n=bound: _number(v) > n)
+                elif name == 'maxExclusive':
+                    limits.append(lambda v, n=bound: _number(v) < n)
+
+        def check(value):
+            if not baseCheck(value):
+                return False
+            if enumeration and value not in enumeration:
+                return False
+            if patterns and not any(pattern.match(value) for pattern in patterns):
+                return False
+            return all(limit(value) for limit in limits)
+
+        return check
+
+    def _typeCheck(self,definitions,name,depth=0):
+        """Returns the check for the named simple type.
+        """
+        node = definitions.simpleTypes.get(name)
+        if node is not None:
+            return self._simpleCheck(definitions,node,depth)
+        return _builtins.get(name,_accept)
+
+    def _attributeCheck(self,definitions,node):
+        """Returns the check for the values of an attribute node.
+        """
+        inline = _children(node,'simpleType')
+        if inline:
+            return self._simpleCheck(definitions,inline[0])
+        return self._typeCheck(definitions,_localName(node.getAttribute('type')))
+
+    def _collect(self,definitions,node,required,checks,prohibited,depth=0):
+        """Collects the attributes declared in a complexType or attributeGroup
+        node. Returns True if any other attribute is allowed.
+        """
+        if depth > 32:
+            return True
+        anyAttribute = False
+
+        for content in _children(node,'complexContent','simpleContent'):
+            for derived in _children(content,'extension','restriction'):
+                base = definitions.complexTypes.get(_localName(derived.getAttribute('base')))
+                if base is not None:
+                    anyAttribute |= self._collect(definitions,base,required,checks,prohibited,depth + 1)
+                anyAttribute |= self._collect(definitions,derived,required,checks,prohibited,depth + 1)
+
+        for attribute in _children(node,'attribute'):
+            ref = _localName(attribute.getAttribute('ref'))
+            if ref:
+                declaration = definitions.attributes.get(ref)
+                name = ref
+                check = self._attributeCheck(definitions,declaration) if declaration is not None else _accept
+            else:
+                name = attribute.getAttribute('name')
+                check = self._attributeCheck(definitions,attribute)
+            use = attribute.getAttribute('use')
+            if use == 'prohibited':
+                prohibited.add(name)
+                continue
+            checks[name] = check
+            if use == 'required':
+                required.add(name)
+
+        for group in _children(node,'attributeGroup'):
+            ref = definitions.attributeGroups.get(_localName(group.getAttribute('ref')))
+            if ref is not None:
+                anyAttribute |= self._collect(definitions,ref,required,checks,prohibited,depth + 1)
+
+        if _children(node,'anyAttribute'):
+            anyAttribute = True
+
+        return anyAttribute
+
+    def _validator(self,namespace,tag):
+        """Returns the compiled validator for the element tag, or None if the
+        schema does not declare the element.
+        """
+        key = (namespace,tag)
+        if key in self._validators:
+            return self._validators[key]
+
+        validator = None
+        definitions = self._definitions.get(namespace)
+        element = definitions.elements.get(tag) if definitions else None
+        if element is not None:
+            inline = _children(element,'complexType')
+            if inline:
+                complexType = inline[0]
+            else:
+                complexType = definitions.complexTypes.get(_localName(element.getAttribute('type')))
+
+            required = set()
+            checks = {}
+            prohibited = set()
+            anyAttribute = False
+            if complexType is not None:
+                anyAttribute = self._collect(definitions,complexType,required,checks,prohibited)
+            for name in prohibited:
+                checks.pop(name,None)
+                required.discard(name)
+            validator = _Validator(tag,sorted(required),checks,anyAttribute)
+
+        self._validators[key] = validator
+
+        return validator
+
+    def errors(self,element,namespace=None):
+        """Returns a list of the errors for a minidom element, an empty list if
+        the element is valid.
+        """
+        namespace = namespace or element.namespaceURI
+        if namespace not in self._definitions:
+            return ["no schema loaded for namespace {0}".format(namespace)]
+        validator = self._validator(namespace,element.localName)
+        if validator is None:
+            return ["element '{0}' is not declared in the schema".format(element.localName)]
+
+        attributes = dict(element.attributes.items())
+
+        return validator.errors(attributes)
+
+    def validate(self,element,namespace=None,location=None):
+        """Raises ValidationError if the minidom element is not valid.
+
+        location is included in the error message to identify the element.
+        """
+        errors = self.errors(element,namespace)
+        if errors:
+            where = location or element.localName
+            raise ValidationError("{0}: {1}".format(where,'; '.join(errors)))
+
+        return